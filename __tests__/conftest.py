@@ -0,0 +1,6 @@
+"""pytest setup for the Python SEO suite: make test_seo_automated.py at the repo root importable"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,1114 @@
+"""
+Tests for the Python SEO suite (test_seo_automated.py)
+Run with: python -m pytest __tests__
+Pages are served by MockTransport; only the request timing tests open a socket, on loopback.
+"""
+
+import http.server
+import io
+import json
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+import test_seo_automated as seo
+
+
+def mock_suite(pages: int = 6, **options) -> seo.SEOTestSuite:
+    """A quiet suite crawling a SyntheticSite through the mock transport"""
+    site = seo.SyntheticSite(pages)
+    site.base_url = seo.MOCK_BASE_URL
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, parser='lxml-incremental',
+                             transport=seo.MockTransport.for_site(site))
+    suite.verbose = False
+    suite.show_pages = False
+    for name, value in options.items():
+        setattr(suite, name, value)
+    return suite
+
+
+def run_scheduler(suite: seo.SEOTestSuite, workers: int, timeout: float = 60) -> list:
+    """CheckScheduler.run(crawl=True) in a thread, failing instead of hanging on a deadlock"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['paths'] = seo.CheckScheduler(suite, workers).run(crawl=True)
+        except Exception as e:  # re-raised below, in the test's thread
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"scheduler with {workers} worker(s) still running after {timeout}s"
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['paths']
+
+
+class EventRecorder(seo.EventSink):
+    """Keeps the events a suite emits"""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event: seo.ResultEvent):
+        self.events.append(event)
+
+
+def files_suite(files: dict, **options) -> seo.SEOTestSuite:
+    """A quiet suite over a path -> (content type, body) map, answered like fixture_response does"""
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=seo.MockTransport.for_site(files))
+    suite.verbose = False
+    suite.events = EventRecorder()
+    for name, value in options.items():
+        setattr(suite, name, value)
+    return suite
+
+
+def checks(suite: seo.SEOTestSuite) -> dict:
+    """check name -> passed, of the checks a suite emitted"""
+    return {event.name: event.passed for event in suite.events.events if event.kind == 'check'}
+
+
+def mock_session(handler, **kwargs):
+    transport = seo.MockTransport(handler, **kwargs)
+    session = requests.Session()
+    session.mount('http://', transport)
+    session.mount('https://', transport)
+    return session, transport
+
+
+# ==================== RESULT EVENTS ====================
+
+def test_fetch_errors_are_events_not_prints(capsys):
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=seo.MockTransport(lambda request: None))
+    suite.verbose = False
+    suite.events = EventRecorder()
+    assert suite.fetch_index('/') == (None, None)
+    assert suite.fetch_sitemap_paths() == []
+    assert capsys.readouterr().out == ''
+    errors = [event.name for event in suite.events.events if event.kind == 'error']
+    assert len(errors) == 2
+    assert errors[0].startswith(f"Error fetching {seo.MOCK_BASE_URL}/: ")
+    assert errors[1].startswith("Error fetching sitemap: ")
+
+
+def test_jsonl_sink_writes_one_object_per_event_from_every_worker(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    recorder = EventRecorder()
+    suite = mock_suite(6)
+    suite.events = seo.TeeSink(recorder, seo.JsonlSink(path))
+    run_scheduler(suite, 8)
+    suite.events.close()
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines and len(lines) == len(recorder.events)
+    assert {line['kind'] for line in lines} >= {'header', 'check', 'score'}
+    checks_by_category = {}
+    for line in lines:
+        if line['kind'] == 'check':
+            checks_by_category.setdefault(line['category'], set()).add(line.get('path'))
+            assert isinstance(line['passed'], bool) and line['section'] and line['time']
+    assert checks_by_category['general_seo'] == set(suite.results['pages'])
+    # Unset fields are left out rather than written as null
+    assert all(None not in line.values() and '' not in line.values() for line in lines)
+
+
+def test_jsonl_sink_appends_to_an_existing_file(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    for name in ('first run', 'second run'):
+        sink = seo.JsonlSink(path)
+        sink.emit(seo.ResultEvent('message', name))
+        sink.close()
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['name'] for line in f] == ['first run', 'second run']
+
+
+def test_terminal_sink_renders_checks_errors_and_scores():
+    stream = io.StringIO()
+    sink = seo.TerminalSink(stream)
+    sink.emit(seo.ResultEvent('check', "Title length", passed=False, details="72 chars"))
+    sink.emit(seo.ResultEvent('error', "Error fetching /: refused"))
+    sink.emit(seo.ResultEvent('score', "General SEO", passed=3, total=4, score=75.0))
+    sink.emit(seo.ResultEvent('summary', "Overall", passed=3, total=4, score=75.0))
+    C = seo.Colors
+    assert stream.getvalue() == (f"{C.RED}✗ FAIL{C.END} | Title length\n       {C.YELLOW}→ 72 chars{C.END}\n"
+                                 f"{C.RED}Error fetching /: refused{C.END}\n"
+                                 f"\n{C.BOLD}General SEO Score: 3/4 (75.0%){C.END}\n")
+
+
+def test_tee_sink_forwards_and_closes_every_sink(tmp_path):
+    recorders = EventRecorder(), EventRecorder()
+    jsonl = seo.JsonlSink(str(tmp_path / 'events.jsonl'))
+    tee = seo.TeeSink(*recorders, jsonl)
+    event = seo.ResultEvent('check', "H1 present", passed=True)
+    tee.emit(event)
+    tee.close()
+    assert [recorder.events for recorder in recorders] == [[event], [event]]
+    assert jsonl._file.closed
+
+
+# ==================== SCHEDULER ====================
+
+@pytest.mark.parametrize('workers', [2, 8])
+def test_scheduler_crawls_every_page(workers):
+    suite = mock_suite(6, check_compression=True)
+    paths = run_scheduler(suite, workers)
+    assert len(paths) == 6
+    assert set(suite.results['pages']) >= set(paths)
+    assert all('general_seo' in suite.results['pages'][path] for path in paths)
+    assert 'compression' in suite.results
+
+
+def test_one_worker_scheduler_does_not_deadlock():
+    # --compression needs the 'indexes' dependency, whose provider used to block its pool's only
+    # worker. A deadlocked pool can't be stopped from inside the process, hence the child process.
+    script = (
+        "import json, sys\n"
+        "sys.path.insert(0, sys.argv[1])\n"
+        "sys.path.insert(0, sys.argv[2])\n"
+        "from test_seo_suite import mock_suite\n"
+        "import test_seo_automated as seo\n"
+        "suite = mock_suite(6, check_compression=True)\n"
+        "paths = seo.CheckScheduler(suite, 1).run(crawl=True)\n"
+        "print(json.dumps([paths, 'compression' in suite.results]))\n"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        result = subprocess.run([sys.executable, '-c', script, os.path.dirname(here), here],
+                                capture_output=True, text=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        pytest.fail("CheckScheduler with one worker deadlocked")
+    assert result.returncode == 0, result.stderr
+    paths, compressed = json.loads(result.stdout.strip().splitlines()[-1])
+    assert len(paths) == 6 and compressed
+
+
+def test_scheduler_scores_do_not_depend_on_workers():
+    scores = []
+    for workers in (2, 4):
+        suite = mock_suite(5)
+        run_scheduler(suite, workers)
+        scores.append({path: page['overall']['score'] for path, page in suite.results['pages'].items()})
+    assert scores[0] == scores[1]
+
+
+def test_head_only_crawl_runs_the_head_tag_checks():
+    suite = mock_suite(3, head_only=True)
+    run_scheduler(suite, 2)
+    assert all(set(page) == {'head_tags', 'overall'} for page in suite.results['pages'].values())
+    assert suite.results['head_tags']['total'] == 3 * 9
+    assert not suite.documents.responses
+
+def test_register_check_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match='unknown dependency'):
+        seo.register_check('needs_nonsense', needs=('nonsense',))
+    with pytest.raises(ValueError, match='per page'):
+        seo.register_check('per_page_audits', needs=('audits',), per_page=True)
+    assert 'needs_nonsense' not in seo.CHECKS and 'per_page_audits' not in seo.CHECKS
+
+
+# ==================== HTML PARSER ENGINES ====================
+
+HEAD_PAGE = ('<html lang="fr"><head><title>Accueil</title><meta name="description" content="Agence">'
+             '<meta name="geo.region" content="FR-16"></HEAD><body><h1>Titre</h1>' + '<p>texte</p>' * 2000 +
+             '</body></html>').encode('utf-8')
+
+
+def test_auto_parser_engine_is_the_measured_fastest():
+    assert seo.select_parser_engine('auto') == seo.fastest_parser_engine()
+    assert seo.fastest_parser_engine() in seo.available_parser_engines()
+
+
+@pytest.mark.parametrize('engine', seo.available_parser_engines())
+def test_head_only_index_stops_at_the_end_of_head(engine):
+    # 75 bytes per chunk puts </HEAD> across two chunks
+    index = seo.parse_index(HEAD_PAGE, engine, chunk_size=75, head_only=True)
+    assert index.title == 'Accueil'
+    assert index.meta_content('geo.region') == 'FR-16'
+    assert index.lang == 'fr'
+    assert index.headings[1] == []
+    assert seo.parse_index(HEAD_PAGE, engine, chunk_size=75).headings[1] == ['Titre']
+
+
+# ==================== DOCUMENT STORE ====================
+
+def test_document_store_fetches_each_url_once():
+    site = seo.SyntheticSite(3)
+    session, transport = mock_session(
+        lambda request: seo.fixture_response(site, seo.urlparse(request.url).path, request.headers))
+    store = seo.DocumentStore(session, parser='lxml-incremental')
+    for _ in range(3):
+        response, index = store.get_index('http://mock.test/')
+        assert response.status_code == 200
+        assert index.title
+    assert len(transport.log) == 1
+    assert store.stats['memory_hits'] == 2
+
+
+def test_document_store_caps_the_body():
+    body = b'<html><head><title>big</title></head><body>' + b'<p>lorem ipsum</p>' * 10000 + b'</body></html>'
+    session, _ = mock_session(lambda request: (200, [('Content-Type', 'text/html')], body))
+    store = seo.DocumentStore(session, parser='lxml-incremental', max_body_bytes=4096, chunk_size=1024)
+    response, index = store.get_index('http://mock.test/big')
+    assert len(response.content) == 4096
+    assert 'http://mock.test/big' in store.truncated
+    assert index.title == 'big'
+
+
+def test_document_store_reads_heads_only_up_to_head():
+    session, transport = mock_session(lambda request: (200, [('Content-Type', 'text/html')], HEAD_PAGE))
+    store = seo.DocumentStore(session, parser='lxml-incremental', chunk_size=1024)
+    response, index = store.get_head('http://mock.test/')
+    assert index.title == 'Accueil'
+    assert len(response.content) == 1024
+    assert store.get_head('http://mock.test/')[1] is index
+    # The whole page is still fetched for checks that need it, and then answers heads too
+    assert store.get_index('http://mock.test/')[1].headings[1] == ['Titre']
+    assert store.get_head('http://mock.test/')[1].headings[1] == ['Titre']
+    assert len(transport.log) == 2
+
+def test_document_store_revalidates_from_disk(tmp_path):
+    site = seo.SyntheticSite(2)
+    handler = lambda request: seo.fixture_response(site, seo.urlparse(request.url).path, request.headers)
+    session, _ = mock_session(handler)
+    first = seo.DocumentStore(session, cache_dir=str(tmp_path), parser='lxml-incremental')
+    title = first.get_index('http://mock.test/')[1].title
+
+    session, _ = mock_session(handler)
+    second = seo.DocumentStore(session, cache_dir=str(tmp_path), parser='lxml-incremental')
+    response, index = second.get_index('http://mock.test/')
+    assert second.stats['revalidated'] == 1
+    assert second.stats['fetched'] == 0
+    assert response.status_code == 200
+    assert index.title == title
+
+def incremental_crawl(cache_dir, pages: int, **options) -> seo.SEOTestSuite:
+    """An incremental crawl of a SyntheticSite, with its state kept in cache_dir"""
+    suite = mock_suite(pages, incremental=True, cache_dir=str(cache_dir), **options)
+    suite.load_incremental_state()
+    suite.save_incremental_state(run_scheduler(suite, 4))
+    return suite
+
+
+def test_incremental_state_follows_the_sitemap_and_the_checks(tmp_path):
+    crawl = lambda pages, **options: incremental_crawl(tmp_path, pages, **options)
+    first = crawl(4)
+    assert len(first.results['incremental']['audited']) == 4
+    second = crawl(3)
+    assert sorted(second.results['incremental']['reused']) == ['/', '/page-1', '/page-2']
+    assert sorted(second.incremental_state) == [seo.MOCK_BASE_URL + path for path in ('/', '/page-1', '/page-2')]
+    first_sizes, second_sizes = first.collect_metrics(), second.collect_metrics()
+    assert all(second_sizes[path]['html_bytes'] == first_sizes[path]['html_bytes'] > 0
+               for path in ('/', '/page-1', '/page-2'))
+    third = crawl(3, check_critical_path=True)
+    assert third.results['incremental']['reused'] == []
+    assert 'critical_path' in third.results['pages']['/']
+
+def test_build_routes_skip_error_pages_and_are_walked_once(tmp_path, monkeypatch):
+    for rel in ('index.html', 'about/index.html', '404/index.html', '500.html', '_next/static/a.html'):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text('<html><head><title>t</title></head></html>')
+    routes = seo.build_page_routes(str(tmp_path))
+    assert sorted(routes) == ['/', '/about']
+
+    monkeypatch.setattr(seo, 'build_page_routes', lambda build_dir: pytest.fail("build tree walked again"))
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, build_dir=str(tmp_path), build_routes=routes)
+    assert suite.documents.get_response(seo.MOCK_BASE_URL + '/about').status_code == 200
+
+
+def test_incremental_revalidation_goes_through_the_document_store(tmp_path):
+    incremental_crawl(tmp_path, 3)
+    state_path = tmp_path / 'incremental.json'
+    state = json.loads(state_path.read_text())
+    for entry in state.values():
+        entry['lastmod'] = None  # force the conditional request
+    state[seo.MOCK_BASE_URL + '/page-1']['etag'] = '"stale"'
+    state_path.write_text(json.dumps(state))
+
+    suite = mock_suite(3, incremental=True, cache_dir=str(tmp_path))
+    suite.documents.max_body_bytes = 1024
+    suite.load_incremental_state()
+    run_scheduler(suite, 4)
+    assert sorted(suite.results['incremental']['reused']) == ['/', '/page-2']
+    assert suite.results['incremental']['audited'] == ['/page-1']
+    # The changed page was capped like any fetch, and audited from that response
+    assert seo.MOCK_BASE_URL + '/page-1' in suite.documents.truncated
+    assert suite.documents.body_size(seo.MOCK_BASE_URL + '/page-1') == 1024
+
+
+# ==================== TRANSPORT ====================
+
+def test_retry_policy_is_abstract():
+    with pytest.raises(TypeError):
+        seo.RetryPolicy()
+
+
+def test_retries_transient_statuses():
+    answers = [(503, [], b''), (429, [('Retry-After', '0')], b''), (200, [], b'ok')]
+    session, transport = mock_session(lambda request: answers.pop(0), retries=2)
+    response = session.get('http://mock.test/')
+    assert response.status_code == 200
+    assert response.content == b'ok'
+    assert transport.stats['retries'] == 2
+    assert transport.stats['requests'] == 3
+
+
+def test_gives_up_after_the_last_retry():
+    session, transport = mock_session(lambda request: (503, [], b''), retries=1)
+    assert session.get('http://mock.test/').status_code == 503
+    assert transport.stats['requests'] == 2
+
+
+def test_connection_errors_are_retried_then_raised():
+    session, transport = mock_session(lambda request: None, retries=2)
+    with pytest.raises(requests.ConnectionError):
+        session.get('http://mock.test/')
+    assert transport.stats['requests'] == 3
+
+
+def test_retry_after_is_honoured_and_capped():
+    transport = seo.MockTransport(lambda request: None, backoff=0.5, max_backoff=10)
+    response = requests.Response()
+    response.headers['Retry-After'] = '3'
+    assert transport.retry_delay(response, 0) == 3
+    response.headers['Retry-After'] = '3600'
+    assert transport.retry_delay(response, 0) == 10
+    assert transport.retry_delay(None, 2) == 2.0
+
+
+def test_mock_transport_decodes_gzip_and_keeps_wire_bytes():
+    site = seo.SyntheticSite(2)
+    session, _ = mock_session(
+        lambda request: seo.fixture_response(site, seo.urlparse(request.url).path, request.headers))
+    response = session.get('http://mock.test/', headers={'Accept-Encoding': 'gzip'}, stream=True)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    wire = b''.join(response.raw.stream(1024, decode_content=False))
+    assert seo.decode_body(wire, 'gzip').startswith(b'<!DOCTYPE html>')
+
+
+# ==================== REQUEST TIMING ====================
+
+@pytest.fixture
+def redirecting_server():
+    """Loopback server: /old redirects to /new, which serves a page; Host headers are recorded"""
+    hosts = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hosts.append(self.headers['Host'])
+            if self.path == '/old':
+                self.send_response(301)
+                self.send_header('Location', '/new')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = b'<html><head><title>new</title></head><body>ok</body></html>'
+            self.send_response(200 if self.path == '/new' else 404)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", hosts
+    server.shutdown()
+    server.server_close()
+
+
+def test_timed_get_follows_redirects(redirecting_server):
+    base_url, hosts = redirecting_server
+    timings = seo.timed_get(f"{base_url}/old", {}, 'lxml-incremental', keep_index=True)
+    assert timings['status'] == 200
+    assert timings['redirects'] == 1
+    assert timings['url'] == f"{base_url}/new"
+    assert timings['index'].title == 'new'
+    assert hosts == [base_url.split('//')[1]] * 2
+
+
+def test_measure_timings_skips_error_pages(redirecting_server):
+    base_url, _ = redirecting_server
+    suite = seo.SEOTestSuite(base_url, cache_dir=None)
+    suite.samples = 2
+    assert suite.measure_timings('/missing') is None
+    assert suite.measure_timings('/old')['total']['p50'] > 0
+
+
+# ==================== LATENCY HISTOGRAM ====================
+
+def test_histogram_percentiles_and_merge():
+    low, high = seo.LatencyHistogram(), seo.LatencyHistogram()
+    for ms in range(1, 101):
+        (low if ms <= 50 else high).record(ms / 1000)
+    merged = seo.LatencyHistogram().merge(low).merge(high)
+    assert merged.count == 100
+    assert merged.min == 0.001 and merged.max == 0.1
+    # Buckets are 1/8 of a doubling wide: percentiles are within ~9% above the exact value
+    assert 0.050 <= merged.percentile(50) <= 0.050 * 1.1
+    assert 0.095 <= merged.percentile(95) <= 0.1
+    assert merged.percentile(100) == 0.1
+    assert seo.LatencyHistogram().percentile(95) == 0.0
+
+# ==================== LOAD TEST ====================
+
+def test_load_test_cold_latency_is_the_first_request_issued(tmp_path, monkeypatch):
+    # The first request to each page is slow, so requests issued after it finish first
+    monkeypatch.chdir(tmp_path)
+    site = seo.SyntheticSite(2)
+    seen = set()
+    lock = threading.Lock()
+
+    def handler(request):
+        path = seo.urlparse(request.url).path or '/'
+        with lock:
+            first = path not in seen and path != '/sitemap.xml'
+            seen.add(path)
+        if first:
+            time.sleep(0.3)
+        return seo.fixture_response(site, path, request.headers, request.method)
+
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=seo.MockTransport(handler))
+    load = suite.run_load_test(clients=4, max_requests=12, allow_remote=True)
+    assert len(load['urls']) == 2
+    assert all(entry['cold'] >= 0.3 for entry in load['urls'].values())
+
+
+# ==================== USER AGENTS ====================
+
+def test_custom_user_agents_keep_their_commas():
+    custom = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120'
+    agents = seo.parse_user_agents('browser,googlebot', [f'mine={custom}'])
+    assert list(agents) == ['browser', 'googlebot', 'mine']
+    assert agents['mine'] == custom
+
+
+def test_user_agent_errors():
+    with pytest.raises(ValueError, match='Unknown user agent'):
+        seo.parse_user_agents('browser,nosuchbot')
+    with pytest.raises(ValueError, match='--user-agent'):
+        seo.parse_user_agents('mine=Mozilla/5.0 (KHTML, like Gecko)')
+    with pytest.raises(ValueError):
+        seo.parse_user_agents('browser', ['no equals sign'])
+
+# ==================== LINK CHECK ====================
+
+def test_link_cache_keeps_only_definitive_results(tmp_path):
+    answers = {'/gone': (404, [], b''), '/busy': (503, [], b''), '/moved': (301, [('Location', '/gone')], b'')}
+    session, _ = mock_session(lambda request: answers.get(seo.urlparse(request.url).path))
+    urls = ['http://mock.test/gone', 'http://mock.test/busy', 'http://mock.test/moved', 'http://mock.test/down']
+    cache_path = str(tmp_path / 'links.json')
+    first = seo.LinkChecker(session, cache_path=cache_path)
+    results = first.check_all(urls)
+    assert results['http://mock.test/down']['transient']
+    first.save()
+
+    second = seo.LinkChecker(session, cache_path=cache_path)
+    second.check_all(urls)
+    assert second.stats == {'checked': 2, 'cached': 2}
+
+
+def test_link_check_falls_back_to_get_when_head_fails():
+    def handler(request):
+        if request.method == 'HEAD':
+            return None  # connection reset
+        return 200, [('Content-Type', 'text/html')], b'<html></html>'
+    session, transport = mock_session(handler)
+    info = seo.LinkChecker(session).check('http://mock.test/page')
+    assert info['status'] == 200
+    assert info['method'] == 'GET'
+    assert 'error' not in info
+    assert [method for method, _ in transport.log] == ['HEAD', 'GET']
+
+def test_site_hosts_include_the_canonical_host():
+    # Under --local the pages still name production in their canonical URL
+    site = seo.SyntheticSite(2)
+    site.base_url = 'https://Prod.test'
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=seo.MockTransport.for_site(site))
+    suite.fetch_index('/')
+    suite.documents.release(seo.MOCK_BASE_URL + '/')  # as after the page's audit
+    assert suite.site_hosts(['/', '/page-1']) == ['bench.invalid', 'prod.test']
+
+
+# ==================== SCHEMA RULES ====================
+
+BUSINESS = {'@context': 'https://schema.org', '@type': 'ProfessionalService', '@id': '#business',
+            'name': 'Theo Multimedia', 'geo': {'@type': 'GeoCoordinates', 'latitude': '45.6484', 'longitude': 0.156},
+            'address': {'@type': 'PostalAddress', 'addressLocality': 'Angoulême', 'addressCountry': 'FR'}}
+
+
+def schema_nodes(*blobs) -> dict:
+    """type -> validated node of a page made of these JSON-LD blobs"""
+    page = seo.SchemaValidator().validate_page([json.dumps(blob) for blob in blobs])
+    return {entry['type']: entry for blob in page['blobs'] for entry in blob['nodes']}
+
+
+def test_schema_subtypes_inherit_required_and_recommended_properties():
+    business = {key: value for key, value in BUSINESS.items() if key != 'geo'}
+    entry = schema_nodes(business)['ProfessionalService']
+    assert entry['errors'] == ['missing geo']
+    assert 'telephone' in entry['warnings'] and 'logo' in entry['warnings']
+    assert schema_nodes(BUSINESS)['ProfessionalService']['errors'] == []
+
+
+def test_schema_property_values_are_type_checked():
+    nodes = schema_nodes(dict(BUSINESS, geo='45.6484,0.1560', url='theo-multimedia.com'))
+    assert sorted(nodes['ProfessionalService']['errors']) == ['geo should be GeoCoordinates', 'url should be URL']
+    geo = {'@type': 'GeoCoordinates', 'latitude': 'north', 'longitude': 0.156}
+    assert schema_nodes(geo)['GeoCoordinates']['errors'] == ['latitude should be Number']
+
+
+def test_schema_references_resolve_across_scripts():
+    page_node = {'@context': 'https://schema.org', '@type': 'WebPage', 'name': 'Accueil', 'description': 'Agence',
+                 'url': '/', 'isPartOf': {'@id': '#site'}, 'about': {'@id': '#business'}}
+    validator = seo.SchemaValidator()
+    page = validator.validate_page([json.dumps(BUSINESS), json.dumps(page_node)])
+    assert page['unresolved'] == ['#site']
+    # Within a @graph a reference is type-checked as the node it names
+    site = {'@type': 'WebSite', '@id': '#site', 'name': 'Theo Multimedia', 'url': '/'}
+    graph = lambda node: {'@context': 'https://schema.org', '@graph': [BUSINESS, site, node]}
+    wrong = dict(page_node, isPartOf={'@id': '#business'})
+    assert schema_nodes(graph(wrong))['WebPage']['errors'] == ['isPartOf should be WebSite']
+    assert schema_nodes(graph(page_node))['WebPage']['errors'] == []
+
+
+def test_schema_blobs_are_validated_once_and_subtypes_found():
+    validator = seo.SchemaValidator()
+    raw = json.dumps(BUSINESS)
+    for _ in range(3):
+        assert validator.find([raw], 'LocalBusiness')['name'] == 'Theo Multimedia'
+    assert validator.stats == {'validated': 1, 'memo_hits': 2}
+    assert validator.find([raw], 'Person') is None
+    assert validator.validate_blob('{not json')['error']
+
+
+# ==================== CRITICAL PATH ====================
+
+CSS = 'text/css; charset=utf-8'
+FONT_FACE = '@font-face { font-family: Brand; src: url(/fonts/brand.woff2) format("woff2");%s }'
+
+
+def critical_page(head: str) -> dict:
+    return {'/': ('text/html; charset=utf-8', f'<html><head><title>Accueil</title>{head}</head>'
+                                              f'<body><h1>Accueil</h1></body></html>'.encode()),
+            '/fonts/brand.woff2': ('font/woff2', b'\0' * 2048)}
+
+
+def test_critical_path_passes_a_page_with_deferred_scripts_and_swapped_fonts():
+    files = critical_page('<link rel="stylesheet" href="/main.css"><script src="/app.js" defer></script>'
+                          '<link rel="preload" href="/fonts/brand.woff2" as="font" crossorigin>')
+    files['/main.css'] = (CSS, (FONT_FACE % ' font-display: swap;').encode())
+    suite = files_suite(files)
+    suite.test_critical_path('/')
+    assert suite.results['pages']['/']['critical_path'] == {'passed': 5, 'total': 5, 'score': 100.0}
+    critical = suite.results['pages']['/']['critical']
+    assert critical['blocking'] == {f'{seo.MOCK_BASE_URL}/main.css': 'stylesheet'}
+    assert critical['fonts'] == {f'{seo.MOCK_BASE_URL}/fonts/brand.woff2': 2}
+    assert critical['chain_depth'] == 2
+    assert critical['font_display'] == ['swap']
+    assert set(critical['bytes_by_kind']) == {'html', 'stylesheet'}
+
+
+def test_critical_path_flags_blocking_scripts_imports_and_invisible_text():
+    files = critical_page('<link rel="stylesheet" href="/main.css"><script src="/app.js"></script>'
+                          '<script src="/module.js" type="module"></script>'
+                          '<link rel="preload" href="/fonts/brand.woff2" as="font">')
+    files['/main.css'] = (CSS, b'@import url("/theme.css"); body { margin: 0 }')
+    files['/theme.css'] = (CSS, b'@import "/fonts.css";')
+    files['/fonts.css'] = (CSS, (FONT_FACE % '').encode())
+    suite = files_suite(files)
+    suite.test_critical_path('/')
+    critical = suite.results['pages']['/']['critical']
+    assert critical['blocking'] == {f'{seo.MOCK_BASE_URL}/main.css': 'stylesheet',
+                                    f'{seo.MOCK_BASE_URL}/app.js': 'script'}
+    # HTML -> main.css -> theme.css -> fonts.css; the preload still starts the font early
+    assert critical['chain_depth'] == 4
+    assert critical['fonts'] == {f'{seo.MOCK_BASE_URL}/fonts/brand.woff2': 2}
+    assert critical['font_display'] == ['auto']
+    results = checks(suite)
+    assert results['Render-blocking scripts'] is False
+    assert results['Critical request chain'] is False
+    assert results['font-display'] is False
+    assert results['Resource hints'] is False
+    assert suite.results['pages']['/']['critical_path']['passed'] == 1
+
+
+def test_critical_path_needs_preconnects_and_a_byte_budget():
+    files = critical_page('<link rel="stylesheet" href="https://cdn.invalid/site.css">'
+                          '<link rel="stylesheet" href="/print.css" media="print">')
+    files['/print.css'] = (CSS, b'body { color: black }')
+    suite = files_suite(files, critical_budget_kb=0)
+    suite.session.mount('https://', seo.MockTransport(lambda request: (200, [('Content-Type', CSS)], b'a{}')))
+    suite.test_critical_path('/')
+    assert list(suite.results['pages']['/']['critical']['blocking']) == ['https://cdn.invalid/site.css']
+    results = checks(suite)
+    assert results['Critical bytes'] is False
+    assert results['Resource hints'] is False
+    events = [event for event in suite.events.events if event.name == 'Resource hints']
+    assert events[0].details == 'no preconnect to https://cdn.invalid'
+
+
+def test_font_displays_default_to_auto():
+    css = (FONT_FACE % ' font-display: optional;') + (FONT_FACE % '') + (FONT_FACE % 'font-display:Fallback')
+    assert seo.font_displays(css) == ['optional', 'auto', 'fallback']
+    assert seo.font_displays('body { font-display: swap }') == []
+
+
+# ==================== COMPRESSION ====================
+
+PAGE = seo.SyntheticSite(2).page(1)
+
+
+def compressing_suite(level, vary: bool = True, always: bool = False) -> seo.SEOTestSuite:
+    """A suite whose server gzips PAGE at `level` (never when None), even unasked when `always`"""
+    def handler(request):
+        headers = [('Content-Type', 'text/html; charset=utf-8')] + ([('Vary', 'Accept-Encoding')] if vary else [])
+        if level is None or not (always or 'gzip' in request.headers.get('Accept-Encoding', '')):
+            return 200, headers, PAGE
+        return 200, headers + [('Content-Encoding', 'gzip')], seo.compress_body(PAGE, 'gzip', level)
+
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=seo.MockTransport(handler))
+    suite.verbose = False
+    return suite
+
+
+def test_compression_audit_passes_a_negotiating_server():
+    entry = compressing_suite(6).audit_compression(f'{seo.MOCK_BASE_URL}/')
+    assert entry['problems'] == []
+    assert entry['identity_bytes'] == len(PAGE)
+    assert {accept: served['encoding'] for accept, served in entry['served'].items()} == {
+        'identity': 'identity', 'gzip': 'gzip', 'br': 'identity', 'zstd': 'identity'}
+    assert entry['best_served_bytes'] == len(seo.compress_body(PAGE, 'gzip', 6))
+    assert entry['saved_by_server'] == len(PAGE) - entry['best_served_bytes']
+    assert sorted(entry['local']['gzip']) == [1, 6, 9]
+
+
+@pytest.mark.parametrize('server, problems', [
+    (dict(level=None), ["never compressed"]),
+    (dict(level=6, vary=False, always=True),
+     ["gzip served for Accept-Encoding: identity", "gzip served for Accept-Encoding: br",
+      "gzip served for Accept-Encoding: zstd", "gzip response without Vary: Accept-Encoding"]),
+])
+def test_compression_audit_flags_misconfigured_servers(server, problems):
+    entry = compressing_suite(**server).audit_compression(f'{seo.MOCK_BASE_URL}/')
+    assert set(entry['problems']) == set(problems)
+
+
+def test_compression_audit_flags_a_low_compression_level():
+    entry = compressing_suite(0).audit_compression(f'{seo.MOCK_BASE_URL}/')
+    expected = len(seo.compress_body(PAGE, 'gzip', 6))
+    assert entry['problems'] == [f"gzip {entry['served']['gzip']['bytes']}B vs {expected}B at level 6"]
+    assert entry['potential_saving'] > 0
+
+
+def test_compression_covers_the_page_and_its_same_origin_text_assets():
+    html = ('<html><head><title>Accueil</title><script src="/app.js" defer></script>'
+            '<script src="https://cdn.invalid/lib.js" defer></script><link rel="stylesheet" href="/tiny.css">'
+            '</head><body><h1>Accueil</h1><img src="/logo.svg" alt="Logo"></body></html>')
+    suite = files_suite({'/': ('text/html; charset=utf-8', html.encode()),
+                         '/app.js': ('application/javascript', b'render();\n' * 400),
+                         '/tiny.css': ('text/css', b'a{}'),
+                         '/logo.svg': ('image/svg+xml', b'<svg xmlns="http://www.w3.org/2000/svg"/>')})
+    suite.test_compression(['/'])
+    report = suite.results['compression']
+    assert {url: entry['kind'] for url, entry in report['urls'].items()} == {
+        f'{seo.MOCK_BASE_URL}/': 'html', f'{seo.MOCK_BASE_URL}/app.js': 'script',
+        f'{seo.MOCK_BASE_URL}/tiny.css': 'stylesheet', f'{seo.MOCK_BASE_URL}/logo.svg': 'image'}
+    # Bodies under MIN_COMPRESS_BYTES pass uncompressed
+    assert report['passed'] == report['total'] == 4
+    assert report['bytes_saved_by_server'] > 0
+
+
+# ==================== HTTP CACHE ====================
+
+def header_rules(tmp_path, headers: str, toml: str = '') -> str:
+    """A project directory declaring these public/_headers and netlify.toml rules"""
+    (tmp_path / 'public').mkdir()
+    (tmp_path / 'public' / '_headers').write_text(headers)
+    if toml:
+        (tmp_path / 'netlify.toml').write_text(toml)
+    return str(tmp_path)
+
+
+def test_header_rule_patterns_match_splats_and_segments():
+    assert seo.header_rule_pattern('/*').match('/blog/post.html')
+    assert seo.header_rule_pattern('/blog/:slug').match('/blog/angouleme')
+    assert not seo.header_rule_pattern('/blog/:slug').match('/blog/angouleme/photos')
+    assert not seo.header_rule_pattern('/app.js').match('/appxjs')
+
+
+@pytest.mark.skipif(seo.tomllib is None, reason="netlify.toml needs tomllib")
+def test_headers_file_rules_override_netlify_toml(tmp_path):
+    project = header_rules(tmp_path,
+                           "# Assets\n/assets/*\n  Cache-Control: public, max-age=31536000, immutable\n"
+                           "  X-Content-Type-Options: nosniff\n\n/assets/legacy/*\n  Cache-Control: no-cache\n",
+                           toml='[[headers]]\nfor = "/*"\n[headers.values]\n'
+                                'Cache-Control = "public, max-age=0, must-revalidate"\nVary = "Accept-Encoding"\n')
+    rules = seo.load_header_rules(project)
+    assert [pattern for pattern, _, _ in rules] == ['/*', '/assets/*', '/assets/legacy/*']
+    assert seo.expected_cache_headers(rules, '/') == {'cache-control': 'public, max-age=0, must-revalidate',
+                                                      'vary': 'Accept-Encoding'}
+    assert seo.expected_cache_headers(rules, '/assets/app.js') == {
+        'cache-control': 'public, max-age=31536000, immutable', 'vary': 'Accept-Encoding'}
+    assert seo.expected_cache_headers(rules, '/assets/legacy/old.js')['cache-control'] == 'no-cache'
+
+
+def test_http_cache_checks_served_headers_against_the_declared_policy(tmp_path):
+    project = header_rules(tmp_path, "/\n  Cache-Control: public, max-age=0, must-revalidate\n"
+                                     "/styles.css\n  Cache-Control: public, max-age=3600\n  Vary: Accept-Encoding\n")
+    suite = mock_suite(2, project_dir=project, samples=2)
+    suite.events = EventRecorder()
+    suite.test_http_cache(['/'])
+    report = suite.results['http_cache']['urls']
+    assert report[f'{seo.MOCK_BASE_URL}/']['problems'] == []
+    assert report[f'{seo.MOCK_BASE_URL}/']['revalidation_status'] == 304
+    assert report[f'{seo.MOCK_BASE_URL}/styles.css']['problems'] == [
+        "Cache-Control 'public, max-age=31536000, immutable', declared 'public, max-age=3600'"]
+    assert report[f'{seo.MOCK_BASE_URL}/app.js']['lifetime'] == 31536000
+    assert checks(suite)['/styles.css caching'] is False
+    assert suite.results['http_cache']['total'] == len(report) > 2
+
+
+@pytest.mark.parametrize('headers, problems', [
+    ([('Cache-Control', 'no-store')], ["no-store: never cached", "no ETag/Last-Modified to revalidate with"]),
+    ([('Cache-Control', 'private, max-age=60'), ('ETag', '"v1"')],
+     ["private: CDN can't cache the page", "conditional GET returned 200, not 304"]),
+])
+def test_http_cache_flags_uncacheable_pages(headers, problems):
+    transport = seo.MockTransport(lambda request: (200, headers, b'<h1>Accueil</h1>'))
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=transport)
+    assert suite.audit_cache(f'{seo.MOCK_BASE_URL}/', 'html', {})['problems'] == problems
+
+
+def test_http_cache_wants_fingerprinted_assets_cached_for_a_year():
+    transport = seo.MockTransport(lambda request: (200, [('Cache-Control', 'public, max-age=3600')], b'a{}'))
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, transport=transport)
+    entry = suite.audit_cache(f'{seo.MOCK_BASE_URL}/assets/main.3f9a0c1d2b.css', 'stylesheet', {})
+    assert entry['problems'] == ["fingerprinted asset should be max-age=31536000, immutable",
+                                 "no ETag/Last-Modified to revalidate with"]
+
+
+# ==================== RESULTS HISTORY ====================
+
+def save_run(store: seo.ResultsStore, score: float, ttfb: float, html_bytes: int = 40000,
+             base_url: str = seo.MOCK_BASE_URL) -> int:
+    results = {'pages': {'/': {'general_seo': {'passed': 9, 'total': 10, 'score': 90.0}}},
+               'general_seo': {'passed': 9, 'total': 10, 'score': 90.0}, 'summary': {'overall_score': score}}
+    metrics = {'/': {'ttfb_p50': ttfb, 'html_bytes': html_bytes, 'score': score}, '': {'score': score}}
+    return store.save_run(base_url, results, metrics, parser='lxml')
+
+
+def test_results_store_compares_against_the_rolling_median(tmp_path):
+    store = seo.ResultsStore(str(tmp_path / 'runs.db'))
+    for ttfb in (0.20, 0.90, 0.21):
+        save_run(store, 90.0, ttfb)
+    save_run(store, 10.0, 5.0, base_url='https://other.invalid')
+    run_id = save_run(store, 80.0, 0.40, html_bytes=40000 + 150 * 1024)
+    assert store.rolling_median(run_id)[('/', 'ttfb_p50')] == 0.21
+    assert store.compare(run_id) == [
+        {'path': '(site)', 'metric': 'score', 'baseline': 90.0, 'value': 80.0},
+        {'path': '/', 'metric': 'html_bytes', 'baseline': 40000, 'value': 40000 + 150 * 1024},
+        {'path': '/', 'metric': 'score', 'baseline': 90.0, 'value': 80.0},
+        {'path': '/', 'metric': 'ttfb_p50', 'baseline': 0.21, 'value': 0.40},
+    ]
+    # Against run 2 alone, the slower TTFB is an improvement
+    assert [regression['metric'] for regression in store.compare(run_id, '2') if regression['path'] == '/'] == [
+        'html_bytes', 'score']
+    store.close()
+
+
+def test_results_store_ignores_changes_below_the_noise_floor(tmp_path):
+    store = seo.ResultsStore(str(tmp_path / 'runs.db'))
+    save_run(store, 90.0, 0.020)
+    run_id = save_run(store, 86.0, 0.060, html_bytes=40000 + 90 * 1024)
+    # TTFB tripled but by 40ms, score and page size moved less than their thresholds
+    assert store.compare(run_id) == []
+    assert store.latest_run() == run_id
+    assert store.compare(store.latest_run(seo.MOCK_BASE_URL), str(run_id)) == []
+    store.close()
+
+
+def test_compare_runs_reports_regressions_as_check_events(tmp_path, capsys):
+    db = str(tmp_path / 'runs.db')
+    store = seo.ResultsStore(db)
+    save_run(store, 95.0, 0.2)
+    save_run(store, 70.0, 0.2)
+    store.close()
+    suite = seo.SEOTestSuite(seo.MOCK_BASE_URL, cache_dir=None, results_db=db)
+    suite.verbose = False
+    suite.events = EventRecorder()
+    assert [regression['metric'] for regression in suite.compare_runs('1')] == ['score', 'score']
+    assert capsys.readouterr().out == ''
+    assert [(event.name, event.passed) for event in suite.events.events if event.kind == 'check'] == [
+        ('(site) score', False), ('/ score', False)]
+    with pytest.raises(ValueError):
+        suite.compare_runs('last')
+    suite.results_db = None
+    with pytest.raises(ValueError):
+        suite.compare_runs()
+
+
+# ==================== IMAGE OPTIMIZATION ====================
+
+def png(width: int, height: int) -> bytes:
+    """PNG header of a width x height image, without pixel data"""
+    return (b'\x89PNG\r\n\x1a\n' + seo.png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + seo.png_chunk(b'IEND', b''))
+
+
+def test_image_dimensions_are_read_from_the_header():
+    jpeg = b'\xff\xd8\xff\xe0\x00\x04ab\xff\xc0\x00\x11\x08\x02\x58\x03\x20' + b'\x00' * 12
+    webp = b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x00' * 8 + (1199).to_bytes(3, 'little') + (599).to_bytes(3, 'little')
+    assert seo.image_dimensions(png(1600, 900)) == ('png', 1600, 900)
+    assert seo.image_dimensions(b'GIF89a\x40\x01\xf0\x00') == ('gif', 320, 240)
+    assert seo.image_dimensions(jpeg) == ('jpeg', 800, 600)
+    assert seo.image_dimensions(webp) == ('webp', 1200, 600)
+    assert seo.image_dimensions(b'\x00\x00\x01\x00\x01\x00\x00\x00') == ('ico', 256, 256)
+    assert seo.image_dimensions(b'<?xml version="1.0"?><svg></svg>') == ('svg', None, None)
+    assert seo.image_dimensions(b'not an image') == (None, None, None)
+
+
+def test_images_are_sized_against_their_rendered_width(tmp_path):
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / 'photo-1.png').write_bytes(png(2000, 1500))
+    (tmp_path / 'images' / 'banner.png').write_bytes(png(3000, 1000))
+    (tmp_path / 'pixel.png').write_bytes(seo.BENCH_PNG)
+    (tmp_path / 'favicon.ico').write_bytes(b'\x00\x00\x01\x00\x01\x00\x20\x20' + b'\x00' * 20 * 1024)
+    (tmp_path / 'notes.txt').write_text('not an image')
+    suite = mock_suite(2, events=EventRecorder())
+    suite.fetch_index('/')  # renders /images/photo-1.png at width="800"
+    suite.test_images(str(tmp_path), max_workers=2)
+    files = suite.results['images']['files']
+    assert sorted(files) == ['/favicon.ico', '/images/banner.png', '/images/photo-1.png', '/pixel.png']
+    assert files['/images/photo-1.png']['issues'] == ["2000px wide, rendered at 800px"]
+    assert files['/images/photo-1.png']['rendered_width'] == 800
+    # Not on a page: allowed up to twice max_display_width
+    assert files['/images/banner.png']['issues'] == []
+    assert files['/pixel.png']['issues'] == [f"{len(seo.BENCH_PNG):.2f} bytes/pixel"]
+    assert files['/favicon.ico']['issues'] == ["favicon over 15KB"]
+    assert checks(suite) == {'/favicon.ico': False, '/images/banner.png': True, '/images/photo-1.png': False,
+                             '/pixel.png': False}
+    assert suite.results['images']['passed'] == 1
+
+
+def test_unchanged_images_come_from_the_cache(tmp_path, monkeypatch):
+    public = tmp_path / 'public'
+    public.mkdir()
+    (public / 'logo.svg').write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+    (public / 'favicon.ico').write_bytes(b'\x00\x00\x01\x00\x01\x00\x10\x10' + b'\x00' * 64)
+    suite = mock_suite(1, cache_dir=str(tmp_path / 'cache'))
+    suite.test_images(str(public), max_workers=1)
+    first = suite.results['images']['files']
+
+    class NoPool:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("unchanged images were inspected again")
+
+    monkeypatch.setattr(seo, 'ProcessPoolExecutor', NoPool)
+    suite.test_images(str(public), max_workers=1)
+    assert suite.results['images']['files'] == first
+
+    (public / 'logo.svg').unlink()
+    suite.test_images(str(public), max_workers=1)
+    with open(tmp_path / 'cache' / 'images.json', encoding='utf-8') as f:
+        cache = json.load(f)
+    assert list(cache['files']) == ['/favicon.ico']
+    assert list(cache['results']) == [cache['files']['/favicon.ico']['sha256']]
+
+
+# ==================== DUPLICATE DETECTION ====================
+
+WORDS = ('agence web angoulême création site internet référencement local photographie vidéo identité '
+         'visuelle charente cognac soyaux couronne ruelle gond pontouvre développement maintenance').split()
+
+
+def words(count: int, seed: int) -> str:
+    rng = seo.random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def test_minhash_estimates_similarity():
+    text = words(400, 1)
+    edited = text.rsplit(' ', 20)[0] + ' ' + words(20, 2)
+    same = seo.minhash_signature(seo.shingle_hashes(text))
+    assert seo.signature_similarity(same, seo.minhash_signature(seo.shingle_hashes(text))) == 1.0
+    assert seo.signature_similarity(same, seo.minhash_signature(seo.shingle_hashes(edited))) >= 0.8
+    assert seo.signature_similarity(same, seo.minhash_signature(seo.shingle_hashes(words(400, 3)))) < 0.3
+    assert seo.minhash_signature([]) is None
+
+
+def test_duplicate_index_groups_titles_and_bodies():
+    index = seo.DuplicateIndex()
+    shared = words(300, 4)
+    pages = {'/a': ('Accueil', shared), '/b': ('Accueil', shared + ' fin'), '/c': ('Contact', words(300, 5))}
+    for path, (title, body) in pages.items():
+        index.add(path, {'title': seo.text_digest(title), 'title_text': title,
+                         'minhash': seo.minhash_signature(seo.shingle_hashes(body))})
+    assert [sorted(cluster['paths']) for cluster in index.exact_clusters('title')] == [['/a', '/b']]
+    assert [sorted(cluster['paths']) for cluster in index.near_clusters()] == [['/a', '/b']]
+
+
+def test_near_duplicates_found_behind_an_unrelated_page():
+    # A, B and C share band 0 only, A first. B and C differ in one value of every other band
+    # (49/64 equal, 0.77), so band 0's bucket is the only place they can be compared
+    rng = seo.random.Random(7)
+    values = lambda count: [f"{rng.getrandbits(32):08x}" for _ in range(count)]
+    shared, rest = values(4), values(60)
+    b = shared + rest
+    c = shared + [value if i % 4 else values(1)[0] for i, value in enumerate(rest)]
+    a = shared + values(60)
+    index = seo.DuplicateIndex(threshold=0.7)
+    for path, signature in (('/a', a), ('/b', b), ('/c', c)):
+        index.add(path, {'minhash': ''.join(signature)})
+    clusters = index.near_clusters()
+    assert [sorted(cluster['paths']) for cluster in clusters] == [['/b', '/c']]
+    assert clusters[0]['similarity'] == 49 / 64
+
+
+# ==================== LOCAL KEYWORDS ====================
+
+def test_fold_words_drops_case_accents_and_ligatures():
+    assert seo.fold_words('Vœuil-et-Giget, ANGOULÊME') == ['voeuil', 'et', 'giget', 'angouleme']
+
+
+def test_keyword_scanner_prefers_the_longest_match():
+    scanner = seo.KeywordScanner()
+    found = scanner.find('Agence web à Angouleme, en Charente-Maritime et en Nouvelle Aquitaine')
+    assert found == ['Agence web', 'Angoulême', 'Charente-Maritime', 'Nouvelle-Aquitaine']
+
+
+def test_keyword_scanner_matches_whole_words_only():
+    scanner = seo.KeywordScanner({'locality': {'Pau': [], 'Agen': []}})
+    assert scanner.find('Paulette et Agenda à Pau') == ['Pau']
+
+
+def test_keyword_scanner_reports_overlapping_keywords():
+    scanner = seo.KeywordScanner({'x': {'a b c': [], 'b c d': [], 'c': [], 'a b c d e': [], 'd e': []}})
+    assert scanner.find('a b c d e f b c d c') == ['a b c d e', 'b c d', 'c']
+
+
+@pytest.mark.parametrize('engine', seo.available_parser_engines())
+def test_keyword_coverage_counts_each_place_once(engine):
+    page = seo.parse_index(
+        '<html><head><title>Web Angoulême</title></head><body><header><nav>Cognac</nav></header>'
+        '<main><h1>Site Soyaux</h1><p>Nous sommes à Soyaux.</p><img alt="Cognac"></main></body></html>'
+        .encode('utf-8'), engine)
+    coverage = seo.KeywordScanner().coverage(page)
+    assert coverage['Angoulême'] == {'kind': 'locality', 'weight': 5, 'title': 1}
+    assert coverage['Soyaux'] == {'kind': 'locality', 'weight': 4, 'h1': 1, 'body': 1}
+    assert coverage['Cognac'] == {'kind': 'locality', 'weight': 1, 'alt': 1}
+
+
+def test_keyword_matrix_only_runs_when_asked():
+    suite = mock_suite(3)
+    run_scheduler(suite, 2)
+    assert 'keyword_matrix' not in suite.results
+    suite = mock_suite(3, check_keywords=True)
+    run_scheduler(suite, 2)
+    assert suite.results['keyword_matrix']
+
+
+def test_keyword_matrix_targets_come_from_title_or_h1():
+    pages = {'/soyaux': '<title>Agence</title><h1>Site à Soyaux</h1>',
+             '/cognac': '<title>Agence</title><h1>Site</h1><h2>Cognac</h2><p>Nous venons à Cognac.</p>'}
+    suite = mock_suite(1, events=EventRecorder())
+    scanner = seo.KeywordScanner()
+    for path, body in pages.items():
+        page = seo.parse_index(f'<html><head></head><body>{body}</body></html>'.encode('utf-8'), 'lxml')
+        suite.results.setdefault('pages', {})[path] = {'keywords': scanner.coverage(page)}
+    suite.test_keyword_matrix(list(pages))
+    matrix = suite.results['keyword_matrix']
+    # h2 + body weighs as much as an h1 but only names the town in passing
+    assert matrix['Cognac']['/cognac'] == {'weight': seo.KEYWORD_WEIGHTS['h1'], 'h2': 1, 'body': 1}
+    assert matrix['Soyaux']['/soyaux']['h1'] == 1
+    [result] = [event for event in suite.events.events if event.kind == 'check']
+    assert not result.passed
+    assert result.details == "1/2 name one in their title or h1"
+
+
+# ==================== MONITOR ====================
+
+def exposition(text: str) -> dict:
+    """sample -> value of a /metrics body"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            sample, value = line.rsplit(' ', 1)
+            samples[sample] = float(value)
+    return samples
+
+
+def test_prometheus_family_escapes_label_values():
+    lines = seo.prometheus_family('seo_check_failing', 'gauge', "Failing checks",
+                                  [('', {'name': 'Title "Accueil"', 'path': 'C:\\tmp\nx'}, 1), ('_count', {}, 2)])
+    assert lines == ['# HELP seo_check_failing Failing checks', '# TYPE seo_check_failing gauge',
+                     'seo_check_failing{name="Title \\"Accueil\\"",path="C:\\\\tmp\\nx"} 1.0',
+                     'seo_check_failing_count 2.0']
+
+
+def test_rolling_series_drops_values_older_than_the_window():
+    series = seo.RollingSeries(60)
+    for now, value in ((0, 1.0), (30, 2.0), (61, 3.0)):
+        series.add(value, now)
+    assert series.values(61) == [2.0, 3.0]
+    assert series.values(200) == []
+
+
+def test_monitor_serves_rolling_aggregates_at_metrics():
+    suite = mock_suite(3)
+    monitor = seo.Monitor(suite, crawl=True, port=0)
+    suite.events = seo.TeeSink(suite.events, monitor)
+    try:
+        assert monitor.cycle(['general_seo', 'performance'])
+        assert monitor.cycle(['performance'])
+        monitor._thread.start()
+        response = requests.get(monitor.url, timeout=5)
+        missing = requests.get(monitor.url.replace('/metrics', '/'), timeout=5)
+    finally:
+        monitor.close()
+    assert response.headers['Content-Type'] == seo.PROMETHEUS_CONTENT_TYPE
+    assert missing.status_code == 404
+    assert '# TYPE seo_ttfb_seconds summary' in response.text.splitlines()
+    samples = exposition(response.text)
+    assert samples['seo_monitor_up'] == 1
+    assert samples['seo_monitor_runs_total{check="general_seo"}'] == 1
+    assert samples['seo_monitor_runs_total{check="performance"}'] == 2
+    assert samples['seo_monitor_runs_total{check="local_seo"}'] == 0
+    # One TTFB per page and cycle that ran the performance check
+    assert samples['seo_ttfb_seconds_count{path="/"}'] == 2
+    median, p95 = (samples[f'seo_ttfb_seconds{{path="/",quantile="{quantile}"}}'] for quantile in ('0.5', '0.95'))
+    assert 0 < median <= p95
+    assert samples['seo_site_ttfb_seconds_count'] == 6
+    assert samples['seo_page_html_bytes{path="/page-1"}'] > 0
+    assert samples['seo_page_score_percent{path="/",category="general_seo"}'] == \
+        suite.results['pages']['/']['general_seo']['score']
+    failing = [sample for sample in samples if sample.startswith('seo_check_failing{check="general_seo"')]
+    assert samples['seo_failing_checks{check="general_seo"}'] == len(failing)
+
+
+def test_monitor_reports_a_failed_cycle(monkeypatch):
+    def fail(scheduler, crawl):
+        raise RuntimeError("sitemap unreachable")
+
+    monkeypatch.setattr(seo.CheckScheduler, 'run', fail)
+    suite = mock_suite(1)
+    monitor = seo.Monitor(suite, port=0)
+    try:
+        assert not monitor.cycle(['general_seo'])
+        samples = exposition(monitor.render())
+    finally:
+        monitor.close()
+    assert samples['seo_monitor_up'] == 0
+    assert samples['seo_monitor_errors_total'] == 1
+    assert samples['seo_monitor_runs_total{check="general_seo"}'] == 0
+    assert suite.only_checks is None
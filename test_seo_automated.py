@@ -6,15 +6,85 @@ Based on October 2025 standards
 """
 
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import asyncio
 import json
+from abc import ABC, abstractmethod
 import time
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+import os
+import math
+import mmap
+import socket
+import ssl
+import zlib
+import http.client
+import io
+import struct
+import sqlite3
+import statistics
+import hashlib
+import functools
+import importlib.metadata
+import http.server
+import mimetypes
+import multiprocessing
+import platform
+import random
+import signal
+import threading
+import unicodedata
+from collections import deque
+from bs4 import BeautifulSoup, NavigableString, Tag
+from urllib.parse import parse_qs, urljoin, urlparse
 import re
-from datetime import datetime
-from typing import Dict, List, Tuple
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import html
 import sys
 
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, html.parser is always available
+    etree = None
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # Pillow is optional, without it the image audit can't measure WebP/AVIF savings
+    PILImage = None
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, without it only the default urllib3 transport is available
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # without h2 the async transport speaks HTTP/1.1
+    h2 = None
+
+try:
+    import resource
+except ImportError:  # not on Windows, the benchmark then can't report peak memory
+    resource = None
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11, the cache audit then only reads public/_headers
+    tomllib = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, without it the compression audit only measures gzip locally
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, like brotli
+    zstandard = None
+
 # ANSI Colors for terminal output
 class Colors:
     GREEN = '\033[92m'
@@ -26,8 +96,2822 @@ class Colors:
     BOLD = '\033[1m'
     END = '\033[0m'
 
+class PageIndex:
+    """Compact summary of everything the checks read from a page.
+
+    Built in a single traversal of the parsed tree so each check is a
+    dictionary lookup instead of another walk over the whole DOM.
+    """
+
+    # <link rel=preload as=...> values mapped to resource kinds
+    PRELOAD_KINDS = {'font': 'font', 'script': 'script', 'style': 'stylesheet', 'image': 'image'}
+
+    # Site-wide template elements whose text is left out of `content`
+    CHROME_TAGS = ('header', 'nav', 'footer', 'aside')
+
+    def __init__(self):
+        self.lang = None
+        self.title = None
+        self.meta = {}          # lowercased name/property -> [content, ...]
+        self.links = {}         # lowercased rel token -> [href, ...]
+        self.headings = {level: [] for level in range(1, 7)}
+        self.json_ld = []       # raw ld+json script bodies
+        self.images = []        # attribute dict per <img>
+        self.anchors = []       # href per <a href>
+        self.styles = []        # inline <style> bodies
+        self.resources = []     # {'kind', 'url', 'attrs', 'in_head'} per referenced sub-resource
+        self.text = ''          # lowercased, whitespace-normalized visible text
+        self.content = ''       # the same for the <body> text outside CHROME_TAGS
+
+    @staticmethod
+    def _plain_attrs(attrs) -> Dict[str, str]:
+        """Copy attributes as plain strings (BeautifulSoup returns lists for rel/class)"""
+        return {key: ' '.join(value) if isinstance(value, list) else value for key, value in attrs.items()}
+
+    def _add_element(self, name: str, attrs: Dict, get_text, in_head: bool):
+        """Index one element; get_text is only called for elements whose text is kept"""
+        if name == 'meta':
+            content = attrs.get('content', '')
+            for attr in ('name', 'property'):
+                key = attrs.get(attr)
+                if key:
+                    self.meta.setdefault(key.lower(), []).append(content)
+        elif name == 'link':
+            rels = attrs.get('rel') or []
+            if isinstance(rels, str):
+                rels = rels.split()
+            rels = [rel.lower() for rel in rels]
+            href = attrs.get('href', '')
+            for rel in rels:
+                self.links.setdefault(rel, []).append(href)
+            kind = None
+            if 'stylesheet' in rels:
+                kind = 'stylesheet'
+            elif 'preload' in rels or 'modulepreload' in rels:
+                kind = 'script' if 'modulepreload' in rels else self.PRELOAD_KINDS.get((attrs.get('as') or '').lower())
+            elif any('icon' in rel for rel in rels):
+                kind = 'image'
+            if kind and href:
+                self.resources.append({'kind': kind, 'url': href, 'attrs': self._plain_attrs(attrs), 'in_head': in_head})
+        elif name == 'script':
+            if (attrs.get('type') or '').lower() == 'application/ld+json':
+                self.json_ld.append(get_text())
+            elif attrs.get('src'):
+                self.resources.append({'kind': 'script', 'url': attrs['src'], 'attrs': self._plain_attrs(attrs),
+                                       'in_head': in_head})
+        elif name == 'img':
+            image = self._plain_attrs(attrs)
+            self.images.append(image)
+            if image.get('src'):
+                self.resources.append({'kind': 'image', 'url': image['src'], 'attrs': image, 'in_head': in_head})
+        elif name == 'style':
+            self.styles.append(get_text())
+        elif name == 'a':
+            href = attrs.get('href')
+            if href:
+                self.anchors.append(href)
+        elif name == 'title':
+            if self.title is None:
+                self.title = get_text()
+        elif name == 'html':
+            if self.lang is None:
+                self.lang = attrs.get('lang')
+        elif len(name) == 2 and name[0] == 'h' and name[1] in '123456':
+            self.headings[int(name[1])].append(get_text())
+
+    @classmethod
+    def from_soup(cls, soup: BeautifulSoup) -> 'PageIndex':
+        index = cls()
+        head = soup.find('head')
+        head_nodes = {id(node) for node in head.descendants} if head else set()
+        chrome_nodes = {id(node) for element in soup.find_all(cls.CHROME_TAGS) for node in element.descendants}
+        text_parts = []
+        content_parts = []
+        for node in soup.descendants:
+            if type(node) is NavigableString:
+                text_parts.append(node)
+                if id(node) not in head_nodes and id(node) not in chrome_nodes:
+                    content_parts.append(node)
+                continue
+            if not isinstance(node, Tag):
+                continue
+            if node.name == 'script':
+                get_text = lambda node=node: node.string or node.get_text()
+            else:
+                get_text = node.get_text
+            index._add_element(node.name, node.attrs, get_text, id(node) in head_nodes)
+
+        index.text = ' '.join(''.join(text_parts).split()).lower()
+        index.content = ' '.join(''.join(content_parts).split()).lower()
+        return index
+
+    @classmethod
+    def from_lxml(cls, root) -> 'PageIndex':
+        index = cls()
+        if root is None:
+            return index
+        text_parts = []
+        content_parts = []
+        in_head = False
+        chrome = 0  # depth inside CHROME_TAGS elements
+        for event, el in etree.iterwalk(root, events=('start', 'end')):
+            name = el.tag.lower() if isinstance(el.tag, str) else None
+            if event == 'end':
+                if name == 'head':
+                    in_head = False
+                elif name in cls.CHROME_TAGS:
+                    chrome -= 1
+                if el.tail and el is not root:
+                    text_parts.append(el.tail)
+                    if not in_head and not chrome:
+                        content_parts.append(el.tail)
+                continue
+            if name is None:  # comments and processing instructions
+                continue
+            if name in cls.CHROME_TAGS:
+                chrome += 1
+            if el.text and name not in ('script', 'style', 'template'):
+                text_parts.append(el.text)
+                if not in_head and not chrome:
+                    content_parts.append(el.text)
+            if name == 'head':
+                in_head = True
+            if name == 'script':
+                get_text = lambda el=el: el.text or ''
+            else:
+                get_text = lambda el=el: ''.join(el.itertext())
+            index._add_element(name, el.attrib, get_text, in_head)
+
+        index.text = ' '.join(''.join(text_parts).split()).lower()
+        index.content = ' '.join(''.join(content_parts).split()).lower()
+        return index
+
+    def compact(self):
+        """Keep only what site-wide checks read (resources, anchors, images, canonical URL)"""
+        self.meta = {}
+        self.links = {rel: hrefs for rel, hrefs in self.links.items() if rel == 'canonical'}
+        self.headings = {level: [] for level in range(1, 7)}
+        self.json_ld = []
+        self.styles = []
+        self.text = ''
+        self.content = ''
+
+    def has_meta(self, key: str) -> bool:
+        return key.lower() in self.meta
+
+    def meta_content(self, key: str) -> Optional[str]:
+        """Content of the first meta tag with this name/property, None if absent"""
+        values = self.meta.get(key.lower())
+        return values[0] if values else None
+
+    def link_href(self, rel: str) -> Optional[str]:
+        """href of the first <link> with this rel, None if absent"""
+        hrefs = self.links.get(rel.lower())
+        return hrefs[0] if hrefs else None
+
+# ==================== RESULT EVENTS ====================
+
+class ResultEvent:
+    """One structured record of the run: a section header, a check, a score, a page total or an error"""
+
+    __slots__ = ('kind', 'name', 'section', 'path', 'passed', 'details',
+                 'category', 'score', 'total', 'time')
+
+    def __init__(self, kind: str, name: str = '', section: Optional[str] = None, path: Optional[str] = None,
+                 passed=None, details: str = '', category: Optional[str] = None,
+                 score: Optional[float] = None, total: Optional[int] = None):
+        self.kind = kind
+        self.name = name
+        self.section = section
+        self.path = path
+        self.passed = passed
+        self.details = details
+        self.category = category
+        self.score = score
+        self.total = total
+        self.time = time.time()
+
+    def to_dict(self) -> Dict:
+        """The event's set fields, for serialization"""
+        return {slot: getattr(self, slot) for slot in self.__slots__
+                if getattr(self, slot) not in (None, '')}
+
+class EventSink:
+    """Receives result events as checks complete; the base sink discards them"""
+
+    def emit(self, event: ResultEvent):
+        pass
+
+    def close(self):
+        pass
+
+class TerminalSink(EventSink):
+    """Renders events as colored terminal lines"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def render(self, event: ResultEvent) -> str:
+        """Terminal text for an event"""
+        if event.kind == 'header':
+            rule = f"{Colors.CYAN}{Colors.BOLD}{'=' * 80}{Colors.END}"
+            return f"\n{rule}\n{Colors.CYAN}{Colors.BOLD}{event.name.center(80)}{Colors.END}\n{rule}\n\n"
+        if event.kind == 'check':
+            status = f"{Colors.GREEN}✓ PASS{Colors.END}" if event.passed else f"{Colors.RED}✗ FAIL{Colors.END}"
+            text = f"{status} | {event.name}\n"
+            if event.details:
+                text += f"       {Colors.YELLOW}→ {event.details}{Colors.END}\n"
+            return text
+        if event.kind == 'score':
+            return f"\n{Colors.BOLD}{event.name} Score: {event.passed}/{event.total} ({event.score:.1f}%){Colors.END}\n"
+        if event.kind == 'message':
+            return event.name + '\n'
+        if event.kind == 'error':
+            return f"{Colors.RED}{event.name}{Colors.END}\n"
+        if event.kind == 'page':
+            color = Colors.GREEN if event.score >= 80 else Colors.YELLOW if event.score >= 60 else Colors.RED
+            return f"{color}{event.path:.<60} {event.passed}/{event.total} ({event.score:.1f}%){Colors.END}\n"
+        return ''
+
+    def emit(self, event: ResultEvent):
+        text = self.render(event)
+        if text:
+            with self._lock:
+                self.stream.write(text)
+
+class TeeSink(EventSink):
+    """Forwards every event to several sinks"""
+
+    def __init__(self, *sinks: EventSink):
+        self.sinks = sinks
+
+    def emit(self, event: ResultEvent):
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+class JsonlSink(EventSink):
+    """Appends one JSON object per event to a file, flushed as each result arrives"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def emit(self, event: ResultEvent):
+        line = json.dumps(event.to_dict(), ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+# ==================== HTML PARSER ENGINES ====================
+
+# The engines the suite parses with. The incremental engine feeds lxml directly and never
+# builds a BeautifulSoup tree; 'auto' times the available ones and keeps the fastest
+PARSER_ENGINES = ('lxml-incremental', 'lxml', 'html.parser')
+
+def available_parser_engines() -> List[str]:
+    """Parser engines usable in this environment"""
+    if etree is None:
+        return ['html.parser']
+    return list(PARSER_ENGINES)
+
+@functools.lru_cache(maxsize=None)
+def fastest_parser_engine() -> str:
+    """The available engine that indexes a typical page fastest on this machine, measured once per process"""
+    sample = SyntheticSite(8).page(3)
+    timings = {}
+    for engine in available_parser_engines():
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            parse_index(sample, engine)
+            best = min(best, time.perf_counter() - start)
+        timings[engine] = best
+    return min(timings, key=timings.get)
+
+def select_parser_engine(preferred: Optional[str] = None) -> str:
+    """Return the requested engine, or for None/'auto' the fastest available one"""
+    available = available_parser_engines()
+    if preferred in (None, 'auto'):
+        return fastest_parser_engine()
+    if preferred not in available:
+        raise ValueError(f"Parser engine '{preferred}' is not available (choose from {', '.join(available)})")
+    return preferred
+
+def sniff_encoding(content: bytes, content_type: str = '') -> str:
+    """Charset from the Content-Type header, else from <meta charset>, else utf-8"""
+    match = re.search(r'charset=["\']?([\w-]+)', content_type or '', re.I)
+    if match:
+        return match.group(1)
+    match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', content[:2048], re.I)
+    if match:
+        return match.group(1).decode('ascii')
+    return 'utf-8'
+
+class PageIndexer:
+    """Builds a PageIndex from an HTML body fed chunk by chunk, e.g. while it downloads.
+
+    The incremental engine parses each chunk as it arrives; the BeautifulSoup
+    engines collect the chunks and parse them on close(). With head_only the
+    body is ignored from </head> on, and head_done tells the caller it can
+    stop reading.
+    """
+
+    def __init__(self, engine: str, content_type: str = '', head_only: bool = False):
+        self.engine = engine
+        self.content_type = content_type
+        self.head_only = head_only
+        self.head_done = False
+        self._tail = b''  # end of the previous chunk, where </head> may start
+        self._chunks = []
+        self._parser = None
+
+    def feed(self, chunk: bytes):
+        """Parse (or keep) one more chunk"""
+        if not chunk or self.head_done:
+            return
+        if self.head_only:
+            window = self._tail + bytes(chunk)
+            end = window.lower().find(b'</head>')
+            if end != -1:
+                chunk = window[len(self._tail):end + len(b'</head>')]
+                self.head_done = True
+            else:
+                self._tail = window[-(len(b'</head>') - 1):]
+        if self.engine != 'lxml-incremental':
+            self._chunks.append(bytes(chunk))
+            return
+        if self._parser is None:
+            self._parser = etree.HTMLParser(encoding=sniff_encoding(chunk, self.content_type))
+        self._parser.feed(chunk)
+
+    def close(self) -> PageIndex:
+        if self.engine != 'lxml-incremental':
+            return PageIndex.from_soup(BeautifulSoup(b''.join(self._chunks), self.engine))
+        if self._parser is None:
+            return PageIndex()
+        try:
+            root = self._parser.close()
+        except etree.XMLSyntaxError:  # empty or unparseable document
+            root = None
+        return PageIndex.from_lxml(root)
+
+def parse_index(content: bytes, engine: str, content_type: str = '', chunk_size: int = 64 * 1024,
+                head_only: bool = False) -> PageIndex:
+    """Parse an HTML document, or only its <head>, into a PageIndex with the given engine"""
+    indexer = PageIndexer(engine, content_type, head_only)
+    for offset in range(0, len(content), chunk_size):
+        indexer.feed(content[offset:offset + chunk_size])
+        if indexer.head_done:
+            break
+    return indexer.close()
+
+class DocumentStore:
+    """Fetch-and-parse cache shared by every check of a run.
+
+    Each URL is downloaded and parsed at most once per run. Successful
+    responses carrying an ETag or Last-Modified header are also kept on disk
+    so the next run can revalidate them with a conditional request instead of
+    downloading the body again. The disk cache is bounded by
+    ``max_cache_bytes`` and evicts least recently used entries first.
+
+    Bodies are streamed: at most ``max_body_bytes`` of each is read, and HTML
+    is fed to the parser chunk by chunk as it arrives. Once a page's checks
+    are done, release() drops its body and trims its index to what site-wide
+    checks still read, so memory doesn't grow with the number of pages.
+    """
+
+    def __init__(self, session: requests.Session, cache_dir: Optional[str] = None,
+                 max_cache_bytes: int = 50 * 1024 * 1024, timeout: int = 10,
+                 parser: Optional[str] = None, max_body_bytes: int = 10 * 1024 * 1024,
+                 chunk_size: int = 64 * 1024):
+        self.session = session
+        self.parser = select_parser_engine(parser)
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.chunk_size = chunk_size
+        self.responses = {}
+        self.indexes = {}
+        self.heads = {}         # url -> (response, PageIndex) read only up to </head>
+        self.fetch_times = {}
+        self.parse_times = {}
+        self.body_sizes = {}    # url -> decoded body bytes, kept after release()
+        self.truncated = set()  # urls whose body was cut at max_body_bytes
+        self.stats = {'fetched': 0, 'revalidated': 0, 'memory_hits': 0}
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def get_response(self, url: str, validators: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Return the response for url, downloading it only once.
+
+        validators (If-None-Match/If-Modified-Since) make the request
+        conditional on the caller's own copy; a 304 answering them is
+        returned but not kept, as it holds no page.
+        """
+        with self._url_lock(url):
+            if url in self.responses:
+                self._count('memory_hits')
+                return self.responses[url]
+            start = time.perf_counter()
+            response = self._fetch(url, validators)
+            if response.status_code == 304:
+                return response
+            # Streamed HTML is parsed while it downloads; that time is counted as parsing
+            self.fetch_times[url] = time.perf_counter() - start - self.parse_times.get(url, 0.0)
+            self.responses[url] = response
+            return response
+
+    def get_index(self, url: str) -> Tuple[requests.Response, PageIndex]:
+        """Return (response, PageIndex) for url, building the index only once"""
+        response = self.get_response(url)
+        with self._url_lock(url):
+            if url in self.indexes:
+                return response, self.indexes[url]
+            start = time.perf_counter()
+            index = parse_index(response.content, self.parser, response.headers.get('Content-Type', ''))
+            self.parse_times[url] = time.perf_counter() - start
+            self.indexes[url] = index
+            return response, index
+
+    def get_head(self, url: str) -> Tuple[requests.Response, PageIndex]:
+        """Return (response, PageIndex) of url's <head> alone, downloading the body only up to </head>.
+
+        A page already indexed whole is answered from that index. Otherwise
+        the response holds the part of the body read, and is kept apart from
+        get_response's so checks needing the whole page still fetch it.
+        """
+        with self._url_lock(url):
+            if url in self.indexes:
+                self._count('memory_hits')
+                return self.responses[url], self.indexes[url]
+            if url in self.heads:
+                self._count('memory_hits')
+                return self.heads[url]
+            start = time.perf_counter()
+            response = self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True)
+            self._count('fetched')
+            indexer = PageIndexer(self.parser, response.headers.get('Content-Type', ''), head_only=True)
+            chunks = []
+            size = 0
+            try:
+                for chunk in response.iter_content(self.chunk_size):
+                    chunk = chunk[:self.max_body_bytes - size]
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    indexer.feed(chunk)
+                    if indexer.head_done or size >= self.max_body_bytes:
+                        break
+            finally:
+                response.close()
+            response.raw = None
+            response._content = b''.join(chunks)
+            response._content_consumed = True
+            self.heads[url] = (response, indexer.close())
+            self.fetch_times[url] = time.perf_counter() - start
+            return self.heads[url]
+
+    def _fetch(self, url: str, validators: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET url, revalidating the on-disk copy when one exists, or the caller's copy with validators"""
+        entry = self._read_entry(url) if validators is None else None
+        headers = dict(validators or {})
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.session.get(url, timeout=self.timeout, allow_redirects=True, headers=headers, stream=True)
+        if response.status_code == 304 and validators is not None:
+            response.close()
+            return response
+        if response.status_code == 304 and entry:
+            response.close()
+            self._count('revalidated')
+            cached_headers = CaseInsensitiveDict(entry['headers'])
+            cached_headers.update(response.headers)
+            cached = self._build_response(entry, cached_headers, self._read_body(url))
+            cached.elapsed = response.elapsed
+            self.body_sizes[url] = len(cached.content)
+            return cached
+
+        self._count('fetched')
+        self._download(url, response)
+        if response.status_code == 200 and url not in self.truncated:
+            self._write_entry(url, response)
+        return response
+
+    def _download(self, url: str, response: requests.Response):
+        """Read a streamed body up to max_body_bytes, indexing HTML as the chunks arrive"""
+        content_type = response.headers.get('Content-Type', '')
+        indexer = PageIndexer(self.parser, content_type) if 'html' in content_type.lower() else None
+        chunks = []
+        size = 0
+        parse_time = 0.0
+        try:
+            for chunk in response.iter_content(self.chunk_size):
+                if size + len(chunk) > self.max_body_bytes:
+                    chunk = chunk[:self.max_body_bytes - size]
+                    self.truncated.add(url)
+                chunks.append(chunk)
+                size += len(chunk)
+                if indexer is not None:
+                    start = time.perf_counter()
+                    indexer.feed(chunk)
+                    parse_time += time.perf_counter() - start
+                if url in self.truncated:
+                    break
+        finally:
+            response.close()
+        # The urllib3 response would keep its zlib decompressor, window and all, alive with the page
+        response.raw = None
+        response._content = b''.join(chunks)
+        response._content_consumed = True
+        self.body_sizes[url] = size
+        if indexer is not None:
+            start = time.perf_counter()
+            self.indexes[url] = indexer.close()
+            self.parse_times[url] = parse_time + time.perf_counter() - start
+
+    def body_size(self, url: str) -> int:
+        """Decoded body size of url, still known after release() dropped the body"""
+        return self.body_sizes.get(url, 0)
+
+    def release(self, url: str):
+        """Drop a page's body once its per-page checks are done, keeping its compact index"""
+        with self._url_lock(url):
+            for response in (self.responses.get(url), self.heads.get(url, (None,))[0]):
+                if response is not None:
+                    response._content = b''
+                    response.request = None
+            if url in self.indexes:
+                self.indexes[url].compact()
+
+    def expire(self):
+        """Forget every page held in memory so the next request revalidates it with the server"""
+        with self._lock:
+            for store in (self.responses, self.indexes, self.heads, self.fetch_times, self.parse_times,
+                          self.body_sizes, self._url_locks):
+                store.clear()
+            self.truncated.clear()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    # ---- on-disk cache ----
+
+    def _cache_path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _read_entry(self, url: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        meta_path = self._cache_path(url, '.json')
+        if not os.path.exists(meta_path) or not os.path.exists(self._cache_path(url, '.body')):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_body(self, url: str) -> bytes:
+        body_path = self._cache_path(url, '.body')
+        with open(body_path, 'rb') as f:
+            body = f.read()
+        # Touch the entry so eviction treats it as recently used
+        os.utime(body_path, None)
+        return body
+
+    def _write_entry(self, url: str, response: requests.Response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not self.cache_dir or not (etag or last_modified):
+            return
+        entry = {
+            'url': response.url,
+            'status': response.status_code,
+            'encoding': response.encoding,
+            'headers': dict(response.headers),
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': datetime.now().isoformat()
+        }
+        try:
+            with open(self._cache_path(url, '.body'), 'wb') as f:
+                f.write(response.content)
+            with open(self._cache_path(url, '.json'), 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            self._evict()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used bodies until the cache fits its budget"""
+        bodies = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.body'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                bodies.append((stat.st_mtime, stat.st_size, name[:-len('.body')]))
+                total += stat.st_size
+        for _, size, key in sorted(bodies):
+            if total <= self.max_cache_bytes:
+                break
+            for suffix in ('.body', '.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, key + suffix))
+                except OSError:
+                    pass
+            total -= size
+
+    @staticmethod
+    def _build_response(entry: Dict, headers: CaseInsensitiveDict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = headers
+        response.encoding = entry.get('encoding')
+        response._content = body
+        return response
+
+# ==================== REQUEST TIMING ====================
+
+TIMING_PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'parse', 'total')
+PERCENTILES = {'min': 0, 'p50': 50, 'p95': 95, 'p99': 99}
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of values (pct 0 is the minimum)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+DECODE_ERRORS = ((zlib.error,) + ((brotli.error,) if brotli is not None else ())
+                 + ((zstandard.ZstdError,) if zstandard is not None else ()))
+
+def decode_body(body: bytes, content_encoding: str) -> bytes:
+    """Undo gzip/deflate (and br/zstd when their modules are installed) Content-Encoding,
+    leaving other encodings untouched"""
+    encoding = (content_encoding or '').lower()
+    try:
+        if encoding == 'gzip':
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        if encoding == 'deflate':
+            return zlib.decompress(body)
+        if encoding == 'br' and brotli is not None:
+            return brotli.decompress(body)
+        if encoding == 'zstd' and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    except DECODE_ERRORS:
+        pass
+    return body
+
+def timed_hop(url: str, headers: Dict[str, str], timeout: int = 10) -> Tuple[Dict[str, float], http.client.HTTPResponse, bytes]:
+    """One GET of url on a fresh connection: (phase durations, response, raw body)"""
+    parsed = urlparse(url)
+    secure = parsed.scheme == 'https'
+    host = parsed.hostname
+    default_port = 443 if secure else 80
+    port = parsed.port or default_port
+    path = parsed.path or '/'
+    if parsed.query:
+        path += f"?{parsed.query}"
+    # http.client would add the port of a connection it didn't open itself ('host:443' over TLS)
+    host_header = parsed.netloc.rsplit('@', 1)[-1]
+    if host_header.endswith(f":{default_port}"):
+        host_header = host_header[:-len(f":{default_port}")]
+
+    start = time.perf_counter()
+    family, socktype, proto, _, sockaddr = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    dns_done = time.perf_counter()
+
+    sock = socket.socket(family, socktype, proto)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(sockaddr)
+        connect_done = time.perf_counter()
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        tls_done = time.perf_counter()
+
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        conn.sock = sock
+        conn.request('GET', path, headers={'Host': host_header, 'Accept-Encoding': 'gzip, deflate', **headers})
+        response = conn.getresponse()
+        ttfb_done = time.perf_counter()
+        body = response.read()
+        download_done = time.perf_counter()
+    finally:
+        sock.close()
+
+    phases = {
+        'dns': dns_done - start,
+        'connect': connect_done - dns_done,
+        'tls': tls_done - connect_done,
+        'ttfb': ttfb_done - tls_done,
+        'download': download_done - ttfb_done,
+    }
+    return phases, response, body
+
+def timed_get(url: str, headers: Dict[str, str], parser: str, timeout: int = 10,
+              keep_index: bool = False, max_redirects: int = 5) -> Dict[str, float]:
+    """GET url on a fresh connection and time each phase with a monotonic clock.
+
+    Returns seconds for dns, connect, tls (0 over plain HTTP), ttfb (request
+    sent to status line and headers read), download (body), parse and total
+    (dns through download, parse excluded), plus the status and the bytes
+    received. Redirects are followed, each hop on its own connection, and
+    every phase adds up its time across the hops, so a redirect counts against
+    the page like it does for a visitor; 'redirects' and the final 'url' are
+    returned too. With keep_index the parsed PageIndex is returned under 'index'.
+    """
+    timings = {phase: 0.0 for phase in ('dns', 'connect', 'tls', 'ttfb', 'download')}
+    for redirects in range(max_redirects + 1):
+        phases, response, body = timed_hop(url, headers, timeout)
+        for phase, seconds in phases.items():
+            timings[phase] += seconds
+        location = response.getheader('Location')
+        if response.status not in (301, 302, 303, 307, 308) or not location:
+            break
+        url = urljoin(url, location)
+    else:
+        raise http.client.HTTPException(f"More than {max_redirects} redirects")
+
+    content = decode_body(body, response.getheader('Content-Encoding', ''))
+    parse_start = time.perf_counter()
+    index = parse_index(content, parser, content_type=response.getheader('Content-Type', ''))
+    parse_done = time.perf_counter()
+
+    timings.update({
+        'parse': parse_done - parse_start,
+        'total': sum(timings.values()),
+        'status': response.status,
+        'bytes': len(body),
+        'redirects': redirects,
+        'url': url
+    })
+    if keep_index:
+        timings['index'] = index
+    return timings
+
+def summarize_timings(samples: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """min/p50/p95/p99 of every timing phase across samples"""
+    return {
+        phase: {name: percentile([sample[phase] for sample in samples], pct) for name, pct in PERCENTILES.items()}
+        for phase in TIMING_PHASES
+    }
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram that can be merged across threads and runs.
+
+    Buckets grow by 2**(1/8) (about 9% wide), so percentiles are accurate to a
+    few percent at any scale with a few hundred buckets at most.
+    """
+
+    BUCKETS_PER_DOUBLING = 8
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds: float):
+        micros = max(seconds * 1e6, 1.0)
+        bucket = int(math.log2(micros) * self.BUCKETS_PER_DOUBLING)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile, in seconds"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                upper = 2 ** ((bucket + 1) / self.BUCKETS_PER_DOUBLING) / 1e6
+                return min(upper, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min or 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max or 0.0,
+            'buckets': {str(bucket): count for bucket, count in sorted(self.buckets.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.buckets = {int(bucket): count for bucket, count in data.get('buckets', {}).items()}
+        histogram.count = data.get('count', 0)
+        histogram.total = data.get('mean', 0.0) * histogram.count
+        histogram.min = data.get('min') if histogram.count else None
+        histogram.max = data.get('max') if histogram.count else None
+        return histogram
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KB, None where the resource module is missing"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS reports bytes, Linux KB
+
+# ==================== TRANSPORT ====================
+
+# Statuses worth retrying: rate limited or a transient server error
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Transports --transport can select; mock only serves the --bench sites
+TRANSPORTS = ('http', 'async', 'mock')
+
+class RateLimiter:
+    """Token bucket shared by every request of a run: `rate` requests per second, in bursts of up to `burst`.
+
+    Tokens are reserved in arrival order, so a waiting thread can't be
+    overtaken by one that came later.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until it is due; returns the seconds waited"""
+        with self._lock:
+            now = time.perf_counter()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class BodyStream:
+    """A response body already in memory, read like urllib3's raw response.
+
+    Transports that aren't urllib3 hand requests one of these, so
+    iter_content() decodes it and the compression audit can still read the
+    bytes as they were on the wire with stream(decode_content=False).
+    """
+
+    def __init__(self, wire: bytes, content_encoding: str = '', version: int = 11):
+        self.wire = wire
+        self.content_encoding = content_encoding
+        self.version = version
+        self._offset = 0
+
+    def stream(self, amt: int = 64 * 1024, decode_content: bool = True):
+        body = decode_body(self.wire, self.content_encoding) if decode_content else self.wire
+        for offset in range(self._offset, len(body), amt):
+            yield body[offset:offset + amt]
+        self._offset = len(body)
+
+    def read(self, amt: Optional[int] = None, decode_content: bool = True) -> bytes:
+        return b''.join(self.stream(amt or len(self.wire) or 1, decode_content))
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+class AsyncBodyStream:
+    """A body an AsyncHttpTransport is still receiving, read like urllib3's raw response.
+
+    Chunks are pulled from the event loop as they are read, so a reader that
+    stops early, e.g. at the document store's max_body_bytes, never downloads
+    the rest. The host slot is freed once the body is read to the end or closed.
+    """
+
+    def __init__(self, transport: 'AsyncHttpTransport', response, release, version: int = 11):
+        self.transport = transport
+        self.response = response  # streaming httpx.Response
+        self.version = version
+        self._release = release
+        self._chunks = None
+        self._pending = b''
+        self._closed = False
+
+    def stream(self, amt: int = 64 * 1024, decode_content: bool = True):
+        if self._pending:
+            pending, self._pending = self._pending, b''
+            yield pending
+        if self._chunks is None:
+            self._chunks = self.response.aiter_bytes(amt) if decode_content else self.response.aiter_raw(amt)
+        while not self._closed:
+            try:
+                chunk = self.transport._run(self._chunks.__anext__())
+            except StopAsyncIteration:
+                self.close()
+                return
+            except httpx.HTTPError as e:
+                self.close()
+                raise requests.ConnectionError(e)
+            yield chunk
+
+    def read(self, amt: Optional[int] = None, decode_content: bool = True) -> bytes:
+        data = b''
+        for chunk in self.stream(amt or 64 * 1024, decode_content):
+            data += chunk
+            if amt and len(data) >= amt:
+                data, self._pending = data[:amt], data[amt:]
+                break
+        return data
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            if not self.transport._closed:
+                self.transport._run(self._aclose())
+
+    async def _aclose(self):
+        try:
+            await self.response.aclose()
+        finally:
+            self._release()
+
+    def release_conn(self):
+        self.close()
+
+def build_response(adapter, request: requests.PreparedRequest, status: int, headers, raw,
+                   elapsed: float, reason: str = '') -> requests.Response:
+    """requests.Response for a body a non-urllib3 transport received or is receiving (raw)"""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.raw = raw
+    response.reason = reason
+    response.url = request.url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.elapsed = timedelta(seconds=elapsed)
+    response.connection = adapter
+    return response
+
+class RetryPolicy(ABC):
+    """Mixin giving a requests transport adapter retries, backoff and the global rate limit.
+
+    Subclasses implement transmit() with the arguments of send(). A 429 or
+    5xx response, a connection error or a timeout is retried up to `retries`
+    times, waiting backoff * 2**attempt seconds or the server's Retry-After,
+    capped at max_backoff. Every attempt, retries included, takes a token
+    from the limiter.
+    """
+
+    def __init__(self, retries: int = 2, backoff: float = 0.5, max_backoff: float = 30.0,
+                 limiter: Optional[RateLimiter] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter
+        self.stats = {'requests': 0, 'retries': 0, 'throttled_seconds': 0.0, 'http2': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str, amount=1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def retry_delay(self, response: Optional[requests.Response], attempt: int) -> float:
+        delay = self.backoff * 2 ** attempt
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            delay = int(retry_after)
+        elif retry_after:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+        return min(max(delay, 0.0), self.max_backoff)
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout=None, verify=True,
+             cert=None, proxies=None) -> requests.Response:
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self._count('throttled_seconds', self.limiter.acquire())
+            self._count('requests')
+            try:
+                response = self.transmit(request, stream=stream, timeout=timeout, verify=verify,
+                                         cert=cert, proxies=proxies)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                response = None
+            if response is not None:
+                if getattr(response.raw, 'version', 11) == 20:
+                    self._count('http2')
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            delay = self.retry_delay(response, attempt)
+            if response is not None:
+                response.close()
+            self._count('retries')
+            time.sleep(delay)
+
+    @abstractmethod
+    def transmit(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Send one attempt of request, with the keyword arguments of send()"""
+
+class HttpTransport(RetryPolicy, HTTPAdapter):
+    """The default transport: urllib3 keep-alive pools of up to pool_per_host connections per host"""
+
+    def __init__(self, pool_per_host: int = 16, hosts: int = 32, **kwargs):
+        super().__init__(pool_connections=hosts, pool_maxsize=pool_per_host, **kwargs)
+
+    def transmit(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        return HTTPAdapter.send(self, request, **kwargs)
+
+class AsyncHttpTransport(RetryPolicy, BaseAdapter):
+    """Sends the suite's requests through one httpx.AsyncClient running on a background asyncio loop.
+
+    With HTTP/2 (needs the h2 package) concurrent requests to a host are
+    multiplexed over one keep-alive connection instead of a socket each. At
+    most pool_per_host requests per host are in flight at once. Bodies are
+    streamed (see AsyncBodyStream). The verify, cert and proxies arguments of
+    requests are honoured with one client per combination, since httpx fixes
+    them per client.
+    """
+
+    def __init__(self, pool_per_host: int = 16, http2: bool = True, keepalive: float = 30.0, **kwargs):
+        if httpx is None:
+            raise ValueError("The async transport needs httpx: pip install 'httpx[http2]'")
+        super().__init__(**kwargs)
+        self.pool_per_host = pool_per_host
+        self.http2 = http2 and h2 is not None
+        self.keepalive = keepalive
+        self._host_slots = {}
+        self._clients = {}  # (verify, cert, proxy) -> httpx.AsyncClient
+        self._clients_lock = threading.Lock()
+        self._closed = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._client_for(True, None, None)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _client_for(self, verify, cert, proxy: Optional[str]):
+        key = (verify, tuple(cert) if isinstance(cert, list) else cert, proxy)
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = self._run(self._open(*key))
+            return client
+
+    async def _open(self, verify, cert, proxy: Optional[str]):
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None,
+                              keepalive_expiry=self.keepalive)
+        return httpx.AsyncClient(http2=self.http2, limits=limits, follow_redirects=False,
+                                 verify=tls_context(verify, cert), proxy=proxy)
+
+    def transmit(self, request: requests.PreparedRequest, stream: bool = False, timeout=None, verify=True,
+                 cert=None, proxies=None) -> requests.Response:
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        client = self._client_for(verify, cert, requests.utils.select_proxy(request.url, proxies or {}))
+        try:
+            response, release, elapsed = self._run(self._send(client, request, httpx.Timeout(read, connect=connect)))
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(e, request=request)
+        version = 20 if response.http_version == 'HTTP/2' else 11
+        return build_response(self, request, response.status_code, response.headers.multi_items(),
+                              AsyncBodyStream(self, response, release, version), elapsed, response.reason_phrase)
+
+    async def _send(self, client, request: requests.PreparedRequest, timeout) -> Tuple:
+        """Send request and wait for its headers, keeping the host slot until the body is closed"""
+        host = urlparse(request.url).netloc
+        slot = self._host_slots.setdefault(host, asyncio.Semaphore(self.pool_per_host))
+        await slot.acquire()
+        try:
+            start = time.perf_counter()
+            response = await client.send(client.build_request(request.method, request.url,
+                                                              headers=list(request.headers.items()),
+                                                              content=request.body, timeout=timeout), stream=True)
+        except BaseException:
+            slot.release()
+            raise
+        return response, slot.release, time.perf_counter() - start
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for client in self._clients.values():
+            self._run(client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+class MockTransport(RetryPolicy, BaseAdapter):
+    """Deterministic in-memory transport for tests and benchmarks: no socket is ever opened.
+
+    handler(request) returns (status, headers, body) for a PreparedRequest,
+    or None for a connection error. Every response reports `latency` as its
+    elapsed time, and each request is logged as (method, url) in `log`.
+    """
+
+    def __init__(self, handler, latency: float = 0.0, **kwargs):
+        kwargs.setdefault('retries', 0)
+        kwargs.setdefault('backoff', 0.0)
+        super().__init__(**kwargs)
+        self.handler = handler
+        self.latency = latency
+        self.log = []
+        self._log_lock = threading.Lock()
+
+    @classmethod
+    def for_site(cls, site, **kwargs) -> 'MockTransport':
+        """Serve a SyntheticSite or RecordedSite like FixtureServer does"""
+        return cls(lambda request: fixture_response(site, urlparse(request.url).path or '/', request.headers,
+                                                    request.method), **kwargs)
+
+    def transmit(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        with self._log_lock:
+            self.log.append((request.method, request.url))
+        answer = self.handler(request)
+        if answer is None:
+            raise requests.ConnectionError(f"Mock transport refused {request.url}", request=request)
+        status, headers, body = answer
+        headers = CaseInsensitiveDict(headers)
+        raw = BodyStream(body if request.method != 'HEAD' else b'', headers.get('Content-Encoding', ''))
+        return build_response(self, request, status, headers, raw, self.latency,
+                              http.client.responses.get(status, ''))
+
+    def close(self):
+        pass
+
+def tls_context(verify=True, cert=None):
+    """httpx's verify argument for requests' verify (bool or CA bundle path) and cert (path or (cert, key))"""
+    if verify is True and not cert:
+        return True
+    if isinstance(verify, str):
+        context = ssl.create_default_context(cafile=verify if os.path.isfile(verify) else None,
+                                             capath=verify if os.path.isdir(verify) else None)
+    else:
+        context = ssl.create_default_context()
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+    if cert:
+        context.load_cert_chain(*((cert,) if isinstance(cert, str) else cert))
+    return context
+
+def make_transport(name: str = 'http', pool_per_host: int = 16, retries: int = 2, backoff: float = 0.5,
+                   rate_limit: Optional[float] = None, site=None) -> BaseAdapter:
+    """Transport adapter for --transport; mock needs the site it serves"""
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    if name == 'http':
+        return HttpTransport(pool_per_host=pool_per_host, retries=retries, backoff=backoff, limiter=limiter)
+    if name == 'async':
+        return AsyncHttpTransport(pool_per_host=pool_per_host, retries=retries, backoff=backoff, limiter=limiter)
+    if name == 'mock':
+        if site is None:
+            raise ValueError("The mock transport only serves --bench sites")
+        return MockTransport.for_site(site, retries=retries, backoff=backoff, limiter=limiter)
+    raise ValueError(f"Unknown transport: {name} (choose from {', '.join(TRANSPORTS)})")
+
+# ==================== IMAGE INSPECTION ====================
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico', '.svg')
+
+def image_dimensions(data: bytes) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """(format, width, height) read from the image header, without decoding pixels"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 9 < len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                offset += 2
+                continue
+            length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return 'jpeg', width, height
+            offset += 2 + length
+        return 'jpeg', None, None
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and len(data) >= 30:
+            width, height = struct.unpack('<HH', data[26:30])
+            return 'webp', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and len(data) >= 25:
+            bits = int.from_bytes(data[21:25], 'little')
+            return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X' and len(data) >= 30:
+            return 'webp', int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return 'webp', None, None
+    if data[4:12] in (b'ftypavif', b'ftypavis'):
+        return 'avif', None, None
+    if data[:4] == b'\x00\x00\x01\x00' and len(data) >= 8:
+        return 'ico', data[6] or 256, data[7] or 256
+    if b'<svg' in data[:1024]:
+        return 'svg', None, None
+    return None, None, None
+
+def inspect_image(file_path: str) -> Dict:
+    """Worker process entry point: measure one image file.
+
+    With Pillow installed the image is fully decoded and re-encoded in memory
+    to measure real WebP (and AVIF when supported) sizes.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    fmt, width, height = image_dimensions(data)
+    info = {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'bytes': len(data),
+        'format': fmt,
+        'width': width,
+        'height': height,
+        'bytes_per_pixel': len(data) / (width * height) if width and height else None,
+        'webp_bytes': None,
+        'avif_bytes': None,
+        'measured': False
+    }
+    if PILImage is None or fmt in (None, 'svg', 'ico'):
+        return info
+
+    try:
+        PILImage.init()  # registers every encoder so PILImage.SAVE lists WEBP/AVIF support
+        with PILImage.open(io.BytesIO(data)) as img:
+            img.load()
+            info['width'], info['height'] = img.size
+            info['bytes_per_pixel'] = len(data) / (img.size[0] * img.size[1])
+            if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            for target, key in (('WEBP', 'webp_bytes'), ('AVIF', 'avif_bytes')):
+                if target not in PILImage.SAVE:
+                    continue
+                buffer = io.BytesIO()
+                img.save(buffer, target, quality=80)
+                info[key] = buffer.tell()
+            info['measured'] = True
+    except Exception as e:  # unreadable or unsupported image, keep the header-level info
+        info['error'] = str(e)
+    return info
+
+# ==================== OFFLINE BUILD OUTPUT ====================
+
+# Next.js error pages and internals that are not site routes
+NON_ROUTE_PAGES = {'404', '500', '_error', '_not-found', '_app', '_document'}
+
+def route_for_file(rel_path: str) -> Optional[str]:
+    """Map a prerendered HTML file (relative to its pages root) to its site route"""
+    parts = rel_path.replace(os.sep, '/').split('/')
+    if parts[0] == '_next' or not parts[-1].endswith('.html'):
+        return None
+    stem = parts[-1][:-len('.html')]
+    if stem in NON_ROUTE_PAGES:
+        return None
+    parts = parts[:-1] if stem == 'index' else parts[:-1] + [stem]
+    # A trailing-slash export writes the error pages as 404/index.html
+    if len(parts) == 1 and parts[0] in NON_ROUTE_PAGES:
+        return None
+    return '/' + '/'.join(parts)
+
+def build_page_routes(build_dir: str) -> Dict[str, str]:
+    """Map site routes to HTML files in a static export or a .next build directory"""
+    server_roots = [os.path.join(build_dir, 'server', sub) for sub in ('pages', 'app')]
+    roots = [root for root in server_roots if os.path.isdir(root)] or [build_dir]
+
+    routes = {}
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                route = route_for_file(os.path.relpath(file_path, root))
+                if route and route not in routes:
+                    routes[route] = file_path
+    return routes
+
+class BuildDirectoryStore(DocumentStore):
+    """DocumentStore that serves prerendered HTML from disk instead of HTTP.
+
+    Files are memory-mapped, so the incremental parser reads them straight
+    from the page cache without an extra copy.
+    """
+
+    def __init__(self, build_dir: str, parser: Optional[str] = None, routes: Optional[Dict[str, str]] = None):
+        super().__init__(session=None, cache_dir=None, parser=parser)
+        self.build_dir = build_dir
+        self.routes = build_page_routes(build_dir) if routes is None else routes
+        self._maps = {}
+
+    def get_head(self, url: str) -> Tuple[requests.Response, PageIndex]:
+        """Build pages are read from disk, not downloaded, so the whole page is indexed as get_index does"""
+        return self.get_index(url)
+
+    def _fetch(self, url: str, validators: Optional[Dict[str, str]] = None) -> requests.Response:
+        path = urlparse(url).path or '/'
+        if path != '/':
+            path = path.rstrip('/')
+        file_path = self.routes.get(path)
+
+        response = requests.Response()
+        response.url = url
+        response.headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+        if file_path is None:
+            response.status_code = 404
+            response._content = b''
+            return response
+
+        self._count('fetched')
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        if size:
+            self._maps[url] = content
+        response.status_code = 200
+        response.headers['Content-Length'] = str(size)
+        response._content = content
+        self.body_sizes[url] = size
+        return response
+
+    def release(self, url: str):
+        """Drop a page's response and unmap its file once its checks are done"""
+        super().release(url)
+        with self._url_lock(url):
+            self.responses.pop(url, None)
+            content = self._maps.pop(url, None)
+            if content is not None:
+                content.close()
+
+# ==================== COMPRESSION ====================
+
+# Accept-Encoding values the compression audit negotiates, one request each
+ACCEPT_ENCODINGS = ('identity', 'gzip', 'br', 'zstd')
+
+# Levels compressed locally per codec: fast, server default and maximum
+COMPRESSION_LEVELS = {'gzip': (1, 6, 9), 'br': (4, 6, 11), 'zstd': (3, 12, 19)}
+
+# Bodies below this size aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+def available_codecs() -> List[str]:
+    """Codecs compress_body can measure: gzip always, br/zstd when their modules are installed"""
+    return [codec for codec, module in (('gzip', zlib), ('br', brotli), ('zstd', zstandard)) if module is not None]
+
+def compress_body(body: bytes, codec: str, level: int) -> bytes:
+    """Compress a body as a server would for Content-Encoding: codec"""
+    if codec == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+    if codec == 'br':
+        return brotli.compress(body, quality=level)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    raise ValueError(f"Unknown codec: {codec}")
+
+def compressed_sizes(body: bytes) -> Dict[str, Dict[int, int]]:
+    """Size of a body under each available codec at each of its COMPRESSION_LEVELS"""
+    return {codec: {level: len(compress_body(body, codec, level)) for level in COMPRESSION_LEVELS[codec]}
+            for codec in available_codecs()}
+
+def negotiate_encoding(session: requests.Session, url: str, accept_encoding: str, timeout: int = 10) -> Dict:
+    """Request a URL with one Accept-Encoding and record what was served and its size on the wire"""
+    result = {'accept': accept_encoding, 'status': None, 'encoding': 'identity', 'vary': '', 'bytes': 0}
+    try:
+        response = session.get(url, headers={'Accept-Encoding': accept_encoding}, timeout=timeout, stream=True)
+        body = b''.join(response.raw.stream(64 * 1024, decode_content=False))
+        response.close()
+    except requests.RequestException as e:
+        result['error'] = str(e)
+        return result
+    result['status'] = response.status_code
+    result['encoding'] = (response.headers.get('Content-Encoding') or 'identity').strip().lower()
+    result['vary'] = response.headers.get('Vary', '')
+    result['content_type'] = response.headers.get('Content-Type', '')
+    result['bytes'] = len(body)
+    if accept_encoding == 'identity':
+        result['body'] = decode_body(body, result['encoding'])
+    return result
+
+# ==================== HTTP CACHING ====================
+
+# Response headers a _headers/netlify.toml rule can set that decide how a URL is cached
+CACHE_POLICY_HEADERS = ('cache-control', 'cdn-cache-control', 'netlify-cdn-cache-control', 'expires', 'vary')
+
+# Content-hashed build assets: their URL changes with their content, so they can be cached forever
+FINGERPRINT_RE = re.compile(r'/_next/static/|[.-][0-9a-f]{8,}\.[a-z0-9]+$', re.I)
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Cache-Control directives, lowercased, mapped to their value (None for bare directives)"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.strip().lower()] = argument.strip().strip('"') or None
+    return directives
+
+def cache_lifetime(directives: Dict[str, Optional[str]]) -> Optional[int]:
+    """Shared-cache freshness lifetime in seconds: s-maxage, else max-age"""
+    for name in ('s-maxage', 'max-age'):
+        value = directives.get(name)
+        if value is not None and value.isdigit():
+            return int(value)
+    return None
+
+def header_rule_pattern(pattern: str):
+    """Regex for a Netlify path pattern: * matches anything, :name one path segment"""
+    regex = ''.join('.*' if part == '*' else '[^/]+' if part.startswith(':') else re.escape(part)
+                    for part in re.split(r'(\*|:[A-Za-z_]\w*)', pattern))
+    return re.compile(f"^{regex}$")
+
+def load_header_rules(project_dir: str) -> List[Tuple[str, object, Dict[str, str]]]:
+    """(pattern, regex, {lowercased header: value}) rules from netlify.toml, then public/_headers"""
+    rules = []
+    toml_path = os.path.join(project_dir, 'netlify.toml')
+    if tomllib is not None and os.path.exists(toml_path):
+        try:
+            with open(toml_path, 'rb') as f:
+                config = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError):
+            config = {}
+        for block in config.get('headers', []):
+            if block.get('for'):
+                values = {name.lower(): str(value) for name, value in block.get('values', {}).items()}
+                rules.append((block['for'], header_rule_pattern(block['for']), values))
+
+    headers_path = os.path.join(project_dir, 'public', '_headers')
+    if os.path.exists(headers_path):
+        with open(headers_path, 'r', encoding='utf-8') as f:
+            pattern = None
+            for line in f:
+                if not line.strip() or line.lstrip().startswith('#'):
+                    continue
+                if not line[0].isspace():
+                    pattern = line.strip()
+                    rules.append((pattern, header_rule_pattern(pattern), {}))
+                elif pattern and ':' in line:
+                    name, _, value = line.strip().partition(':')
+                    rules[-1][2][name.strip().lower()] = value.strip()
+    return rules
+
+def expected_cache_headers(rules: List[Tuple[str, object, Dict[str, str]]], path: str) -> Dict[str, str]:
+    """Caching headers the rules declare for a path; later matching rules override earlier ones"""
+    expected = {}
+    for _, regex, values in rules:
+        if regex.match(path):
+            expected.update({name: value for name, value in values.items() if name in CACHE_POLICY_HEADERS})
+    return expected
+
+# ==================== CRITICAL RENDERING PATH ====================
+
+CSS_IMPORT_RE = re.compile(r'@import\s+(?:url\(\s*)?[\'"]?([^\'")\s;]+)', re.I)
+FONT_FACE_RE = re.compile(r'@font-face\s*{([^}]*)}', re.I)
+FONT_DISPLAY_RE = re.compile(r'font-display\s*:\s*([a-z-]+)', re.I)
+
+# font-display values that render text with a fallback font instead of hiding it
+NON_BLOCKING_FONT_DISPLAY = ('swap', 'fallback', 'optional')
+
+def font_displays(css: str) -> List[str]:
+    """font-display of each @font-face rule in a stylesheet, 'auto' when unset"""
+    displays = []
+    for block in FONT_FACE_RE.findall(css):
+        match = FONT_DISPLAY_RE.search(block)
+        displays.append(match.group(1).lower() if match else 'auto')
+    return displays
+
+def is_render_blocking(resource: Dict) -> bool:
+    """Whether a <head> script or stylesheet holds back the first render"""
+    if not resource['in_head']:
+        return False
+    attrs = resource['attrs']
+    if resource['kind'] == 'script':
+        return not ('async' in attrs or 'defer' in attrs or (attrs.get('type') or '').lower() == 'module')
+    if resource['kind'] == 'stylesheet':
+        if 'stylesheet' not in (attrs.get('rel') or '').lower().split() or 'disabled' in attrs:
+            return False
+        media = (attrs.get('media') or 'all').strip().lower()
+        return media in ('all', 'screen') or media.startswith(('all ', 'screen ', 'only screen'))
+    return False
+
+def origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+# ==================== USER AGENTS ====================
+
+# Agents for the differential audit; the first one requested is the baseline the others are diffed against
+USER_AGENTS = {
+    'browser': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+               'Chrome/131.0.0.0 Safari/537.36',
+    'googlebot': 'Mozilla/5.0 (Linux; Android 6.0.1; Nexus 5X Build/MMB29P) AppleWebKit/537.36 (KHTML, like Gecko) '
+                 'Chrome/131.0.0.0 Mobile Safari/537.36 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'bingbot': 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; bingbot/2.0; '
+               '+http://www.bing.com/bingbot.htm) Chrome/131.0.0.0 Safari/537.36',
+    'gptbot': 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.2; +https://openai.com/gptbot)',
+    'claudebot': 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; ClaudeBot/1.0; '
+                 '+claudebot@anthropic.com)',
+    'perplexitybot': 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; PerplexityBot/1.0; '
+                     '+https://perplexity.ai/perplexitybot)',
+}
+DEFAULT_USER_AGENTS = ('browser', 'googlebot', 'gptbot', 'claudebot')
+
+def parse_user_agents(spec: Optional[str], custom: List[str] = ()) -> Dict[str, str]:
+    """{name: User-Agent} from 'name,name,...' of USER_AGENTS, then custom 'name=User-Agent string' agents.
+
+    Custom agents are given one per item of custom rather than in spec, as
+    User-Agent strings contain commas themselves.
+    """
+    agents = {}
+    for name in (spec or '').split(','):
+        name = name.strip()
+        if '=' in name:
+            raise ValueError(f"Give custom agents with --user-agent NAME=UA, not in the --user-agents list ('{name}')")
+        if name in USER_AGENTS:
+            agents[name] = USER_AGENTS[name]
+        elif name:
+            raise ValueError(f"Unknown user agent '{name}' (known: {', '.join(USER_AGENTS)})")
+    for item in custom:
+        name, sep, agent = item.partition('=')
+        if not sep or not name.strip() or not agent.strip():
+            raise ValueError(f"--user-agent takes NAME=User-Agent string, got '{item}'")
+        agents[name.strip()] = agent.strip()
+    return agents
+
+def index_signature(index: PageIndex, types: List[str]) -> Dict:
+    """The SEO-relevant parts of a page that every user agent should receive identically"""
+    return {
+        'title': index.title,
+        'description': index.meta_content('description'),
+        'robots': index.meta_content('robots'),
+        'canonical': index.link_href('canonical'),
+        'og:title': index.meta_content('og:title'),
+        'h1': index.headings[1],
+        'h2': index.headings[2],
+        'json_ld': sorted(types),
+        'text_length': len(index.text),
+        'links': len(set(index.anchors)),
+        'images': len(index.images),
+    }
+
+def diff_signatures(base: Dict, other: Dict, tolerance: float = 0.1) -> List[str]:
+    """Differences of another agent's page from the baseline; counts may shrink by `tolerance`"""
+    diffs = []
+    for key in ('title', 'description', 'robots', 'canonical', 'og:title', 'h1', 'h2', 'json_ld'):
+        if base[key] != other[key]:
+            if isinstance(base[key], list):
+                missing = [value for value in base[key] if value not in other[key]]
+                extra = [value for value in other[key] if value not in base[key]]
+                diffs.append(f"{key}: " + ', '.join(
+                    ([f"missing {missing[:3]}"] if missing else []) + ([f"extra {extra[:3]}"] if extra else [])
+                    or [f"order {other[key][:3]}"]))
+            else:
+                diffs.append(f"{key}: {other[key]!r} vs {base[key]!r}")
+    for key in ('text_length', 'links', 'images'):
+        if other[key] < base[key] * (1 - tolerance):
+            diffs.append(f"{key}: {other[key]} vs {base[key]}")
+    return diffs
+
+# ==================== DUPLICATE DETECTION ====================
+
+SHINGLE_WORDS = 5      # words per shingle of body text
+MINHASH_BINS = 64      # one-permutation MinHash signature length
+LSH_BANDS = 16         # bands of MINHASH_BINS // LSH_BANDS values; pages sharing a band are compared
+LSH_BUCKET_CLUSTERS = 64  # clusters a page is compared against within one band bucket
+DUPLICATE_THRESHOLD = 0.8
+
+# Order in which an empty MinHash bin looks for a filled bin to borrow from, fixed so signatures compare across runs
+DENSIFY_ORDER = [random.Random(slot).sample(range(MINHASH_BINS), MINHASH_BINS) for slot in range(MINHASH_BINS)]
+
+def text_digest(text: str) -> str:
+    """Short stable hash of a text, the same in every process and run"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+def shingle_hashes(text: str, size: int = SHINGLE_WORDS) -> List[int]:
+    """64-bit hash of every run of `size` consecutive words (the whole text when shorter).
+
+    Each distinct word is digested once; a shingle hashes the tuple of its
+    words' digests, which unlike str hashes isn't salted per process.
+    """
+    digests = {}
+    words = [digests[word] if word in digests else
+             digests.setdefault(word, int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'big'))
+             for word in re.findall(r'\w+', text)]
+    if not words:
+        return []
+    return [hash(tuple(words[start:start + size])) & 0xffffffffffffffff
+            for start in range(max(1, len(words) - size + 1))]
+
+def minhash_signature(hashes, bins: int = MINHASH_BINS) -> Optional[str]:
+    """One-permutation MinHash of shingle hashes as hex, None without any shingle.
+
+    Each hash lands in bin hash % bins, which keeps its smallest hash // bins,
+    so the signature costs one pass instead of one hash function per value.
+    An empty bin borrows the value of the first filled bin in its own fixed
+    random order (optimal densification), which keeps the similarity
+    estimate unbiased on short texts that leave most bins empty.
+    """
+    empty = 1 << 64
+    values = [empty] * bins
+    for value in hashes:
+        rank, slot = divmod(value, bins)
+        if rank < values[slot]:
+            values[slot] = rank
+    if all(value == empty for value in values):
+        return None
+    orders = DENSIFY_ORDER if bins == MINHASH_BINS else \
+        [random.Random(slot).sample(range(bins), bins) for slot in range(bins)]
+    signature = [value if value != empty else next(values[donor] for donor in orders[slot] if values[donor] != empty)
+                 for slot, value in enumerate(values)]
+    return ''.join(f"{value & 0xffffffff:08x}" for value in signature)
+
+def signature_similarity(a: str, b: str) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures: the share of equal values"""
+    values = len(a) // 8
+    return sum(a[i:i + 8] == b[i:i + 8] for i in range(0, len(a), 8)) / values if values else 0.0
+
+def normalized_text(text: Optional[str]) -> str:
+    return ' '.join((text or '').split()).casefold()
+
+def page_fingerprint(index: PageIndex) -> Dict:
+    """Hashes of a page's title, meta description and body text for the duplicate detection"""
+    title = normalized_text(index.title)
+    description = normalized_text(index.meta_content('description'))
+    return {
+        'title': text_digest(title) if title else None,
+        'title_text': title[:80],
+        'description': text_digest(description) if description else None,
+        'description_text': description[:80],
+        'minhash': minhash_signature(shingle_hashes(index.content)),
+        'words': len(index.content.split()),
+    }
+
+class DuplicateIndex:
+    """Clusters of pages sharing a title or meta description, or near-identical body text.
+
+    Titles and descriptions group by exact hash. Body text signatures are cut
+    into LSH bands and only pages sharing a whole band are compared, so the
+    work grows with the number of pages rather than the number of pairs.
+    """
+
+    def __init__(self, bands: int = LSH_BANDS, threshold: float = DUPLICATE_THRESHOLD):
+        self.bands = bands
+        self.threshold = threshold
+        self.exact = {'title': {}, 'description': {}}  # field -> digest -> [path, ...]
+        self.labels = {}
+        self.buckets = {}                               # (band, values) -> [path, ...]
+        self.signatures = {}
+
+    def add(self, path: str, fingerprint: Dict):
+        for field, groups in self.exact.items():
+            digest = fingerprint.get(field)
+            if digest:
+                groups.setdefault(digest, []).append(path)
+                self.labels.setdefault(digest, fingerprint.get(f'{field}_text', ''))
+        signature = fingerprint.get('minhash')
+        if signature:
+            self.signatures[path] = signature
+            width = len(signature) // self.bands
+            for band in range(self.bands):
+                self.buckets.setdefault((band, signature[band * width:(band + 1) * width]), []).append(path)
+
+    def exact_clusters(self, field: str) -> List[Dict]:
+        """Groups of pages sharing the same title or description"""
+        return [{'paths': paths, 'text': self.labels[digest]}
+                for digest, paths in self.exact[field].items() if len(paths) > 1]
+
+    def near_clusters(self) -> List[Dict]:
+        """Groups of pages whose body text similarity reaches the threshold"""
+        parent = {}
+
+        def find(path: str) -> str:
+            root = path
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while path != root:
+                parent[path], path = root, parent.get(path, path)
+            return root
+
+        # Within a bucket each page is compared with one page of every cluster met so far in it,
+        # joining the first similar one or starting a cluster of its own. Up to
+        # LSH_BUCKET_CLUSTERS clusters per bucket, so a band value shared by many unrelated
+        # pages (boilerplate) doesn't make the comparisons quadratic
+        compared = set()
+        for paths in self.buckets.values():
+            clusters = []
+            for path in paths:
+                for member in clusters:
+                    if find(path) == find(member):
+                        break
+                    if (member, path) in compared:
+                        continue
+                    compared.add((member, path))
+                    if signature_similarity(self.signatures[member], self.signatures[path]) >= self.threshold:
+                        parent[find(path)] = find(member)
+                        break
+                else:
+                    if len(clusters) < LSH_BUCKET_CLUSTERS:
+                        clusters.append(path)
+
+        groups = {}
+        for path in self.signatures:
+            groups.setdefault(find(path), []).append(path)
+        clusters = []
+        for paths in groups.values():
+            if len(paths) > 1:
+                similarity = min(signature_similarity(self.signatures[paths[0]], self.signatures[path])
+                                 for path in paths[1:])
+                clusters.append({'paths': paths, 'similarity': similarity})
+        return clusters
+
+# ==================== LOCAL KEYWORDS ====================
+
+# Entities the local SEO scan looks for, by kind: name -> other spellings. Case and accents
+# are folded on both sides, so 'Angouleme' already matches 'Angoulême'; --keywords FILE
+# replaces this with a JSON object of the same shape.
+DEFAULT_KEYWORDS = {
+    'locality': {
+        'Angoulême': ['Angoumois', 'Grand Angoulême', 'GrandAngoulême'],
+        'Soyaux': [], 'La Couronne': [], 'Ruelle-sur-Touvre': [], 'Gond-Pontouvre': [],
+        "L'Isle-d'Espagnac": ['Isle-d’Espagnac'], 'Saint-Yrieix-sur-Charente': ['Saint-Yrieix'],
+        'Champniers': [], 'Fléac': [], 'Puymoyen': [], 'Magnac-sur-Touvre': [], 'Linars': [], 'Nersac': [],
+        'Mornac': [], 'Dirac': [], 'Garat': [], 'Vœuil-et-Giget': [], 'Sireuil': [], 'Trois-Palis': [],
+        'Roullet-Saint-Estèphe': [], 'Saint-Saturnin': [], 'Asnières-sur-Nouère': [],
+        'Marsac': [], 'Vars': [], 'Hiersac': [], 'Saint-Amant-de-Boixe': [], 'Mansle': [], 'Ruffec': [],
+        'Rouillac': [], 'Jarnac': [], 'Cognac': [], 'Segonzac': [], 'Châteauneuf-sur-Charente': [],
+        'Barbezieux-Saint-Hilaire': ['Barbezieux'], 'Baignes-Sainte-Radegonde': [], 'Blanzac-Porcheresse': [],
+        'Montmoreau': [], 'Villebois-Lavalette': [], 'Chalais': [], 'Aubeterre-sur-Dronne': [],
+        'La Rochefoucauld-en-Angoumois': ['La Rochefoucauld'], 'Montbron': [], 'Chasseneuil-sur-Bonnieure': [],
+        'Confolens': [], 'Chabanais': [], 'Saint-Junien': [], 'Rochechouart': [],
+        'Bordeaux': [], 'Limoges': [], 'Poitiers': [], 'La Rochelle': [], 'Niort': [], 'Périgueux': [],
+        'Rochefort': [], 'Royan': [], 'Bergerac': [], 'Brive-la-Gaillarde': ['Brive'],
+        'Agen': [], 'Pau': [], 'Bayonne': [], 'Mont-de-Marsan': [], 'Libourne': [], 'Châtellerault': [],
+    },
+    'region': {
+        'Charente': [], 'Charente-Maritime': [], 'Dordogne': [], 'Haute-Vienne': [], 'Deux-Sèvres': [],
+        'Gironde': [], 'Corrèze': [], 'Landes': [], 'Lot-et-Garonne': [],
+        'Pyrénées-Atlantiques': [], 'Nouvelle-Aquitaine': [], 'Poitou-Charentes': [],
+    },
+    'service': {
+        'Création de site internet': ['création de sites internet', 'création de site web', 'création de sites web',
+                                      'site internet', 'sites internet', 'site web', 'sites web', 'site vitrine'],
+        'Référencement': ['SEO', 'référencement naturel', 'référencement local', 'référencement Google'],
+        'Moteurs IA': ['GEO', 'ChatGPT', 'Perplexity', 'référencement IA'],
+        'Développement web': ['développeur web', 'développement sur-mesure', 'Next.js', 'React'],
+        'E-commerce': ['boutique en ligne', 'site e-commerce'],
+        'Refonte de site': ['refonte'],
+        'Webdesign': ['web design', 'webdesigner', 'UX', 'UI'],
+        'Agence web': ['agence digitale', 'agence de communication'],
+        'Application web': ['applications web', 'web app'],
+        'Maintenance': ['hébergement', 'maintenance de site'],
+        'Livraison express': ['livraison en 24h', 'livraison 24h', 'en 24 heures'],
+    },
+}
+
+# Kinds counted as geographic targeting by the local SEO test and the site matrix
+LOCAL_KINDS = ('locality', 'region')
+
+# Weight of a keyword appearing in each part of a page; a page's weight for an entity
+# adds up the parts it appears in, so repeating it in the body doesn't raise it further
+KEYWORD_WEIGHTS = {'title': 5, 'h1': 3, 'h2': 2, 'alt': 1, 'body': 1}
+
+COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+
+def fold_words(text: str) -> List[str]:
+    """Lowercased words of text without accents or ligatures: 'Vœuil-et-Giget' -> ['voeuil', 'et', 'giget']"""
+    folded = text.casefold()
+    if not folded.isascii():
+        folded = folded.replace('œ', 'oe').replace('æ', 'ae')
+        folded = COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', folded))
+    return re.findall(r'\w+', folded)
+
+def load_keywords(path: str) -> Dict[str, Dict[str, List[str]]]:
+    """Read a --keywords file: {"kind": {"Entity": ["other spelling", ...]}}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        keywords = json.load(f)
+    if not isinstance(keywords, dict) or not all(
+            isinstance(entities, dict) and all(isinstance(variants, list) for variants in entities.values())
+            for entities in keywords.values()):
+        raise ValueError(f"{path} must map each kind to an object of entity names and lists of spellings")
+    return keywords
+
+class KeywordScanner:
+    """Aho-Corasick automaton finding every keyword of a set in one pass over a text.
+
+    The automaton runs over folded words rather than characters, so matches
+    always fall on word boundaries and a text costs one step per word however
+    many keywords there are. Where spellings overlap the longest one wins
+    ('Charente-Maritime' over 'Charente').
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, List[str]]] = DEFAULT_KEYWORDS):
+        self.kinds = {}
+        self.goto = [{}]    # state -> word -> next state
+        self.fail = [0]
+        self.output = [[]]  # state -> [(words matched, entity)] of the keywords ending there
+        for kind, entities in keywords.items():
+            for entity, variants in entities.items():
+                self.kinds[entity] = kind
+                for variant in [entity] + list(variants):
+                    self._add(fold_words(variant), entity)
+        self._link()
+
+    def _add(self, words: List[str], entity: str):
+        if not words:
+            return
+        state = 0
+        for word in words:
+            if word not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][word] = len(self.goto) - 1
+            state = self.goto[state][word]
+        if (len(words), entity) not in self.output[state]:
+            self.output[state].append((len(words), entity))
+
+    def _link(self):
+        """Failure links, breadth first, each state also reporting the matches of its failure state"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text: str) -> List[str]:
+        """Entities mentioned in text, once per non-overlapping mention, in order"""
+        matches = []
+        state = 0
+        for position, word in enumerate(fold_words(text)):
+            while state and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            for length, entity in self.output[state]:
+                matches.append((position - length + 1, -length, entity))
+        found = []
+        end = 0
+        for start, negative_length, entity in sorted(matches):
+            if start >= end:
+                found.append(entity)
+                end = start - negative_length
+        return found
+
+    def coverage(self, index: PageIndex) -> Dict[str, Dict]:
+        """Per entity found on the page: its kind, mentions per part of the page and its weight.
+
+        The body is the page's content (text outside <head> and the header,
+        nav, footer and aside) less its h1/h2, so a keyword is counted once
+        per place it appears rather than again as body text.
+        """
+        body = index.content
+        for heading in index.headings[1] + index.headings[2]:
+            heading = ' '.join(heading.split()).lower()
+            if heading:
+                body = body.replace(heading, ' ', 1)
+        parts = {
+            'title': [index.title or ''],
+            'h1': index.headings[1],
+            'h2': index.headings[2],
+            'alt': [image.get('alt') or '' for image in index.images],
+            'body': [body],
+        }
+        coverage = {}
+        for part, texts in parts.items():
+            for text in texts:
+                for entity in self.find(text):
+                    entry = coverage.setdefault(entity, {'kind': self.kinds[entity], 'weight': 0})
+                    if part not in entry:
+                        entry[part] = 0
+                        entry['weight'] += KEYWORD_WEIGHTS[part]
+                    entry[part] += 1
+        return coverage
+
+# ==================== LINK CHECKING ====================
+
+class LinkChecker:
+    """Checks link targets concurrently with a cap on requests per host.
+
+    Each URL is requested HEAD first (GET when the server refuses HEAD) with
+    redirects followed by hand so every hop of the chain is recorded and
+    counted against its own host's limit. Definitive results are kept for
+    `ttl` seconds in an optional JSON cache, so repeated runs don't re-check
+    every link; network errors, 429s and 5xx are checked again next time.
+    """
+
+    def __init__(self, session: requests.Session, cache_path: Optional[str] = None, ttl: float = 3600,
+                 per_host: int = 4, max_workers: int = 16, timeout: int = 10, max_redirects: int = 10):
+        self.session = session
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.per_host = per_host
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.results = {}
+        self.stats = {'checked': 0, 'cached': 0}
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.results = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _request(self, url: str) -> Tuple[requests.Response, str]:
+        """One hop: HEAD, or GET without reading the body when HEAD is refused or fails"""
+        with self._host_slot(url):
+            try:
+                response = self.session.head(url, timeout=self.timeout, allow_redirects=False)
+                if response.status_code < 400:
+                    return response, 'HEAD'
+            except requests.RequestException:
+                pass  # some servers and CDNs reset or stall on HEAD only
+            response = self.session.get(url, timeout=self.timeout, allow_redirects=False, stream=True)
+            response.close()
+            return response, 'GET'
+
+    def check(self, url: str) -> Dict:
+        """Status, redirect chain and elapsed time of one URL"""
+        info = {'url': url, 'status': None, 'method': 'HEAD', 'redirects': [], 'final_url': url,
+                'elapsed': 0.0, 'checked_at': time.time()}
+        start = time.perf_counter()
+        current = url
+        try:
+            for _ in range(self.max_redirects + 1):
+                response, info['method'] = self._request(current)
+                if response.is_redirect:
+                    current = urljoin(current, response.headers['Location'])
+                    info['redirects'].append({'status': response.status_code, 'url': current})
+                    continue
+                info['status'] = response.status_code
+                break
+            else:
+                info['error'] = f"More than {self.max_redirects} redirects"
+        except requests.RequestException as e:
+            info['error'] = str(e)
+            info['transient'] = True
+        info['final_url'] = current
+        info['elapsed'] = time.perf_counter() - start
+        return info
+
+    @staticmethod
+    def definitive(info: Dict) -> bool:
+        """Whether a result can be cached: no network error, and not a status the next try may not get"""
+        status = info.get('status') or 0
+        return not info.get('transient') and status != 429 and status < 500
+
+    def check_all(self, urls: List[str]) -> Dict[str, Dict]:
+        """Check each URL once, reusing cached definitive results younger than the TTL"""
+        now = time.time()
+        pending = [url for url in urls
+                   if url not in self.results or not self.definitive(self.results[url])
+                   or now - self.results[url].get('checked_at', 0) > self.ttl]
+        self.stats['cached'] += len(set(urls)) - len(set(pending))
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.check, url): url for url in set(pending)}
+                for future in as_completed(futures):
+                    self.results[futures[future]] = future.result()
+                    self.stats['checked'] += 1
+        return {url: self.results[url] for url in urls}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump({url: info for url, info in self.results.items() if self.definitive(info)}, f)
+
+# ==================== SCHEMA.ORG RULES ====================
+
+# type -> parent type, so a ProfessionalService is checked (and found) as a LocalBusiness
+SCHEMA_PARENTS = {
+    'Organization': 'Thing',
+    'LocalBusiness': 'Organization',
+    'ProfessionalService': 'LocalBusiness',
+    'Person': 'Thing',
+    'Place': 'Thing',
+    'CreativeWork': 'Thing',
+    'WebSite': 'CreativeWork',
+    'WebPage': 'CreativeWork',
+    'AboutPage': 'WebPage',
+    'ContactPage': 'WebPage',
+    'FAQPage': 'WebPage',
+    'ItemPage': 'WebPage',
+    'CollectionPage': 'WebPage',
+    'HowTo': 'CreativeWork',
+    'HowToStep': 'CreativeWork',
+    'Question': 'CreativeWork',
+    'Answer': 'CreativeWork',
+    'ImageObject': 'CreativeWork',
+    'ItemList': 'Thing',
+    'BreadcrumbList': 'ItemList',
+    'ListItem': 'Thing',
+    'Offer': 'Thing',
+    'Service': 'Thing',
+    'PostalAddress': 'Thing',
+    'GeoCoordinates': 'Thing',
+    'OpeningHoursSpecification': 'Thing',
+    'SpeakableSpecification': 'Thing',
+    'City': 'Place',
+    'State': 'Place',
+    'Country': 'Place',
+    'AdministrativeArea': 'Place',
+}
+
+# type -> required/recommended properties and expected value types. Rules are
+# inherited along SCHEMA_PARENTS; 'A|B' accepts either type, and the
+# capitalised primitives (Text, URL, Number, Date, Time) check literal values.
+SCHEMA_RULES = {
+    'Thing': {
+        'properties': {'name': 'Text', 'description': 'Text', 'url': 'URL',
+                       'sameAs': 'URL', 'image': 'URL|ImageObject'},
+    },
+    'Organization': {
+        'required': ('name',),
+        'recommended': ('url', 'logo'),
+        'properties': {'logo': 'URL|ImageObject', 'email': 'Text', 'telephone': 'Text',
+                       'address': 'PostalAddress|Text', 'founder': 'Person|Organization'},
+    },
+    'LocalBusiness': {
+        'required': ('name', 'address', 'geo'),
+        'recommended': ('telephone', 'openingHoursSpecification', 'areaServed', 'image', 'priceRange'),
+        'properties': {'geo': 'GeoCoordinates', 'priceRange': 'Text',
+                       'openingHoursSpecification': 'OpeningHoursSpecification',
+                       'areaServed': 'Place|AdministrativeArea|Text', 'makesOffer': 'Offer'},
+    },
+    'Person': {
+        'required': ('name',),
+        'properties': {'jobTitle': 'Text'},
+    },
+    'PostalAddress': {
+        'required': ('addressLocality', 'addressCountry'),
+        'recommended': ('streetAddress', 'postalCode', 'addressRegion'),
+        'properties': {'streetAddress': 'Text', 'addressLocality': 'Text', 'addressRegion': 'Text',
+                       'postalCode': 'Text', 'addressCountry': 'Country|Text'},
+    },
+    'GeoCoordinates': {
+        'required': ('latitude', 'longitude'),
+        'properties': {'latitude': 'Number', 'longitude': 'Number'},
+    },
+    'OpeningHoursSpecification': {
+        'required': ('dayOfWeek', 'opens', 'closes'),
+        'properties': {'dayOfWeek': 'Text|URL', 'opens': 'Time', 'closes': 'Time'},
+    },
+    'WebSite': {
+        'required': ('name', 'url'),
+    },
+    'WebPage': {
+        'required': ('name', 'description', 'url'),
+        'properties': {'isPartOf': 'WebSite', 'speakable': 'SpeakableSpecification'},
+    },
+    'FAQPage': {
+        'required': ('mainEntity',),
+        'properties': {'mainEntity': 'Question'},
+    },
+    'Question': {
+        'required': ('name', 'acceptedAnswer'),
+        'properties': {'acceptedAnswer': 'Answer'},
+    },
+    'Answer': {
+        'required': ('text',),
+        'properties': {'text': 'Text'},
+    },
+    'BreadcrumbList': {
+        'required': ('itemListElement',),
+        'properties': {'itemListElement': 'ListItem'},
+    },
+    'ListItem': {
+        'required': ('position',),
+        'recommended': ('name', 'item'),
+        'properties': {'position': 'Number', 'item': 'URL|Thing'},
+    },
+    'HowTo': {
+        'required': ('name', 'step'),
+        'properties': {'step': 'HowToStep|Text'},
+    },
+    'HowToStep': {
+        'required': ('text',),
+        'properties': {'text': 'Text'},
+    },
+    'Offer': {
+        'recommended': ('itemOffered',),
+        'properties': {'itemOffered': 'Service|Thing', 'price': 'Number|Text'},
+    },
+    'Service': {
+        'required': ('name',),
+        'properties': {'provider': 'Organization|Person'},
+    },
+    'ImageObject': {
+        'required': ('url',),
+        'properties': {'width': 'Number|Text', 'height': 'Number|Text'},
+    },
+}
+
+SCHEMA_TIME_RE = re.compile(r'^\d{2}:\d{2}(:\d{2})?')
+SCHEMA_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+SCHEMA_PRIMITIVES = {
+    'Text': lambda v: isinstance(v, str),
+    'URL': lambda v: isinstance(v, str) and (v.startswith(('http://', 'https://', '/')) or v.startswith('#')),
+    'Number': lambda v: (isinstance(v, (int, float)) and not isinstance(v, bool))
+                        or (isinstance(v, str) and re.fullmatch(r'-?\d+(\.\d+)?', v) is not None),
+    'Date': lambda v: isinstance(v, str) and SCHEMA_DATE_RE.match(v) is not None,
+    'Time': lambda v: isinstance(v, str) and SCHEMA_TIME_RE.match(v) is not None,
+}
+
+def schema_types(node: Dict) -> List[str]:
+    """@type of a node as a list (schema.org allows a single type or several)"""
+    node_type = node.get('@type')
+    if isinstance(node_type, list):
+        return [t for t in node_type if isinstance(t, str)]
+    return [node_type] if isinstance(node_type, str) else []
+
+class SchemaValidator:
+    """Validates JSON-LD against SCHEMA_RULES.
+
+    The rules are compiled once into a check function per type with the
+    inherited rules already merged. Each JSON-LD blob is parsed and validated
+    once per distinct content (keyed by sha256), so the same @graph repeated
+    on every page of a crawl costs a dictionary lookup after the first page.
+    The memo keeps the max_blobs most recently used results.
+    """
+
+    def __init__(self, rules: Dict = SCHEMA_RULES, parents: Dict = SCHEMA_PARENTS, max_blobs: int = 256):
+        self.parents = parents
+        self._validators = {t: self._compile(t, rules) for t in set(rules) | set(parents)}
+        self.max_blobs = max_blobs
+        self._blobs = {}
+        self._lock = threading.Lock()
+        self.stats = {'validated': 0, 'memo_hits': 0}
+
+    def is_a(self, schema_type: str, expected: str) -> bool:
+        """Whether schema_type is expected or one of its subtypes"""
+        while schema_type:
+            if schema_type == expected:
+                return True
+            schema_type = self.parents.get(schema_type)
+        return False
+
+    def ancestry(self, schema_type: str) -> List[str]:
+        """schema_type followed by its parents, most specific first"""
+        chain = []
+        while schema_type and schema_type not in chain:
+            chain.append(schema_type)
+            schema_type = self.parents.get(schema_type)
+        return chain
+
+    def _compile(self, schema_type: str, rules: Dict):
+        """Merge the inherited rules for a type and build its check function"""
+        required, recommended, value_checks = [], [], {}
+        for ancestor in reversed(self.ancestry(schema_type)):
+            rule = rules.get(ancestor, {})
+            required += [p for p in rule.get('required', ()) if p not in required]
+            recommended += [p for p in rule.get('recommended', ()) if p not in recommended]
+            for prop, spec in rule.get('properties', {}).items():
+                value_checks[prop] = (spec, self._compile_value(spec))
+        recommended = [p for p in recommended if p not in required]
+
+        def validate(node: Dict, ids: Dict) -> Tuple[List[str], List[str]]:
+            errors = [f"missing {p}" for p in required if p not in node]
+            warnings = [p for p in recommended if p not in node]
+            for prop, (spec, check) in value_checks.items():
+                if prop in node and not check(node[prop], ids):
+                    errors.append(f"{prop} should be {spec}")
+            return errors, warnings
+
+        validate.has_rules = bool(required or recommended)
+        return validate
+
+    def _compile_value(self, spec: str):
+        """Build a value check for a 'Type|Type' spec"""
+        alternatives = spec.split('|')
+        primitives = [SCHEMA_PRIMITIVES[a] for a in alternatives if a in SCHEMA_PRIMITIVES]
+        expected = [a for a in alternatives if a not in SCHEMA_PRIMITIVES]
+
+        def check(value, ids: Dict) -> bool:
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, dict):
+                    if set(item) == {'@id'}:
+                        item = ids.get(item['@id'])
+                        if item is None:
+                            continue  # dangling references are reported separately
+                    types = schema_types(item)
+                    if not expected:
+                        return False
+                    if types and not any(self.is_a(t, e) for t in types for e in expected):
+                        return False
+                elif not any(p(item) for p in primitives):
+                    return False
+            return True
+
+        return check
+
+    def validate_blob(self, raw: str) -> Dict:
+        """Parse and validate one JSON-LD script, memoized by content hash"""
+        key = hashlib.sha256(raw.encode('utf-8', 'surrogatepass')).hexdigest()
+        with self._lock:
+            cached = self._blobs.pop(key, None)
+            if cached is not None:
+                self._blobs[key] = cached
+                self.stats['memo_hits'] += 1
+                return cached
+
+        result = {'data': None, 'error': None, 'nodes': [], 'ids': {}, 'refs': set()}
+        try:
+            result['data'] = json.loads(raw)
+        except json.JSONDecodeError as e:
+            result['error'] = str(e)
+        else:
+            nodes = []
+            self._walk(result['data'], nodes, result['ids'], result['refs'])
+            for node in nodes:
+                types = schema_types(node)
+                errors, warnings = [], []
+                for schema_type in types:
+                    node_errors, node_warnings = self.validator(schema_type)(node, result['ids'])
+                    errors += node_errors
+                    warnings += node_warnings
+                result['nodes'].append({'type': types[0] if types else None, 'types': types,
+                                        'id': node.get('@id'), 'node': node,
+                                        'errors': errors, 'warnings': warnings})
+
+        with self._lock:
+            self._blobs[key] = result
+            if len(self._blobs) > self.max_blobs:
+                del self._blobs[next(iter(self._blobs))]
+            self.stats['validated'] += 1
+        return result
+
+    def _walk(self, value, nodes: List[Dict], ids: Dict, refs: set):
+        """Collect typed nodes, @id definitions and pure @id references"""
+        if isinstance(value, list):
+            for item in value:
+                self._walk(item, nodes, ids, refs)
+        elif isinstance(value, dict):
+            if set(value) == {'@id'}:
+                refs.add(value['@id'])
+                return
+            if '@id' in value:
+                ids[value['@id']] = value
+            if '@type' in value:
+                nodes.append(value)
+            for prop, item in value.items():
+                if not prop.startswith('@') or prop == '@graph':
+                    self._walk(item, nodes, ids, refs)
+
+    def validator(self, schema_type: str):
+        """Compiled check for a type; unknown types only get Thing's value checks"""
+        compiled = self._validators.get(schema_type)
+        if compiled is None:
+            compiled = self._validators['Thing']
+        return compiled
+
+    def has_rules(self, schema_type: str) -> bool:
+        """Whether a type has required or recommended properties"""
+        return schema_type in self._validators and self._validators[schema_type].has_rules
+
+    def validate_page(self, raws: List[str]) -> Dict:
+        """Validate every JSON-LD script of a page and resolve @id references across them"""
+        blobs = [self.validate_blob(raw) for raw in raws]
+        ids = {}
+        refs = set()
+        for blob in blobs:
+            ids.update(blob['ids'])
+            refs |= blob['refs']
+        return {'blobs': blobs, 'ids': ids, 'unresolved': sorted(refs - set(ids))}
+
+    def find(self, raws: List[str], expected: str) -> Optional[Dict]:
+        """First node on a page whose type is expected or one of its subtypes"""
+        for blob in self.validate_page(raws)['blobs']:
+            for entry in blob['nodes']:
+                if any(self.is_a(t, expected) for t in entry['types']):
+                    return entry['node']
+        return None
+
+# ==================== RESULTS HISTORY ====================
+
+# metric name -> (rule, threshold, minimum change): 'ratio' flags relative increases,
+# 'drop_ratio' relative decreases, 'delta' absolute increases and 'drop' absolute
+# decreases. Changes smaller than the minimum are noise (e.g. sub-50ms timing jitter).
+REGRESSION_RULES = {
+    'ttfb_p50': ('ratio', 0.30, 0.05),
+    'ttfb_p95': ('ratio', 0.30, 0.05),
+    'total_p50': ('ratio', 0.30, 0.05),
+    'total_p95': ('ratio', 0.30, 0.05),
+    'parse_p50': ('ratio', 0.30, 0.01),
+    'html_bytes': ('delta', 100 * 1024, 0),
+    'page_bytes': ('delta', 100 * 1024, 0),
+    'score': ('drop', 5.0, 0),
+    'load_p95': ('ratio', 0.30, 0.05),
+    'load_throughput': ('drop_ratio', 0.30, 0),
+}
+
+class ResultsStore:
+    """SQLite history of audit runs: runs, pages, check scores and metrics.
+
+    Metrics are stored per (run, path, name); the site-wide ones use the
+    empty path. compare() flags REGRESSION_RULES breaches against a baseline
+    run or against the rolling median of the previous runs.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            base_url TEXT NOT NULL,
+            parser TEXT,
+            page_count INTEGER,
+            overall_score REAL
+        );
+        CREATE TABLE IF NOT EXISTS pages (
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            path TEXT NOT NULL,
+            score REAL,
+            PRIMARY KEY (run_id, path)
+        );
+        CREATE TABLE IF NOT EXISTS checks (
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            path TEXT NOT NULL,
+            category TEXT NOT NULL,
+            passed INTEGER,
+            total INTEGER,
+            score REAL
+        );
+        CREATE TABLE IF NOT EXISTS metrics (
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            path TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_base_url ON runs (base_url, id);
+        CREATE INDEX IF NOT EXISTS idx_checks_run ON checks (run_id, category);
+        CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics (run_id);
+        CREATE INDEX IF NOT EXISTS idx_metrics_series ON metrics (path, name, run_id);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save_run(self, base_url: str, results: Dict, metrics: Dict[str, Dict[str, float]], parser: str = '') -> int:
+        """Store one run's scores and metrics and return its id"""
+        pages = results.get('pages', {})
+        summary = results.get('summary', {})
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (started_at, base_url, parser, page_count, overall_score) VALUES (?, ?, ?, ?, ?)',
+                (summary.get('timestamp', datetime.now().isoformat()), base_url, parser, len(pages),
+                 summary.get('overall_score')))
+            run_id = cursor.lastrowid
+            self.conn.executemany('INSERT INTO pages (run_id, path, score) VALUES (?, ?, ?)',
+                                  [(run_id, path, metrics.get(path, {}).get('score')) for path in pages])
+            rows = [(run_id, path, category, data['passed'], data['total'], data['score'])
+                    for path, page in pages.items() for category, data in page.items()
+                    if 'passed' in data and category != 'overall']
+            rows += [(run_id, '', category, data['passed'], data['total'], data['score'])
+                     for category, data in results.items()
+                     if isinstance(data, dict) and 'passed' in data]
+            self.conn.executemany('INSERT INTO checks (run_id, path, category, passed, total, score) '
+                                  'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self.conn.executemany('INSERT INTO metrics (run_id, path, name, value) VALUES (?, ?, ?, ?)',
+                                  [(run_id, path, name, value) for path, values in metrics.items()
+                                   for name, value in values.items() if value is not None])
+        return run_id
+
+    def latest_run(self, base_url: Optional[str] = None) -> Optional[int]:
+        if base_url:
+            row = self.conn.execute('SELECT MAX(id) FROM runs WHERE base_url = ?', (base_url,)).fetchone()
+        else:
+            row = self.conn.execute('SELECT MAX(id) FROM runs').fetchone()
+        return row[0]
+
+    def run_metrics(self, run_id: int) -> Dict[Tuple[str, str], float]:
+        rows = self.conn.execute('SELECT path, name, value FROM metrics WHERE run_id = ?', (run_id,))
+        return {(path, name): value for path, name, value in rows}
+
+    def rolling_median(self, run_id: int, window: int = 5) -> Dict[Tuple[str, str], float]:
+        """Median of each metric over the `window` runs of the same site before run_id"""
+        previous = [row[0] for row in self.conn.execute(
+            'SELECT id FROM runs WHERE base_url = (SELECT base_url FROM runs WHERE id = ?) AND id < ? '
+            'ORDER BY id DESC LIMIT ?', (run_id, run_id, window))]
+        if not previous:
+            return {}
+        series = {}
+        placeholders = ','.join('?' * len(previous))
+        for path, name, value in self.conn.execute(
+                f'SELECT path, name, value FROM metrics WHERE run_id IN ({placeholders})', previous):
+            series.setdefault((path, name), []).append(value)
+        return {key: statistics.median(values) for key, values in series.items()}
+
+    def compare(self, run_id: int, baseline: str = 'median', window: int = 5) -> List[Dict]:
+        """Regressions of run_id against a baseline run id or the rolling median"""
+        current = self.run_metrics(run_id)
+        reference = self.rolling_median(run_id, window) if baseline == 'median' else self.run_metrics(int(baseline))
+
+        regressions = []
+        for (path, name), value in sorted(current.items()):
+            rule = REGRESSION_RULES.get(name)
+            before = reference.get((path, name))
+            if rule is None or before is None:
+                continue
+            kind, threshold, minimum = rule
+            if abs(value - before) < minimum:
+                continue
+            if kind == 'ratio':
+                regressed = before > 0 and (value - before) / before > threshold
+            elif kind == 'delta':
+                regressed = value - before > threshold
+            elif kind == 'drop_ratio':
+                regressed = before > 0 and (before - value) / before > threshold
+            else:
+                regressed = before - value > threshold
+            if regressed:
+                regressions.append({'path': path or '(site)', 'metric': name, 'baseline': before, 'value': value})
+        return regressions
+
+# ==================== CHECK REGISTRY ====================
+
+class Check:
+    """A registered check: what it needs resolved first, and whether it runs per page or once per site.
+
+    Per-page checks are called as run(suite, path, deps) and site checks as
+    run(suite, paths, deps), deps mapping each needed dependency to its value.
+    enabled(suite) decides from the suite's options whether the check runs.
+    """
+
+    def __init__(self, name: str, run, needs: Tuple[str, ...] = (), per_page: bool = False, enabled=None):
+        self.name = name
+        self.run = run
+        self.needs = tuple(needs)
+        self.per_page = per_page
+        self.enabled = enabled or (lambda suite: True)
+
+# name -> Check, in registration order (the order results are reported in)
+CHECKS: Dict[str, Check] = {}
+
+# name -> (provide(suite, path), per_page) for the values checks can declare they need
+DEPENDENCIES: Dict[str, Tuple[object, bool]] = {}
+
+# Site-wide values the scheduler itself provides: every page audited, and every page's index
+SCHEDULER_DEPENDENCIES = ('audits', 'indexes')
+
+# Entry point group third-party packages advertise their check modules under
+CHECK_ENTRY_POINT_GROUP = 'seo_suite.checks'
+
+def register_check(name: str, needs: Tuple[str, ...] = (), per_page: bool = False, enabled=None):
+    """Decorator adding a check function to CHECKS.
+
+    Raises ValueError when needs names a dependency that isn't registered (register
+    dependencies first), or when a per-page check needs one of SCHEDULER_DEPENDENCIES.
+    """
+    for dependency in needs:
+        if per_page and dependency in SCHEDULER_DEPENDENCIES:
+            raise ValueError(f"Check '{name}' runs per page, it can't need the site-wide '{dependency}'")
+        if dependency not in DEPENDENCIES and dependency not in SCHEDULER_DEPENDENCIES:
+            raise ValueError(f"Check '{name}' needs unknown dependency '{dependency}' "
+                             f"(known: {', '.join(list(DEPENDENCIES) + list(SCHEDULER_DEPENDENCIES))})")
+
+    def decorator(run):
+        CHECKS[name] = Check(name, run, needs, per_page, enabled)
+        return run
+    return decorator
+
+def register_dependency(name: str, per_page: bool = False):
+    """Decorator adding a dependency provider, called as provide(suite, path) (path is None site-wide)"""
+    def decorator(provide):
+        DEPENDENCIES[name] = (provide, per_page)
+        return provide
+    return decorator
+
+def load_plugin_checks(report: Optional[Callable[[str], None]] = None) -> List[str]:
+    """Load the check modules installed packages advertise under CHECK_ENTRY_POINT_GROUP.
+
+    An entry point names either a module, whose checks register themselves
+    with register_check on import, or a function called with register_check.
+    Plugins that fail to load are skipped and passed to report (default: printed).
+    """
+    # Run as a script this module is __main__: a plugin importing it by name must get this
+    # copy, or it would register into a second one whose CHECKS nothing reads
+    if __name__ in ('__main__', '__mp_main__'):
+        sys.modules.setdefault(os.path.splitext(os.path.basename(__file__))[0], sys.modules[__name__])
+    try:
+        entry_points = importlib.metadata.entry_points(group=CHECK_ENTRY_POINT_GROUP)
+    except TypeError:  # Python < 3.10 returns a dict of groups
+        entry_points = importlib.metadata.entry_points().get(CHECK_ENTRY_POINT_GROUP, [])
+    loaded = []
+    for entry_point in entry_points:
+        try:
+            target = entry_point.load()
+            if callable(target):
+                target(register_check)
+        except Exception as e:  # a broken plugin must not stop the built-in checks
+            message = f"Skipping check plugin {entry_point.name}: {e}"
+            if report is not None:
+                report(message)
+            else:
+                print(f"{Colors.YELLOW}{message}{Colors.END}")
+            continue
+        loaded.append(entry_point.name)
+    return loaded
+
+class CheckScheduler:
+    """Runs the enabled checks as soon as their dependencies are resolved.
+
+    Every dependency is resolved once, as a shared future, so robots.txt,
+    the sitemap and the page fetches all start in parallel, and each check
+    starts when what it declared it needs is ready. Terminal output of each
+    task is buffered and flushed in registration order so concurrent checks
+    don't interleave their lines.
+
+    At most `window` pages (default: twice the workers) are fetched ahead of
+    their audits, and each page's body is released once audited, so memory
+    stays bounded however many pages a crawl has.
+    """
+
+    def __init__(self, suite, max_workers: int = 8, window: Optional[int] = None):
+        self.suite = suite
+        self.max_workers = max_workers
+        self.window = window or max_workers * 2
+        self.paths = []
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = []
+
+    def resolve(self, name: str, path: Optional[str] = None) -> Future:
+        """Shared future of a dependency's value, started on first request"""
+        key = (name, path)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+        if name == 'indexes':
+            # Waiting for the audits keeps pages from being fetched ahead of the window. The page
+            # futures are chained rather than waited on: a pool task blocking on tasks queued
+            # behind it would deadlock a one-worker pool
+            future = Future()
+
+            def collect(audits: Future):
+                if audits.exception() is not None:
+                    future.set_exception(audits.exception())
+                    return
+                pages = self.after([self.resolve('page', p) for p in self.paths],
+                                   lambda *pages: dict(zip(self.paths, pages)))
+                self.relay(pages, future)
+
+            self.resolve('audits').add_done_callback(collect)
+        elif name == 'audits':
+            future = self._futures[('audits', None)]
+        else:
+            provide, per_page = DEPENDENCIES[name]
+            future = self._executor.submit(provide, self.suite, path if per_page else None)
+        with self._lock:
+            return self._futures.setdefault(key, future)
+
+    def after(self, futures: List[Future], fn) -> Future:
+        """Future of fn(*results), submitted once all futures are done"""
+        result = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def launch():
+            failed = [f for f in futures if f.exception() is not None]
+            if failed:
+                result.set_exception(failed[0].exception())
+                return
+            self.relay(self._executor.submit(fn, *[f.result() for f in futures]), result)
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                launch()
+
+        if not futures:
+            launch()
+        for future in futures:
+            future.add_done_callback(done)
+        return result
+
+    @staticmethod
+    def relay(source: Future, target: Future):
+        """Settle target with source's result or exception once source is done"""
+        source.add_done_callback(lambda f: target.set_exception(f.exception()) if f.exception() is not None
+                                 else target.set_result(f.result()))
+
+    def reserve(self) -> Dict:
+        """Output slot for a task scheduled later, flushed in the order it was reserved"""
+        slot = {'events': [], 'future': None}
+        with self._lock:
+            self._slots.append(slot)
+        return slot
+
+    def task(self, needs: List[Tuple[str, Optional[str]]], fn, verbose: Optional[bool] = None,
+             slot: Optional[Dict] = None) -> Future:
+        """Schedule fn(deps) after its dependencies, with its terminal output buffered in order"""
+        slot = slot or self.reserve()
+        names = [name for name, _ in needs]
+
+        def run(*values):
+            scope = self.suite._scope
+            scope.buffer, scope.verbose = slot['events'], verbose
+            try:
+                return fn(dict(zip(names, values)))
+            finally:
+                scope.buffer = scope.verbose = scope.section = scope.path = None
+
+        slot['future'] = self.after([self.resolve(name, path) for name, path in needs], run)
+        slot['future'].add_done_callback(lambda _: self._flush())
+        return slot['future']
+
+    def _flush(self):
+        """Write the buffered output of finished tasks, stopping at the first unfinished one"""
+        with self._lock:
+            while self._slots and self._slots[0]['future'] is not None and self._slots[0]['future'].done():
+                for event in self._slots.pop(0)['events']:
+                    self.suite.terminal.emit(event)
+
+    def run(self, crawl: bool = False):
+        """Audit the homepage, or every sitemap page when crawling, then run the enabled site checks"""
+        suite = self.suite
+        checks = suite.active_checks()
+        page_checks = [check for check in checks if check.per_page]
+        site_checks = [check for check in checks if not check.per_page]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            if suite.offline:
+                self.paths = sorted(suite.documents.routes) or ["/"]
+                self._futures[('audits', None)] = self.task([], lambda deps: suite.audit_build(self.max_workers))
+            else:
+                # robots.txt and the sitemap start together; crawling needs the sitemap before any page
+                self.resolve('robots')
+                self.resolve('sitemap')
+                self.paths = ["/"]
+                if crawl:
+                    self.paths = suite.fetch_sitemap_paths(self.resolve('sitemap').result()) or ["/"]
+                    suite.print_header("SITE CRAWL")
+                    suite.note(f"Auditing {len(self.paths)} page(s) with {self.max_workers} worker(s)\n")
+                # Incremental runs decide per page whether to fetch at all, so nothing is prefetched
+                needs = [] if suite.incremental else sorted({name for check in page_checks for name in check.needs})
+                self._futures[('audits', None)] = self.audit_all(needs, crawl)
+            site_tasks = [self.task([(name, None) for name in check.needs],
+                                    lambda deps, check=check: suite.run_check(check, self.paths, deps))
+                          for check in site_checks]
+            errors = [f.exception() for f in [self._futures[('audits', None)]] + site_tasks
+                      if f.exception() is not None]
+        self._flush()
+        if errors:
+            raise errors[0]
+        return self.paths
+
+    def audit_all(self, needs: List[str], crawl: bool) -> Future:
+        """Future of every page's audit, keeping at most `window` of them in flight"""
+        done = Future()
+        slots = [self.reserve() for _ in self.paths]
+        queue = list(zip(self.paths, slots))[::-1]
+        remaining = [len(queue)]
+        errors = []
+        lock = threading.Lock()
+
+        def finished(future: Future):
+            with lock:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if not last:
+                start_next()
+            elif errors:
+                done.set_exception(errors[0])
+            else:
+                done.set_result(None)
+
+        def start_next():
+            with lock:
+                if not queue:
+                    return
+                path, slot = queue.pop()
+            future = self.task([(name, path) for name in needs], lambda deps: self.audit(path, deps, crawl),
+                               verbose=False if crawl else None, slot=slot)
+            future.add_done_callback(lambda f: self.forget(path, needs))
+            future.add_done_callback(finished)
+
+        if not queue:
+            done.set_result(None)
+        for _ in range(min(self.window, len(queue))):
+            start_next()
+        return done
+
+    def forget(self, path: str, needs: List[str]):
+        """Drop an audited page's dependency futures; the document store still answers later requests"""
+        with self._lock:
+            for name in needs:
+                self._futures.pop((name, path), None)
+
+    def audit(self, path: str, deps: Dict, crawl: bool):
+        """All per-page checks of one page, with its total when crawling, then free its body and tree"""
+        self.suite.audit_page(path, deps)
+        if crawl:
+            self.suite.finish_page(path)
+        self.suite.documents.release(urljoin(self.suite.base_url, path))
+
+def _audit_build_chunk(base_url: str, build_dir: str, parser: str, build_routes: Dict[str, str],
+                       routes: List[str], critical_path: bool = False, duplicates: bool = False,
+                       keywords: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+    """Worker process entry point: audit some build routes and return their page scores and fingerprints.
+
+    build_routes is the parent's route -> file map, so workers don't walk the build tree again.
+    """
+    suite = SEOTestSuite(base_url, cache_dir=None, parser=parser, build_dir=build_dir, build_routes=build_routes)
+    suite.verbose = False
+    suite.check_critical_path = critical_path
+    suite.check_duplicates = duplicates
+    if keywords is not None:
+        suite.set_keywords(keywords)
+    for route in routes:
+        suite.audit_page(route)
+        suite.documents.release(urljoin(suite.base_url, route))
+    return suite.results.get('pages', {}), suite.fingerprints
+
 class SEOTestSuite:
-    def __init__(self, base_url: str, pagespeed_api_key: str = None):
+    def __init__(self, base_url: str, pagespeed_api_key: str = None,
+                 cache_dir: Optional[str] = '.seo_cache', parser: Optional[str] = None,
+                 build_dir: Optional[str] = None, samples: int = 1, timing_percentile: str = 'p95',
+                 results_db: Optional[str] = None, transport: Optional[BaseAdapter] = None,
+                 build_routes: Optional[Dict[str, str]] = None):
         self.base_url = base_url.rstrip('/')
         self.pagespeed_api_key = pagespeed_api_key
         self.results = {
@@ -43,67 +2927,228 @@ class SEOTestSuite:
         self.session.headers.update({
             'User-Agent': 'SEO-Testing-Bot/2025 (theo-multimedia.com quality assurance)'
         })
+        self.build_dir = build_dir
+        self.offline = build_dir is not None
+        self.samples = max(1, samples)
+        self.timing_percentile = timing_percentile
+        if self.offline:
+            self.documents = BuildDirectoryStore(build_dir, parser=parser, routes=build_routes)
+        else:
+            self.documents = DocumentStore(self.session, cache_dir=cache_dir, parser=parser)
+        self.cache_dir = cache_dir
+        self.results_db = results_db
+        self.run_id = None
+        self.parser_engine = self.documents.parser
+        self.verbose = True
+        self.show_pages = True
+        self.terminal = TerminalSink()
+        self.events = EventSink()
+        self._scope = threading.local()
+        self._results_lock = threading.Lock()
+        self._score_totals = {}
+        self.resource_cache = {}
+        self.schema_validator = SchemaValidator()
+        self.sitemap_lastmod = {}
+        self.incremental = False
+        self.incremental_state = {}
+        self.weight_budget_kb = 1600
+        self.asset_workers = 16
+        self.link_ttl = 3600
+        self.check_critical_path = False
+        self.head_only = False
+        self.check_assets = False
+        self.check_compression = False
+        self.check_cache = False
+        self.check_links = False
+        self.check_duplicates = False
+        self.check_keywords = False
+        self.duplicate_threshold = DUPLICATE_THRESHOLD
+        self.fingerprints = {}  # path -> page_fingerprint(), taken before the page's index is compacted
+        self.keywords = DEFAULT_KEYWORDS
+        self.keyword_scanner = KeywordScanner(self.keywords)
+        self.user_agents = None
+        self.image_dir = None
+        self.max_workers = 8
+        self.project_dir = os.path.dirname(os.path.abspath(__file__))
+        self.critical_budget_kb = 150
+        self.link_per_host = 4
+        self.check_times = {}
+        self.only_checks = None  # names of the checks to run, when narrower than the enabled ones
+        # Every request of the run goes through one transport adapter (see make_transport)
+        self.transport = transport or HttpTransport(pool_per_host=self.asset_workers)
+        self.session.mount('http://', self.transport)
+        self.session.mount('https://', self.transport)
+
+    def is_verbose(self) -> bool:
+        """Whether per-check output is shown, as overridden for the current scheduler task"""
+        verbose = getattr(self._scope, 'verbose', None)
+        return self.verbose if verbose is None else verbose
+
+    def render(self, event: ResultEvent):
+        """Terminal output of an event, held back while a scheduler task buffers its output"""
+        buffer = getattr(self._scope, 'buffer', None)
+        if buffer is not None:
+            buffer.append(event)
+        else:
+            self.terminal.emit(event)
 
-    def print_header(self, text: str):
-        """Print formatted section header"""
-        print(f"\n{Colors.CYAN}{Colors.BOLD}{'=' * 80}{Colors.END}")
-        print(f"{Colors.CYAN}{Colors.BOLD}{text.center(80)}{Colors.END}")
-        print(f"{Colors.CYAN}{Colors.BOLD}{'=' * 80}{Colors.END}\n")
+    def emit(self, kind: str, name: str = '', render: Optional[bool] = None, **fields):
+        """Send a result event to the event sink, and to the terminal when render (default: verbose)"""
+        fields.setdefault('section', getattr(self._scope, 'section', None))
+        fields.setdefault('path', getattr(self._scope, 'path', None))
+        fields.setdefault('category', getattr(self._scope, 'check', None))
+        event = ResultEvent(kind, name, **fields)
+        self.events.emit(event)
+        if self.is_verbose() if render is None else render:
+            self.render(event)
+
+    def note(self, text: str):
+        """Informational terminal line (tables, counts) that isn't a result event"""
+        if self.is_verbose():
+            self.render(ResultEvent('message', text))
+
+    def error(self, text: str):
+        """Report a failure outside any check result (a fetch, a plugin), as an event"""
+        self.emit('error', text)
+
+    def print_header(self, text: str, path: Optional[str] = None):
+        """Start a section of checks, on a page when path is given"""
+        self._scope.section = text
+        self._scope.path = path
+        self.emit('header', text)
 
     def print_result(self, test_name: str, passed: bool, details: str = ""):
-        """Print test result with color coding"""
-        status = f"{Colors.GREEN}✓ PASS{Colors.END}" if passed else f"{Colors.RED}✗ FAIL{Colors.END}"
-        print(f"{status} | {test_name}")
-        if details:
-            print(f"       {Colors.YELLOW}→ {details}{Colors.END}")
-
-    def fetch_page(self, path: str = "/") -> Tuple[requests.Response, BeautifulSoup]:
-        """Fetch a page and return response + parsed HTML"""
+        """Report one check result"""
+        self.emit('check', test_name, passed=passed, details=details)
+
+    def record_score(self, category: str, path: str, passed: int, total: int, label: Optional[str] = None):
+        """Store a page's score for a category and refresh the aggregate across pages"""
+        score = (passed/total)*100 if total > 0 else 0
+        with self._results_lock:
+            page = self.results.setdefault('pages', {}).setdefault(path, {})
+            previous = page.get(category)
+            page[category] = {'passed': passed, 'total': total, 'score': score}
+            # Running totals: re-summing every page on each score is quadratic in a large crawl
+            totals = self._score_totals.setdefault(category, [0, 0])
+            if previous:
+                totals[0] -= previous['passed']
+                totals[1] -= previous['total']
+            totals[0] += passed
+            totals[1] += total
+            agg_passed, agg_total = totals
+            self.results[category] = {
+                'passed': agg_passed,
+                'total': agg_total,
+                'score': (agg_passed/agg_total)*100 if agg_total > 0 else 0
+            }
+        self.emit('score', label or category, render=self.is_verbose() and bool(label),
+                  category=category, path=path, passed=passed, total=total, score=score)
+
+    def active_checks(self) -> List[Check]:
+        """Registered checks the options enable, narrowed to only_checks when set"""
+        return [check for check in CHECKS.values() if check.enabled(self)
+                and (self.only_checks is None or check.name in self.only_checks)]
+
+    def run_check(self, check: Check, target, deps: Dict):
+        """Run a registered check on a path (or the paths) and add its wall time to check_times.
+
+        Events the check emits carry its name as their category.
+        """
+        start = time.perf_counter()
+        outer, self._scope.check = getattr(self._scope, 'check', None), check.name
+        try:
+            check.run(self, target, deps)
+        finally:
+            self._scope.check = outer
+            elapsed = time.perf_counter() - start
+            with self._results_lock:
+                self.check_times[check.name] = self.check_times.get(check.name, 0.0) + elapsed
+
+    def fetch_head(self, path: str = "/") -> Tuple[requests.Response, PageIndex]:
+        """Fetch a page up to </head> and return response + the PageIndex of its <head>"""
+        url = urljoin(self.base_url, path)
+        try:
+            return self.documents.get_head(url)
+        except Exception as e:
+            self.error(f"Error fetching {url}: {e}")
+            return None, None
+
+    def fetch_index(self, path: str = "/") -> Tuple[requests.Response, PageIndex]:
+        """Fetch a page and return response + its single-pass PageIndex"""
         url = urljoin(self.base_url, path)
         try:
-            response = self.session.get(url, timeout=10, allow_redirects=True)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return response, soup
+            return self.documents.get_index(url)
         except Exception as e:
-            print(f"{Colors.RED}Error fetching {url}: {e}{Colors.END}")
+            self.error(f"Error fetching {url}: {e}")
             return None, None
 
     # ==================== GENERAL SEO TESTS ====================
 
-    def test_general_seo(self):
+    def test_general_seo(self, path: str = "/"):
         """Test general SEO requirements (2025 standards)"""
-        self.print_header("GENERAL SEO TESTS")
+        self.print_header("GENERAL SEO TESTS", path)
 
-        response, soup = self.fetch_page("/")
-        if not soup:
+        response, page = self.fetch_index(path)
+        if not page:
             return
 
+        passed, total = self.check_head_meta(page)
+
+        # Test 8: H1 tag (exactly 1)
+        total += 1
+        h1_tags = page.headings[1]
+        if len(h1_tags) == 1:
+            passed += 1
+            self.print_result("H1 tag (exactly 1)", True, h1_tags[0].strip()[:50])
+        else:
+            self.print_result("H1 tag", False, f"Found {len(h1_tags)} (should be exactly 1)")
+
+        # Test 9: H2 tags (multiple)
+        total += 1
+        h2_tags = page.headings[2]
+        if len(h2_tags) >= 3:
+            passed += 1
+            self.print_result("H2 tags structure", True, f"{len(h2_tags)} H2 tags found")
+        else:
+            self.print_result("H2 tags", False, f"Only {len(h2_tags)} H2 tags (need 3+)")
+
+        # Test 10: Lang attribute
+        total += 1
+        if page.lang == 'fr':
+            passed += 1
+            self.print_result("HTML lang attribute", True, "fr")
+        else:
+            self.print_result("HTML lang attribute", False)
+
+        self.record_score('general_seo', path, passed, total, "General SEO")
+
+    def check_head_meta(self, page: PageIndex) -> Tuple[int, int]:
+        """General SEO tests 1-7, on <head> tags only (title, meta, canonical, OG/Twitter): (passed, total)"""
         passed = 0
         total = 0
 
         # Test 1: Title tag (optimal length 50-70 chars)
         total += 1
-        title = soup.find('title')
-        if title and 30 <= len(title.text) <= 75:
+        title = page.title
+        if title is not None and 30 <= len(title) <= 75:
             passed += 1
-            self.print_result("Title tag length optimal", True, f"{len(title.text)} chars")
+            self.print_result("Title tag length optimal", True, f"{len(title)} chars")
         else:
-            self.print_result("Title tag length", False, f"{len(title.text) if title else 0} chars (should be 30-75)")
+            self.print_result("Title tag length", False, f"{len(title) if title is not None else 0} chars (should be 30-75)")
 
         # Test 2: Meta description (optimal 120-160 chars)
         total += 1
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and 100 <= len(meta_desc.get('content', '')) <= 165:
+        meta_desc = page.meta_content('description')
+        if meta_desc is not None and 100 <= len(meta_desc) <= 165:
             passed += 1
-            self.print_result("Meta description length", True, f"{len(meta_desc['content'])} chars")
+            self.print_result("Meta description length", True, f"{len(meta_desc)} chars")
         else:
-            desc_len = len(meta_desc.get('content', '')) if meta_desc else 0
+            desc_len = len(meta_desc) if meta_desc is not None else 0
             self.print_result("Meta description", False, f"{desc_len} chars (should be 100-165)")
 
         # Test 3: Viewport meta tag
         total += 1
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        if viewport:
+        if page.has_meta('viewport'):
             passed += 1
             self.print_result("Viewport meta tag", True)
         else:
@@ -111,146 +3156,59 @@ class SEOTestSuite:
 
         # Test 4: Canonical URL
         total += 1
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        if canonical:
+        canonical = page.link_href('canonical')
+        if canonical is not None:
             passed += 1
-            self.print_result("Canonical URL", True, canonical.get('href', ''))
+            self.print_result("Canonical URL", True, canonical)
         else:
             self.print_result("Canonical URL", False)
 
         # Test 5: Robots meta tag
         total += 1
-        robots = soup.find('meta', attrs={'name': 'robots'})
-        if robots and 'noindex' not in robots.get('content', '').lower():
+        robots = page.meta_content('robots')
+        if robots is not None and 'noindex' not in robots.lower():
             passed += 1
-            self.print_result("Robots meta tag (indexable)", True, robots.get('content', ''))
+            self.print_result("Robots meta tag (indexable)", True, robots)
         else:
             self.print_result("Robots meta tag", False)
 
         # Test 6: Open Graph tags
         total += 1
-        og_title = soup.find('meta', property='og:title')
-        og_desc = soup.find('meta', property='og:description')
-        og_image = soup.find('meta', property='og:image')
-        og_url = soup.find('meta', property='og:url')
-
-        if all([og_title, og_desc, og_image, og_url]):
+        missing = [prop for prop in ('og:title', 'og:description', 'og:image', 'og:url') if not page.has_meta(prop)]
+        if not missing:
             passed += 1
             self.print_result("Open Graph tags complete", True)
         else:
-            missing = []
-            if not og_title: missing.append('og:title')
-            if not og_desc: missing.append('og:description')
-            if not og_image: missing.append('og:image')
-            if not og_url: missing.append('og:url')
             self.print_result("Open Graph tags", False, f"Missing: {', '.join(missing)}")
 
         # Test 7: Twitter Card tags
         total += 1
-        twitter_card = soup.find('meta', attrs={'name': 'twitter:card'})
-        twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
-        twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-
-        if all([twitter_card, twitter_title, twitter_image]):
+        if all(page.has_meta(name) for name in ('twitter:card', 'twitter:title', 'twitter:image')):
             passed += 1
             self.print_result("Twitter Card tags", True)
         else:
-            self.print_result("Twitter Card tags", False)
-
-        # Test 8: H1 tag (exactly 1)
-        total += 1
-        h1_tags = soup.find_all('h1')
-        if len(h1_tags) == 1:
-            passed += 1
-            self.print_result("H1 tag (exactly 1)", True, h1_tags[0].text.strip()[:50])
-        else:
-            self.print_result("H1 tag", False, f"Found {len(h1_tags)} (should be exactly 1)")
-
-        # Test 9: H2 tags (multiple)
-        total += 1
-        h2_tags = soup.find_all('h2')
-        if len(h2_tags) >= 3:
-            passed += 1
-            self.print_result("H2 tags structure", True, f"{len(h2_tags)} H2 tags found")
-        else:
-            self.print_result("H2 tags", False, f"Only {len(h2_tags)} H2 tags (need 3+)")
-
-        # Test 10: Lang attribute
-        total += 1
-        html_tag = soup.find('html')
-        if html_tag and html_tag.get('lang') == 'fr':
-            passed += 1
-            self.print_result("HTML lang attribute", True, "fr")
-        else:
-            self.print_result("HTML lang attribute", False)
+            self.print_result("Twitter Card tags", False)
 
-        self.results['general_seo'] = {'passed': passed, 'total': total, 'score': (passed/total)*100}
-        print(f"\n{Colors.BOLD}General SEO Score: {passed}/{total} ({self.results['general_seo']['score']:.1f}%){Colors.END}")
+        return passed, total
 
     # ==================== LOCAL SEO TESTS ====================
 
-    def test_local_seo(self):
+    def test_local_seo(self, path: str = "/"):
         """Test Local SEO for Angoulême (2025 standards)"""
-        self.print_header("LOCAL SEO TESTS - ANGOULÊME")
+        self.print_header("LOCAL SEO TESTS - ANGOULÊME", path)
 
-        response, soup = self.fetch_page("/")
-        if not soup:
+        response, page = self.fetch_index(path)
+        if not page:
             return
 
-        passed = 0
-        total = 0
-
-        # Test 1: Geo meta tags
-        total += 1
-        geo_region = soup.find('meta', attrs={'name': 'geo.region'})
-        geo_placename = soup.find('meta', attrs={'name': 'geo.placename'})
-        geo_position = soup.find('meta', attrs={'name': 'geo.position'})
-        icbm = soup.find('meta', attrs={'name': 'ICBM'})
-
-        if all([geo_region, geo_placename, geo_position, icbm]):
-            passed += 1
-            self.print_result("Geo meta tags complete", True, f"Region: {geo_region.get('content', '')}")
-        else:
-            missing = []
-            if not geo_region: missing.append('geo.region')
-            if not geo_placename: missing.append('geo.placename')
-            if not geo_position: missing.append('geo.position')
-            if not icbm: missing.append('ICBM')
-            self.print_result("Geo meta tags", False, f"Missing: {', '.join(missing)}")
-
-        # Test 2: GPS coordinates validation
-        total += 1
-        if geo_position:
-            coords = geo_position.get('content', '')
-            # Angoulême coordinates: 45.6484, 0.1560
-            if '45.6484' in coords and '0.1560' in coords:
-                passed += 1
-                self.print_result("GPS coordinates Angoulême", True, coords)
-            else:
-                self.print_result("GPS coordinates", False, f"Got: {coords}")
-        else:
-            self.print_result("GPS coordinates", False, "No geo.position tag")
+        passed, total = self.check_geo_tags(page)
 
         # Test 3: LocalBusiness Schema in JSON-LD
         total += 1
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        has_local_business = False
-        local_business_data = None
-
-        for script in json_ld_scripts:
-            try:
-                data = json.loads(script.string)
-                # Check if it's a single schema or @graph
-                schemas = data.get('@graph', [data])
-                for schema in schemas:
-                    if schema.get('@type') == 'LocalBusiness':
-                        has_local_business = True
-                        local_business_data = schema
-                        break
-            except:
-                continue
+        # Subtypes such as ProfessionalService count as a LocalBusiness
+        local_business_data = self.schema_validator.find(page.json_ld, 'LocalBusiness')
 
-        if has_local_business:
+        if local_business_data:
             passed += 1
             self.print_result("LocalBusiness Schema", True, "Found in JSON-LD")
         else:
@@ -264,7 +3222,7 @@ class SEOTestSuite:
                 passed += 1
                 self.print_result("LocalBusiness GPS in schema", True)
             else:
-                self.print_result("LocalBusiness GPS", False, f"Coords mismatch")
+                self.print_result("LocalBusiness GPS", False, "Coords mismatch")
         else:
             self.print_result("LocalBusiness GPS", False, "No geo in schema")
 
@@ -327,162 +3285,1155 @@ class SEOTestSuite:
         else:
             self.print_result("Services/offers", False)
 
-        # Test 10: Local keywords in content
-        total += 1
-        page_text = soup.get_text().lower()
-        local_keywords = ['angoulême', 'charente', 'nouvelle-aquitaine']
-        found_keywords = [kw for kw in local_keywords if kw in page_text]
+        # Test 10: Local keywords in content, weighted by where they appear
+        total += 1
+        coverage = self.keyword_scanner.coverage(page)
+        with self._results_lock:
+            self.results.setdefault('pages', {}).setdefault(path, {})['keywords'] = coverage
+        local = sorted((entity for entity, entry in coverage.items() if entry['kind'] in LOCAL_KINDS),
+                       key=lambda entity: coverage[entity]['weight'], reverse=True)
+        found_keywords = ', '.join(f"{entity} ({coverage[entity]['weight']})" for entity in local[:5])
+
+        if len(local) >= 2:
+            passed += 1
+            self.print_result("Local keywords present", True, found_keywords)
+        else:
+            self.print_result("Local keywords", False, f"Only found: {found_keywords}")
+
+        self.record_score('local_seo', path, passed, total, "Local SEO")
+
+    def check_geo_tags(self, page: PageIndex) -> Tuple[int, int]:
+        """Local SEO tests 1-2, on the geo meta tags of <head>: (passed, total)"""
+        passed = 0
+        total = 0
+
+        # Test 1: Geo meta tags
+        total += 1
+        missing = [name for name in ('geo.region', 'geo.placename', 'geo.position', 'ICBM') if not page.has_meta(name)]
+        if not missing:
+            passed += 1
+            self.print_result("Geo meta tags complete", True, f"Region: {page.meta_content('geo.region')}")
+        else:
+            self.print_result("Geo meta tags", False, f"Missing: {', '.join(missing)}")
+
+        # Test 2: GPS coordinates validation
+        total += 1
+        if page.has_meta('geo.position'):
+            coords = page.meta_content('geo.position')
+            # Angoulême coordinates: 45.6484, 0.1560
+            if '45.6484' in coords and '0.1560' in coords:
+                passed += 1
+                self.print_result("GPS coordinates Angoulême", True, coords)
+            else:
+                self.print_result("GPS coordinates", False, f"Got: {coords}")
+        else:
+            self.print_result("GPS coordinates", False, "No geo.position tag")
+
+        return passed, total
+
+    # ==================== HEAD TAGS ====================
+
+    def test_head_tags(self, path: str = "/"):
+        """Test the <head> tags alone (title, meta, canonical, OG/Twitter, geo), reading each page only up to </head>"""
+        self.print_header("HEAD TAGS", path)
+
+        response, page = self.fetch_head(path)
+        if not page:
+            return
+
+        passed, total = self.check_head_meta(page)
+        geo_passed, geo_total = self.check_geo_tags(page)
+        self.record_score('head_tags', path, passed + geo_passed, total + geo_total, "Head Tags")
+
+    # ==================== SCHEMA VALIDATION ====================
+
+    def test_schema_validation(self, path: str = "/"):
+        """Validate all JSON-LD schemas"""
+        self.print_header("SCHEMA.ORG VALIDATION", path)
+
+        response, page = self.fetch_index(path)
+        if not page:
+            return
+
+        passed = 0
+        total = 0
+
+        json_ld_scripts = page.json_ld
+
+        total += 1
+        if len(json_ld_scripts) > 0:
+            passed += 1
+            self.print_result("JSON-LD scripts present", True, f"{len(json_ld_scripts)} schema(s)")
+        else:
+            self.print_result("JSON-LD scripts", False)
+            return
+
+        report = self.schema_validator.validate_page(json_ld_scripts)
+        for idx, blob in enumerate(report['blobs'], 1):
+            if blob['error']:
+                total += 1
+                self.print_result(f"Schema #{idx} JSON parse", False, blob['error'])
+                continue
+
+            # Test schema structure
+            data = blob['data']
+            total += 1
+            if isinstance(data, dict) and ('@context' in data and '@type' in data or '@graph' in data):
+                passed += 1
+                schema_type = data.get('@type', 'Graph')
+                self.print_result(f"Schema #{idx} structure valid", True, str(schema_type))
+            else:
+                self.print_result(f"Schema #{idx} structure", False)
+
+            # Test required properties and value types of every typed node, nested ones included
+            for entry in blob['nodes']:
+                if not any(self.schema_validator.has_rules(t) for t in entry['types']):
+                    continue
+                total += 1
+                label = '/'.join(entry['types'])
+                if not entry['errors']:
+                    passed += 1
+                    details = f"Missing recommended: {', '.join(entry['warnings'])}" if entry['warnings'] else ""
+                    self.print_result(f"{label} required props", True, details)
+                else:
+                    self.print_result(f"{label} props", False, '; '.join(entry['errors']))
+
+        # Test that @id references point at nodes defined on the page
+        if report['ids'] or any(blob['refs'] for blob in report['blobs']):
+            total += 1
+            if not report['unresolved']:
+                passed += 1
+                self.print_result("@id references resolve", True, f"{len(report['ids'])} node(s) with @id")
+            else:
+                self.print_result("@id references", False, f"Unresolved: {', '.join(report['unresolved'])}")
+
+        self.record_score('schema_validation', path, passed, total, "Schema Validation")
+
+    # ==================== PERFORMANCE TESTS ====================
+
+    def test_performance(self, path: str = "/"):
+        """Test performance metrics"""
+        self.print_header("PERFORMANCE TESTS", path)
+
+        passed = 0
+        total = 0
+
+        response, page = self.fetch_index(path)
+
+        # Network-only tests (response time, compression, caching) don't apply to build output on disk
+        if not self.offline:
+            # Test 1: Response time at the chosen percentile over fresh-connection samples
+            total += 1
+            timings = self.measure_timings(path)
+            label = self.timing_percentile
+            if timings:
+                response_time = timings['total'][label]
+                phases = ' · '.join(f"{phase} {timings[phase][label] * 1000:.0f}ms"
+                                    for phase in TIMING_PHASES if phase != 'total')
+                if response_time < 2.0:
+                    passed += 1
+                    self.print_result(f"Response time {label} < 2s", True, f"{response_time:.2f}s ({phases})")
+                else:
+                    self.print_result(f"Response time {label}", False, f"{response_time:.2f}s (should be < 2s; {phases})")
+            else:
+                self.print_result("Response time", False, "Timing probe failed")
+
+        if not response:
+            return
+
+        if not self.offline:
+            # Test 2: HTTP compression (gzip, Brotli or zstd)
+            total += 1
+            encoding = response.headers.get('Content-Encoding', '').strip().lower()
+            if encoding in ('gzip', 'br', 'zstd', 'deflate'):
+                passed += 1
+                self.print_result("HTTP compression enabled", True, encoding)
+            else:
+                self.print_result("HTTP compression", False)
+
+            # Test 3: Cache-Control headers allow (re)validated caching
+            total += 1
+            cache_control = response.headers.get('Cache-Control', '')
+            directives = parse_cache_control(cache_control)
+            if 'no-store' not in directives and 'private' not in directives and \
+                    (cache_lifetime(directives) is not None or 'no-cache' in directives):
+                passed += 1
+                self.print_result("Cache-Control header", True, cache_control[:50])
+            else:
+                self.print_result("Cache-Control header", False)
+
+        # Test 4: Content size
+        total += 1
+        url = urljoin(self.base_url, path)
+        content_size = self.documents.body_size(url) / 1024  # KB
+        if url in self.documents.truncated:
+            self.print_result("Page size", False, f"over {content_size:.0f}KB, only that much was read (should be < 500KB)")
+        elif content_size < 500:
+            passed += 1
+            self.print_result("Page size < 500KB", True, f"{content_size:.1f}KB")
+        else:
+            self.print_result("Page size", False, f"{content_size:.1f}KB (should be < 500KB)")
+
+        # Test 5: Images have width/height
+        total += 1
+        images = page.images
+        images_with_dimensions = sum(1 for img in images if img.get('width') and img.get('height'))
+        if len(images) > 0:
+            ratio = images_with_dimensions / len(images)
+            if ratio >= 0.8:
+                passed += 1
+                self.print_result("Images have dimensions", True, f"{images_with_dimensions}/{len(images)}")
+            else:
+                self.print_result("Images dimensions", False, f"Only {images_with_dimensions}/{len(images)}")
+        else:
+            passed += 1
+            self.print_result("No images to check", True)
+
+        self.record_score('performance', path, passed, total, "Performance")
+
+    def timed_fetch(self, url: str, headers: Dict[str, str], keep_index: bool = False) -> Dict:
+        """timed_get on a fresh socket, or through the transport when it opens none (the mock)"""
+        if not isinstance(self.transport, MockTransport):
+            return timed_get(url, headers, self.parser_engine, self.documents.timeout, keep_index)
+        response = self.session.get(url, headers=headers, timeout=self.documents.timeout, stream=True)
+        body = b''.join(response.raw.stream(64 * 1024, decode_content=False))
+        parse_start = time.perf_counter()
+        index = parse_index(decode_body(body, response.headers.get('Content-Encoding', '')), self.parser_engine,
+                            content_type=response.headers.get('Content-Type', ''))
+        elapsed = response.elapsed.total_seconds()
+        timings = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'ttfb': elapsed, 'download': 0.0,
+                   'parse': time.perf_counter() - parse_start, 'total': elapsed,
+                   'status': response.status_code, 'bytes': len(body), 'redirects': len(response.history),
+                   'url': response.url}
+        if keep_index:
+            timings['index'] = index
+        return timings
+
+    def measure_timings(self, path: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Sample a page self.samples times and store per-phase percentiles"""
+        url = urljoin(self.base_url, path)
+        samples = []
+        for _ in range(self.samples):
+            try:
+                sample = self.timed_fetch(url, dict(self.session.headers))
+            except (OSError, http.client.HTTPException) as e:
+                self.error(f"Error timing {url}: {e}")
+                continue
+            if not 200 <= sample['status'] < 300:
+                # An error page's timing isn't the page's
+                self.error(f"Error timing {url}: HTTP {sample['status']}")
+                continue
+            samples.append(sample)
+        if not samples:
+            return None
+        timings = summarize_timings(samples)
+        with self._results_lock:
+            self.results.setdefault('timings', {})[path] = {'samples': len(samples), **timings}
+        return timings
+
+    # ==================== CRITICAL PATH ====================
+
+    def test_critical_path(self, path: str = "/"):
+        """Static critical rendering path analysis: what must arrive before first render, and in how many round trips"""
+        self.print_header("CRITICAL RENDERING PATH", path)
+
+        response, page = self.fetch_index(path)
+        if not page:
+            return
+
+        passed = 0
+        total = 0
+        page_origin = origin(response.url)
+        blocking = {}
+        for resource in page.resources:
+            if is_render_blocking(resource):
+                blocking.setdefault(urljoin(response.url, resource['url']).split('#')[0], resource['kind'])
+        preloads = [resource for resource in page.resources
+                    if 'preload' in (resource['attrs'].get('rel') or '').lower().split()]
+        preloaded = {urljoin(response.url, resource['url']).split('#')[0] for resource in preloads}
+        preconnected = {origin(urljoin(response.url, href)) for href in page.links.get('preconnect', [])}
+
+        # Request chain: HTML (1) -> blocking CSS/JS (2) -> @imports -> fonts, preloaded fonts start at 2
+        length = response.headers.get('Content-Length', '')
+        sizes = {'html': int(length) if length.isdigit() else self.documents.body_size(urljoin(self.base_url, path))}
+        chain_depth = 2 if blocking else 1
+        fonts = {}
+        displays = []
+        for style in page.styles:
+            displays += font_displays(style)
+            for font in self.FONT_URL_RE.findall(style):
+                fonts.setdefault(urljoin(response.url, font), 2)
+        if not self.offline:
+            level, depth, seen = dict(blocking), 2, set()
+            while level:
+                self._fetch_resources({url: kind for url, kind in level.items() if url not in self.resource_cache})
+                next_level = {}
+                for url, kind in level.items():
+                    seen.add(url)
+                    info = self.resource_cache[url]
+                    sizes[kind] = sizes.get(kind, 0) + info['bytes']
+                    chain_depth = max(chain_depth, depth)
+                    displays += info.get('font_display', [])
+                    for font in info.get('fonts', []):
+                        fonts.setdefault(font, 2 if font in preloaded else depth + 1)
+                    for imported in info.get('imports', []):
+                        if imported not in seen:
+                            next_level[imported] = 'stylesheet'
+                level, depth = next_level, depth + 1
+        chain_depth = max([chain_depth] + list(fonts.values()))
+
+        # Test 1: No render-blocking scripts in <head>
+        total += 1
+        blocking_scripts = [url for url, kind in blocking.items() if kind == 'script']
+        if not blocking_scripts:
+            passed += 1
+            self.print_result("No render-blocking scripts", True)
+        else:
+            self.print_result("Render-blocking scripts", False,
+                              f"{len(blocking_scripts)} without async/defer: {', '.join(blocking_scripts[:3])}")
+
+        # Test 2: Bytes needed before first render (not measurable from build output)
+        critical_bytes = sum(sizes.values())
+        if not self.offline:
+            total += 1
+            breakdown = ', '.join(f"{kind} {size / 1024:.0f}KB" for kind, size in sorted(sizes.items()))
+            if critical_bytes <= self.critical_budget_kb * 1024:
+                passed += 1
+                self.print_result(f"Critical bytes < {self.critical_budget_kb}KB", True,
+                                  f"{critical_bytes / 1024:.0f}KB ({breakdown})")
+            else:
+                self.print_result("Critical bytes", False,
+                                  f"{critical_bytes / 1024:.0f}KB ({breakdown}), budget {self.critical_budget_kb}KB")
+
+        # Test 3: Request chain depth
+        total += 1
+        if chain_depth <= 3:
+            passed += 1
+            self.print_result("Critical request chain depth <= 3", True, f"{chain_depth} round trip(s)")
+        else:
+            self.print_result("Critical request chain", False,
+                              f"{chain_depth} round trips (preload fonts, avoid CSS @import)")
+
+        # Test 4: Web fonts don't hide text while loading
+        total += 1
+        blocking_fonts = [display for display in displays if display not in NON_BLOCKING_FONT_DISPLAY]
+        if not displays:
+            passed += 1
+            self.print_result("No @font-face in critical CSS", True)
+        elif not blocking_fonts:
+            passed += 1
+            self.print_result("font-display set on web fonts", True, ', '.join(sorted(set(displays))))
+        else:
+            self.print_result("font-display", False,
+                              f"{len(blocking_fonts)}/{len(displays)} @font-face without swap/fallback/optional")
+
+        # Test 5: Resource hints: preconnect to critical third-party origins, font preloads with crossorigin
+        total += 1
+        third_party = {origin(url) for url in list(blocking) + list(fonts)} - {page_origin}
+        problems = [f"no preconnect to {host}" for host in sorted(third_party - preconnected)]
+        problems += [f"font preload without crossorigin: {resource['url']}" for resource in preloads
+                     if (resource['attrs'].get('as') or '').lower() == 'font' and 'crossorigin' not in resource['attrs']]
+        if not problems:
+            passed += 1
+            self.print_result("Resource hints", True,
+                              f"{len(preconnected)} preconnect, {len(preloads)} preload")
+        else:
+            self.print_result("Resource hints", False, '; '.join(problems[:3]))
+
+        self.record_score('critical_path', path, passed, total, "Critical Path")
+        with self._results_lock:
+            self.results['pages'][path]['critical'] = {
+                'blocking': blocking,
+                'bytes_by_kind': sizes if not self.offline else {},
+                'critical_bytes': critical_bytes if not self.offline else None,
+                'chain_depth': chain_depth,
+                'fonts': fonts,
+                'font_display': displays,
+            }
+
+    # ==================== PAGE WEIGHT & SUB-RESOURCES ====================
+
+    FONT_URL_RE = re.compile(r'url\(\s*[\'"]?([^\'")]+?\.(?:woff2?|ttf|otf|eot)(?:[?#][^\'")]*)?)[\'"]?\s*\)', re.I)
+
+    def fetch_resource_info(self, url: str, kind: str) -> Dict:
+        """Record one sub-resource's transfer size and caching headers.
+
+        HEAD is tried first; resources without a usable Content-Length, and
+        stylesheets (scanned for fonts and @imports), are downloaded with GET and their
+        bytes counted as they come off the wire.
+        """
+        info = {'url': url, 'kind': kind, 'method': 'HEAD', 'status': None, 'bytes': 0,
+                'content_type': '', 'content_encoding': '', 'cache_control': '', 'fonts': [],
+                'imports': [], 'font_display': []}
+        timeout = self.documents.timeout
+        try:
+            response = None
+            if kind != 'stylesheet':
+                response = self.session.head(url, timeout=timeout, allow_redirects=True)
+                length = response.headers.get('Content-Length')
+                if response.status_code < 400 and length and length.isdigit():
+                    info['bytes'] = int(length)
+                else:
+                    response = None
+            if response is None:
+                info['method'] = 'GET'
+                response = self.session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+                chunks = []
+                for chunk in response.raw.stream(64 * 1024, decode_content=False):
+                    info['bytes'] += len(chunk)
+                    if kind == 'stylesheet':
+                        chunks.append(chunk)
+                response.close()
+                if kind == 'stylesheet' and response.status_code == 200:
+                    css = decode_body(b''.join(chunks), response.headers.get('Content-Encoding', ''))
+                    css = css.decode('utf-8', 'replace')
+                    info['fonts'] = sorted({urljoin(response.url, font) for font in self.FONT_URL_RE.findall(css)})
+                    info['imports'] = sorted({urljoin(response.url, url) for url in CSS_IMPORT_RE.findall(css)})
+                    info['font_display'] = font_displays(css)
+            info['status'] = response.status_code
+            info['content_type'] = response.headers.get('Content-Type', '')
+            info['content_encoding'] = response.headers.get('Content-Encoding', '')
+            info['cache_control'] = response.headers.get('Cache-Control', '')
+        except requests.RequestException as e:
+            info['error'] = str(e)
+        return info
+
+    def _fetch_resources(self, pending: Dict[str, str]):
+        """Fetch resource info for {url: kind} concurrently over the pooled session"""
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=self.asset_workers) as executor:
+            futures = {executor.submit(self.fetch_resource_info, url, kind): url for url, kind in pending.items()}
+            for future in as_completed(futures):
+                self.resource_cache[futures[future]] = future.result()
+
+    def collect_resources(self, paths: List[str]) -> Dict[str, Dict[str, str]]:
+        """Map each page to its {absolute url: kind} sub-resources, fetching each URL once"""
+        page_resources = {}
+        for path in paths:
+            response, page = self.fetch_index(path)
+            if not page:
+                continue
+            refs = {}
+            for resource in page.resources:
+                url = urljoin(response.url, resource['url']).split('#')[0]
+                if urlparse(url).scheme in ('http', 'https'):
+                    refs.setdefault(url, resource['kind'])
+            page_resources[path] = refs
+
+        self._fetch_resources({url: kind for refs in page_resources.values()
+                               for url, kind in refs.items() if url not in self.resource_cache})
+
+        # Fonts are usually only referenced from stylesheets
+        fonts = {}
+        for refs in page_resources.values():
+            for url in [url for url, kind in refs.items() if kind == 'stylesheet']:
+                for font in self.resource_cache[url]['fonts']:
+                    refs.setdefault(font, 'font')
+                    if font not in self.resource_cache:
+                        fonts[font] = 'font'
+        self._fetch_resources(fonts)
+        return page_resources
+
+    def test_page_weight(self, paths: List[str]):
+        """Total transfer weight of each page with its images, scripts, stylesheets and fonts"""
+        self.print_header("PAGE WEIGHT & SUB-RESOURCES")
+
+        page_resources = self.collect_resources(paths)
+        budget = self.weight_budget_kb * 1024
+
+        for path, refs in page_resources.items():
+            response, _ = self.fetch_index(path)
+            length = response.headers.get('Content-Length', '')
+            by_kind = {'html': int(length) if length.isdigit() else self.documents.body_size(urljoin(self.base_url, path))}
+            for url, kind in refs.items():
+                by_kind[kind] = by_kind.get(kind, 0) + self.resource_cache[url]['bytes']
+            total_bytes = sum(by_kind.values())
+            within_budget = total_bytes <= budget
+
+            breakdown = ', '.join(f"{kind} {size / 1024:.0f}KB" for kind, size in sorted(by_kind.items()))
+            detail = f"{total_bytes / 1024:.0f}KB ({breakdown})"
+            if within_budget:
+                self.print_result(f"{path} weight < {self.weight_budget_kb}KB", True, detail)
+            else:
+                self.print_result(f"{path} weight", False, f"{detail}, budget {self.weight_budget_kb}KB")
+            self.record_score('page_weight', path, int(within_budget), 1)
+            with self._results_lock:
+                self.results['pages'][path]['weight'] = {'total_bytes': total_bytes, 'by_kind': by_kind,
+                                                         'budget_bytes': budget}
+
+        resources = sorted(self.resource_cache.values(), key=lambda info: info['bytes'], reverse=True)
+        broken = [info for info in resources if info.get('error') or (info['status'] or 0) >= 400]
+        if resources:
+            self.note(f"\n{Colors.BOLD}Largest sub-resources:{Colors.END}")
+            for info in resources[:10]:
+                encoding = info['content_encoding'] or 'identity'
+                cache_control = info['cache_control'] or 'no Cache-Control'
+                self.note(f"  {info['bytes'] / 1024:>8.0f}KB  {info['kind']:<10} {encoding:<8} {cache_control[:30]:<30} {info['url']}")
+        if broken:
+            self.print_result("Sub-resources reachable", False, f"{len(broken)} broken: {broken[0]['url']}")
+
+        self.results['resources'] = {
+            'unique_count': len(resources),
+            'total_bytes': sum(info['bytes'] for info in resources),
+            'largest': [info['url'] for info in resources[:10]],
+            'broken': [info['url'] for info in broken],
+            'items': {info['url']: {key: value for key, value in info.items() if key != 'url'} for info in resources}
+        }
+        score = self.results.get('page_weight', {})
+        if score:
+            self.emit('score', "Page Weight", category='page_weight', passed=score['passed'],
+                      total=score['total'], score=score['score'])
+
+    # ==================== COMPRESSION ====================
+
+    def audit_compression(self, url: str) -> Dict:
+        """Negotiate one URL with each ACCEPT_ENCODINGS value and compare what's served with local compression"""
+        served = {accept: negotiate_encoding(self.session, url, accept, self.documents.timeout)
+                  for accept in ACCEPT_ENCODINGS}
+        body = served['identity'].pop('body', b'')
+        size = len(body)
+        local = compressed_sizes(body) if size >= MIN_COMPRESS_BYTES else {}
+
+        problems = []
+        for accept, result in served.items():
+            if result.get('error') or (result['status'] or 0) >= 400:
+                problems.append(f"{accept}: {result.get('error') or result['status']}")
+                continue
+            if result['encoding'] not in (accept, 'identity'):
+                problems.append(f"{result['encoding']} served for Accept-Encoding: {accept}")
+            if result['encoding'] != 'identity':
+                vary = result['vary'].lower()
+                if 'accept-encoding' not in vary and '*' not in vary:
+                    problems.append(f"{result['encoding']} response without Vary: Accept-Encoding")
+                # Well above the codec's default level means the server compresses at a low level
+                default_level = COMPRESSION_LEVELS.get(result['encoding'], (None, None))[1]
+                expected = local.get(result['encoding'], {}).get(default_level)
+                if expected and result['bytes'] > expected * 1.1 and result['bytes'] - expected > 512:
+                    problems.append(f"{result['encoding']} {result['bytes']}B vs {expected}B at level {default_level}")
+        ok = [result for result in served.values() if result['status'] == 200]
+        if size >= MIN_COMPRESS_BYTES and ok and all(result['encoding'] == 'identity' for result in ok):
+            problems.append("never compressed")
+
+        best_served = min((result['bytes'] for result in ok), default=size)
+        best_local = min((length for levels in local.values() for length in levels.values()), default=size)
+        return {
+            'identity_bytes': size,
+            'served': {accept: {key: value for key, value in result.items() if key != 'accept'}
+                       for accept, result in served.items()},
+            'local': local,
+            'best_served_bytes': best_served,
+            'best_local_bytes': best_local,
+            'saved_by_server': size - best_served,
+            'potential_saving': max(0, best_served - best_local),
+            'problems': problems,
+        }
+
+    def test_compression(self, paths: List[str]):
+        """Compression negotiation and bytes-saved report for each page and its same-origin text assets"""
+        self.print_header("COMPRESSION NEGOTIATION")
+
+        urls = {}
+        for path in paths:
+            response, page = self.fetch_index(path)
+            if not page:
+                continue
+            urls.setdefault(urljoin(self.base_url, path), 'html')
+            for resource in page.resources:
+                url = urljoin(response.url, resource['url']).split('#')[0]
+                if origin(url) != origin(response.url):
+                    continue
+                if resource['kind'] in ('script', 'stylesheet') or urlparse(url).path.lower().endswith('.svg'):
+                    urls.setdefault(url, resource['kind'])
+        self.note(f"{len(urls)} URL(s) × {len(ACCEPT_ENCODINGS)} encodings, "
+              f"local codecs: {', '.join(available_codecs())}\n")
+
+        report = {}
+        with ThreadPoolExecutor(max_workers=self.asset_workers) as executor:
+            futures = {executor.submit(self.audit_compression, url): url for url in urls}
+            for future in as_completed(futures):
+                report[futures[future]] = {'kind': urls[futures[future]], **future.result()}
+
+        passed = 0
+        for url in sorted(report):
+            entry = report[url]
+            name = urlparse(url).path or '/'
+            if not entry['problems']:
+                passed += 1
+                self.print_result(f"{name} compression", True,
+                                  f"{entry['identity_bytes'] / 1024:.0f}KB → {entry['best_served_bytes'] / 1024:.0f}KB")
+            else:
+                self.print_result(f"{name} compression", False, '; '.join(entry['problems'][:3]))
+
+        if report:
+            codecs = available_codecs()
+            self.note(f"\n{Colors.BOLD}{'URL':<40} {'identity':>9} {'served':>9} "
+                  + ' '.join(f"{codec:>7}" for codec in codecs) + f" {'saving':>9}{Colors.END}")
+            for url, entry in sorted(report.items(), key=lambda item: item[1]['potential_saving'], reverse=True)[:20]:
+                local = ' '.join(f"{min(entry['local'][codec].values()) / 1024:>6.1f}K" if codec in entry['local']
+                                 else f"{'-':>7}" for codec in codecs)
+                color = Colors.YELLOW if entry['potential_saving'] > 10 * 1024 else ''
+                self.note(f"{color}{(urlparse(url).path or '/')[:40]:<40} {entry['identity_bytes'] / 1024:>8.1f}K "
+                      f"{entry['best_served_bytes'] / 1024:>8.1f}K {local} "
+                      f"{entry['potential_saving'] / 1024:>8.1f}K{Colors.END if color else ''}")
+
+        total = len(report)
+        self.results['compression'] = {
+            'passed': passed,
+            'total': total,
+            'score': (passed/total)*100 if total > 0 else 0,
+            'bytes_saved_by_server': sum(entry['saved_by_server'] for entry in report.values()),
+            'potential_saving': sum(entry['potential_saving'] for entry in report.values()),
+            'urls': report
+        }
+        self.emit('score', "Compression", category='compression', passed=passed, total=total,
+                  score=self.results['compression']['score'])
+
+    # ==================== HTTP CACHE ====================
+
+    def audit_cache(self, url: str, kind: str, expected: Dict[str, str]) -> Dict:
+        """Check one URL's caching headers against its declared policy and time a conditional revalidation"""
+        entry = {'kind': kind, 'expected': expected, 'problems': []}
+        problems = entry['problems']
+        timeout = self.documents.timeout
+        full_times, revalidate_times = [], []
+        try:
+            for _ in range(self.samples):
+                start = time.perf_counter()
+                response = self.session.get(url, timeout=timeout)
+                full_times.append(time.perf_counter() - start)
+                conditional = {}
+                if response.headers.get('ETag'):
+                    conditional['If-None-Match'] = response.headers['ETag']
+                if response.headers.get('Last-Modified'):
+                    conditional['If-Modified-Since'] = response.headers['Last-Modified']
+                if not conditional:
+                    break
+                start = time.perf_counter()
+                revalidated = self.session.get(url, headers=conditional, timeout=timeout)
+                revalidate_times.append(time.perf_counter() - start)
+                entry['revalidation_status'] = revalidated.status_code
+        except requests.RequestException as e:
+            problems.append(str(e))
+            return entry
+
+        headers = response.headers
+        directives = parse_cache_control(headers.get('Cache-Control', ''))
+        lifetime = cache_lifetime(directives)
+        entry.update({
+            'status': response.status_code,
+            'cache_control': headers.get('Cache-Control', ''),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'lifetime': lifetime,
+            'full_time': statistics.median(full_times),
+            'revalidate_time': statistics.median(revalidate_times) if revalidate_times else None,
+        })
+        if response.status_code >= 400:
+            problems.append(f"HTTP {response.status_code}")
+            return entry
+
+        # Declared policy from _headers / netlify.toml
+        for name, value in expected.items():
+            actual = headers.get(name, '')
+            if name == 'cache-control':
+                wanted = parse_cache_control(value)
+                if any(directive not in directives or directives[directive] != argument
+                       for directive, argument in wanted.items()):
+                    problems.append(f"Cache-Control '{actual}', declared '{value}'" if actual
+                                    else f"Cache-Control missing, declared '{value}'")
+            elif name == 'vary':
+                missing = {token.strip().lower() for token in value.split(',')} - \
+                          {token.strip().lower() for token in actual.split(',')}
+                if missing:
+                    problems.append(f"Vary '{actual}', declared '{value}'")
+            elif not actual:
+                problems.append(f"{name} missing, declared '{value}'")
+
+        # Cacheability
+        if 'no-store' in directives:
+            problems.append("no-store: never cached")
+        elif kind == 'html' and 'private' in directives:
+            problems.append("private: CDN can't cache the page")
+        fingerprinted = kind != 'html' and FINGERPRINT_RE.search(urlparse(url).path)
+        if fingerprinted and (lifetime or 0) < 30 * 86400:
+            problems.append("fingerprinted asset should be max-age=31536000, immutable")
+        elif kind != 'html' and lifetime is None and not headers.get('Expires') and 'no-cache' not in directives:
+            problems.append("no freshness lifetime (max-age/Expires)")
+
+        # Revalidation: a conditional request must come back 304 without the body
+        long_lived = fingerprinted and (lifetime or 0) >= 30 * 86400
+        if revalidate_times:
+            if entry['revalidation_status'] != 304:
+                problems.append(f"conditional GET returned {entry['revalidation_status']}, not 304")
+            else:
+                entry['speedup'] = entry['full_time'] / max(entry['revalidate_time'], 1e-6)
+        elif not long_lived:
+            problems.append("no ETag/Last-Modified to revalidate with")
+        return entry
+
+    def test_http_cache(self, paths: List[str]):
+        """Verify caching headers of each page and its same-origin assets against public/_headers and netlify.toml"""
+        self.print_header("HTTP CACHE & REVALIDATION")
+
+        rules = load_header_rules(self.project_dir)
+        urls = {}
+        for path in paths:
+            response, page = self.fetch_index(path)
+            if not page:
+                continue
+            urls.setdefault(urljoin(self.base_url, path), 'html')
+            for resource in page.resources:
+                url = urljoin(response.url, resource['url']).split('#')[0]
+                if origin(url) == origin(response.url):
+                    urls.setdefault(url, resource['kind'])
+        self.note(f"{len(urls)} URL(s), {len(rules)} header rule(s) from {self.project_dir}\n")
+
+        report = {}
+        with ThreadPoolExecutor(max_workers=self.asset_workers) as executor:
+            futures = {executor.submit(self.audit_cache, url, kind,
+                                       expected_cache_headers(rules, urlparse(url).path)): url
+                       for url, kind in urls.items()}
+            for future in as_completed(futures):
+                report[futures[future]] = future.result()
+
+        passed = 0
+        for url in sorted(report):
+            entry = report[url]
+            name = urlparse(url).path or '/'
+            if not entry['problems']:
+                passed += 1
+                self.print_result(f"{name} caching", True, entry['cache_control'] or 'validators only')
+            else:
+                self.print_result(f"{name} caching", False, '; '.join(entry['problems'][:3]))
+
+        timed = [(url, entry) for url, entry in report.items() if entry.get('revalidate_time') is not None]
+        if timed:
+            self.note(f"\n{Colors.BOLD}{'URL':<44} {'full':>8} {'304':>8} {'speedup':>8}{Colors.END}")
+            for url, entry in sorted(timed, key=lambda item: item[1]['full_time'], reverse=True)[:20]:
+                speedup = f"{entry['speedup']:.1f}x" if 'speedup' in entry else f"({entry['revalidation_status']})"
+                self.note(f"{(urlparse(url).path or '/')[:44]:<44} {entry['full_time'] * 1000:>6.0f}ms "
+                      f"{entry['revalidate_time'] * 1000:>6.0f}ms {speedup:>8}")
+
+        total = len(report)
+        speedups = [entry['speedup'] for entry in report.values() if 'speedup' in entry]
+        self.results['http_cache'] = {
+            'passed': passed,
+            'total': total,
+            'score': (passed/total)*100 if total > 0 else 0,
+            'median_revalidation_speedup': statistics.median(speedups) if speedups else None,
+            'urls': report
+        }
+        self.emit('score', "HTTP Cache", category='http_cache', passed=passed, total=total,
+                  score=self.results['http_cache']['score'])
+
+    # ==================== USER AGENT DIFF ====================
+
+    def fetch_as(self, url: str, user_agent: str) -> Dict:
+        """Fetch a page as one user agent: median TTFB over the samples, bytes and SEO signature"""
+        headers = {**dict(self.session.headers), 'User-Agent': user_agent}
+        samples = []
+        try:
+            for _ in range(self.samples):
+                samples.append(self.timed_fetch(url, headers, keep_index=True))
+        except (OSError, http.client.HTTPException) as e:
+            return {'error': str(e)}
+        index = samples[-1]['index']
+        types = [t for blob in self.schema_validator.validate_page(index.json_ld)['blobs']
+                 for entry in blob['nodes'] for t in entry['types']]
+        return {
+            'status': samples[-1]['status'],
+            'bytes': samples[-1]['bytes'],
+            'ttfb': statistics.median(sample['ttfb'] for sample in samples),
+            'total': statistics.median(sample['total'] for sample in samples),
+            'signature': index_signature(index, types),
+        }
+
+    def test_user_agents(self, paths: List[str], agents: Dict[str, str]):
+        """Fetch every page as each user agent concurrently and diff what crawlers get against the baseline"""
+        self.print_header("USER AGENT DIFF")
+
+        names = list(agents)
+        baseline = names[0]
+        self.note(f"{len(paths)} page(s) × {len(names)} agent(s), baseline: {baseline}\n")
+
+        fetched = {path: {} for path in paths}
+        with ThreadPoolExecutor(max_workers=self.asset_workers) as executor:
+            futures = {executor.submit(self.fetch_as, urljoin(self.base_url, path), agents[name]): (path, name)
+                       for path in paths for name in names}
+            for future in as_completed(futures):
+                path, name = futures[future]
+                fetched[path][name] = future.result()
+
+        passed = 0
+        total = 0
+        ratios = {name: {'bytes': [], 'ttfb': [], 'ttfb_delta': []} for name in names[1:]}
+        for path in paths:
+            base = fetched[path][baseline]
+            for name in names[1:]:
+                variant = fetched[path][name]
+                total += 1
+                if base.get('error') or variant.get('error'):
+                    variant['diffs'] = [base.get('error') or variant['error']]
+                elif variant['status'] != base['status']:
+                    variant['diffs'] = [f"status {variant['status']} vs {base['status']}"]
+                else:
+                    variant['diffs'] = diff_signatures(base['signature'], variant['signature'])
+                    ratios[name]['bytes'].append(variant['bytes'] / max(base['bytes'], 1))
+                    ratios[name]['ttfb'].append(variant['ttfb'] / max(base['ttfb'], 1e-6))
+                    ratios[name]['ttfb_delta'].append(variant['ttfb'] - base['ttfb'])
+                if not variant['diffs']:
+                    passed += 1
+                    self.print_result(f"{path} as {name}", True,
+                                      f"{variant['bytes'] / 1024:.0f}KB vs {base['bytes'] / 1024:.0f}KB, "
+                                      f"TTFB {variant['ttfb'] * 1000:.0f}ms vs {base['ttfb'] * 1000:.0f}ms")
+                else:
+                    self.print_result(f"{path} as {name}", False, '; '.join(variant['diffs'][:3]))
+
+        # Crawlers should get a page no heavier, and no slower beyond 20% and 50ms of noise, than the baseline
+        summary = {}
+        for name, values in ratios.items():
+            if not values['bytes']:
+                continue
+            summary[name] = {key: statistics.median(series) for key, series in values.items()}
+            total += 1
+            detail = f"payload {summary[name]['bytes']:.2f}x, TTFB {summary[name]['ttfb']:.2f}x vs {baseline}"
+            if summary[name]['bytes'] <= 1.0 and (summary[name]['ttfb'] <= 1.2 or summary[name]['ttfb_delta'] <= 0.05):
+                passed += 1
+                self.print_result(f"{name} not heavier or slower", True, detail)
+            else:
+                self.print_result(f"{name} heavier or slower", False, detail)
+
+        for page in fetched.values():
+            for variant in page.values():
+                variant.pop('signature', None)
+        self.results['user_agents'] = {
+            'passed': passed,
+            'total': total,
+            'score': (passed/total)*100 if total > 0 else 0,
+            'baseline': baseline,
+            'agents': agents,
+            'ratios': summary,
+            'pages': fetched
+        }
+        self.emit('score', "User Agent Diff", category='user_agents', passed=passed, total=total,
+                  score=self.results['user_agents']['score'])
+
+    # ==================== LINK CHECK ====================
+
+    def collect_links(self, paths: List[str]) -> Dict[str, List[str]]:
+        """Map each page to the absolute http(s) URLs its <a href> links point at, fragments dropped"""
+        page_links = {}
+        for path in paths:
+            response, page = self.fetch_index(path)
+            if not page:
+                continue
+            links = []
+            for href in page.anchors:
+                href = href.strip()
+                if not href or href.startswith('#'):
+                    continue
+                url = urljoin(response.url, href).split('#')[0]
+                if urlparse(url).scheme in ('http', 'https') and url not in links:
+                    links.append(url)
+            page_links[path] = links
+        return page_links
+
+    def site_hosts(self, paths: List[str]) -> List[str]:
+        """base_url's host and the hosts the pages' canonical URLs name, e.g. production under --local"""
+        hosts = [urlparse(self.base_url).netloc.lower()]
+        for path in paths:
+            response, page = self.fetch_index(path)
+            canonical = page.link_href('canonical') if page else None
+            host = urlparse(urljoin(response.url, canonical)).netloc.lower() if canonical else ''
+            if host and host not in hosts:
+                hosts.append(host)
+        return hosts
+
+    def test_links(self, paths: List[str]):
+        """Check every link on the audited pages, each distinct URL once across the site"""
+        self.print_header("LINK CHECK")
+
+        page_links = self.collect_links(paths)
+        unique = sorted({url for links in page_links.values() for url in links})
+        checker = LinkChecker(self.session,
+                              cache_path=os.path.join(self.cache_dir, 'links.json') if self.cache_dir else None,
+                              ttl=self.link_ttl, per_host=self.link_per_host, max_workers=self.asset_workers,
+                              timeout=self.documents.timeout)
+        results = checker.check_all(unique)
+        checker.save()
+        self.note(f"{len(unique)} unique link(s) on {len(page_links)} page(s): "
+              f"{checker.stats['checked']} checked, {checker.stats['cached']} cached\n")
+
+        site_hosts = self.site_hosts(paths)
+        broken = [url for url in unique if results[url].get('error') or (results[url]['status'] or 0) >= 400]
+        # Internal links should point at the final URL; any link behind 2+ hops wastes crawl budget
+        redirected = [url for url in unique if len(results[url]['redirects']) > 1
+                      or (results[url]['redirects'] and urlparse(url).netloc.lower() in site_hosts)]
+        broken_set, redirected_set = set(broken), set(redirected)
+
+        for path, links in page_links.items():
+            page_broken = [url for url in links if url in broken_set]
+            page_redirected = [url for url in links if url in redirected_set]
+            passed = 0
+            if not page_broken:
+                passed += 1
+                self.print_result(f"{path} links reachable", True, f"{len(links)} link(s)")
+            else:
+                self.print_result(f"{path} links", False, f"{len(page_broken)} broken: {page_broken[0]}")
+            if not page_redirected:
+                passed += 1
+                self.print_result(f"{path} links point at final URLs", True)
+            else:
+                chain = results[page_redirected[0]]['redirects']
+                self.print_result(f"{path} redirected links", False,
+                                  f"{len(page_redirected)} redirected: {page_redirected[0]} ({len(chain)} hop(s))")
+            self.record_score('links', path, passed, 2)
+
+        if broken or redirected:
+            self.note(f"\n{Colors.BOLD}Links to fix:{Colors.END}")
+            for url in broken[:10]:
+                info = results[url]
+                reason = f" ({info['error'][:60]})" if info.get('error') else ''
+                self.note(f"  {info['status'] or 'ERR':<40} {url}{reason}")
+            for url in redirected[:10]:
+                hops = ' → '.join(str(hop['status']) for hop in results[url]['redirects'])
+                self.note(f"  {hops:<40} {url} → {results[url]['final_url']}")
 
-        if len(found_keywords) >= 2:
-            passed += 1
-            self.print_result("Local keywords present", True, ', '.join(found_keywords))
-        else:
-            self.print_result("Local keywords", False, f"Only found: {', '.join(found_keywords)}")
+        self.results.setdefault('links', {}).update({
+            'unique_count': len(unique),
+            'checked': checker.stats['checked'],
+            'cached': checker.stats['cached'],
+            'broken': broken,
+            'redirected': redirected,
+            'items': {url: {key: value for key, value in results[url].items() if key != 'url'} for url in unique}
+        })
+        score = self.results['links']
+        if page_links:
+            self.emit('score', "Link Check", category='links', passed=score['passed'],
+                      total=score['total'], score=score['score'])
 
-        self.results['local_seo'] = {'passed': passed, 'total': total, 'score': (passed/total)*100}
-        print(f"\n{Colors.BOLD}Local SEO Score: {passed}/{total} ({self.results['local_seo']['score']:.1f}%){Colors.END}")
+    # ==================== DUPLICATE CONTENT ====================
 
-    # ==================== SCHEMA VALIDATION ====================
+    def test_duplicates(self, paths: List[str]):
+        """Find pages sharing a title or meta description, or with near-identical body text"""
+        self.print_header("DUPLICATE CONTENT")
 
-    def test_schema_validation(self):
-        """Validate all JSON-LD schemas"""
-        self.print_header("SCHEMA.ORG VALIDATION")
+        start = time.perf_counter()
+        index = DuplicateIndex(threshold=self.duplicate_threshold)
+        fingerprinted = [path for path in paths if path in self.fingerprints]
+        for path in fingerprinted:
+            index.add(path, self.fingerprints[path])
+        clusters = {'title': index.exact_clusters('title'),
+                    'description': index.exact_clusters('description'),
+                    'minhash': index.near_clusters()}
+        self.note(f"{len(fingerprinted)} page(s) compared in {(time.perf_counter() - start) * 1000:.0f}ms\n")
 
-        response, soup = self.fetch_page("/")
-        if not soup:
-            return
+        labels = {'title': 'title', 'description': 'meta description', 'minhash': 'body text'}
+        duplicated = {}
+        for field, found in clusters.items():
+            found.sort(key=lambda cluster: len(cluster['paths']), reverse=True)
+            duplicated[field] = {path for cluster in found for path in cluster['paths']}
+            if not found:
+                self.print_result(f"Unique {labels[field]}s", True, f"{len(fingerprinted)} page(s)")
+            for cluster in found[:10]:
+                pages = ', '.join(cluster['paths'][:5]) + (', …' if len(cluster['paths']) > 5 else '')
+                detail = f"“{cluster['text']}”" if 'text' in cluster else f"{cluster['similarity']:.0%} similar"
+                self.print_result(f"Duplicate {labels[field]}", False,
+                                  f"{len(cluster['paths'])} pages, {detail}: {pages}")
+            if len(found) > 10:
+                self.note(f"       … and {len(found) - 10} more {labels[field]} cluster(s)")
 
-        passed = 0
-        total = 0
+        for path in fingerprinted:
+            fields = [field for field in clusters if self.fingerprints[path].get(field)]
+            if fields:
+                passed = sum(1 for field in fields if path not in duplicated[field])
+                self.record_score('duplicates', path, passed, len(fields))
 
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
+        self.results.setdefault('duplicates', {}).update({
+            'pages': len(fingerprinted),
+            'titles': clusters['title'],
+            'descriptions': clusters['description'],
+            'content': clusters['minhash']
+        })
+        score = self.results['duplicates']
+        if 'passed' in score:
+            self.emit('score', "Duplicate Content", category='duplicates', passed=score['passed'],
+                      total=score['total'], score=score['score'])
 
-        total += 1
-        if len(json_ld_scripts) > 0:
-            passed += 1
-            self.print_result("JSON-LD scripts present", True, f"{len(json_ld_scripts)} schema(s)")
-        else:
-            self.print_result("JSON-LD scripts", False)
+    # ==================== LOCAL KEYWORD MATRIX ====================
+
+    def set_keywords(self, keywords: Dict[str, Dict[str, List[str]]]):
+        """Match pages against another keyword set than DEFAULT_KEYWORDS"""
+        self.keywords = keywords
+        self.keyword_scanner = KeywordScanner(keywords)
+
+    def test_keyword_matrix(self, paths: List[str], rows: int = 20):
+        """Show which pages target which locality, from the keyword coverage of each audited page"""
+        self.print_header("LOCAL KEYWORD MATRIX")
+
+        matrix = {}  # entity -> path -> {'weight', and a match count per part it was found in}
+        with self._results_lock:
+            pages = self.results.get('pages', {})
+            for path in paths:
+                for entity, entry in pages.get(path, {}).get('keywords', {}).items():
+                    matrix.setdefault(entity, {})[path] = {key: value for key, value in entry.items() if key != 'kind'}
+        self.results['keyword_matrix'] = matrix
+
+        local = [entity for entity in matrix if self.keyword_scanner.kinds.get(entity) in LOCAL_KINDS]
+        if not local:
+            self.print_result("Pages targeting a locality", False, f"none of {len(paths)} page(s)")
             return
+        # A page targets an entity when it names it in its title or h1
+        targeting = {entity: [path for path, entry in matrix[entity].items() if 'title' in entry or 'h1' in entry]
+                     for entity in local}
+        local.sort(key=lambda entity: (len(targeting[entity]), len(matrix[entity])), reverse=True)
 
-        for idx, script in enumerate(json_ld_scripts, 1):
-            try:
-                data = json.loads(script.string)
+        self.note(f"  {'entity':<28} {'kind':<9} {'pages':>6} {'target':>7}  strongest page")
+        for entity in local[:rows]:
+            strongest = max(matrix[entity], key=lambda path: (matrix[entity][path]['weight'], path))
+            color = Colors.GREEN if targeting[entity] else Colors.YELLOW
+            self.note(f"  {color}{entity[:28]:<28}{Colors.END} {self.keyword_scanner.kinds[entity]:<9} "
+                  f"{len(matrix[entity]):>6} {len(targeting[entity]):>7}  "
+                  f"{strongest} ({matrix[entity][strongest]['weight']})")
+        if len(local) > rows:
+            self.note(f"  … and {len(local) - rows} more localities")
 
-                # Test schema structure
-                total += 1
-                if '@context' in data and '@type' in data or '@graph' in data:
-                    passed += 1
-                    schema_type = data.get('@type', 'Graph')
-                    self.print_result(f"Schema #{idx} structure valid", True, schema_type)
-                else:
-                    self.print_result(f"Schema #{idx} structure", False)
-
-                # Test for required properties
-                schemas = data.get('@graph', [data])
-                for schema in schemas:
-                    schema_type = schema.get('@type')
-
-                    if schema_type == 'LocalBusiness':
-                        total += 1
-                        required = ['name', 'address', 'geo']
-                        has_required = all(field in schema for field in required)
-                        if has_required:
-                            passed += 1
-                            self.print_result("LocalBusiness required props", True)
-                        else:
-                            missing = [f for f in required if f not in schema]
-                            self.print_result("LocalBusiness props", False, f"Missing: {missing}")
-
-                    elif schema_type == 'WebPage':
-                        total += 1
-                        required = ['name', 'description', 'url']
-                        has_required = all(field in schema for field in required)
-                        if has_required:
-                            passed += 1
-                            self.print_result("WebPage required props", True)
-                        else:
-                            self.print_result("WebPage props", False)
-
-            except json.JSONDecodeError as e:
-                total += 1
-                self.print_result(f"Schema #{idx} JSON parse", False, str(e))
+        untargeted = [path for path in paths if path in pages
+                      and not any(path in targeting[entity] for entity in local)]
+        self.print_result("Pages targeting a locality", not untargeted,
+                          f"{len(paths) - len(untargeted)}/{len(paths)} name one in their title or h1")
 
-        self.results['schema_validation'] = {'passed': passed, 'total': total, 'score': (passed/total)*100 if total > 0 else 0}
-        print(f"\n{Colors.BOLD}Schema Validation Score: {passed}/{total} ({self.results['schema_validation']['score']:.1f}%){Colors.END}")
+    # ==================== IMAGE OPTIMIZATION ====================
 
-    # ==================== PERFORMANCE TESTS ====================
+    def rendered_image_widths(self) -> Dict[str, int]:
+        """Largest rendered width of each local image across the pages parsed this run"""
+        widths = {}
+        for index in list(self.documents.indexes.values()):
+            for img in index.images:
+                src = img.get('src', '')
+                if '/_next/image' in src:
+                    src = parse_qs(urlparse(src).query).get('url', [src])[0]
+                width = str(img.get('width', ''))
+                if width.isdigit():
+                    path = urlparse(src).path
+                    widths[path] = max(widths.get(path, 0), int(width))
+        return widths
 
-    def test_performance(self):
-        """Test performance metrics"""
-        self.print_header("PERFORMANCE TESTS")
+    def test_images(self, image_dir: str = 'public', max_workers: int = 8, max_display_width: int = 1920):
+        """Audit every image of image_dir for dimensions, encoding efficiency and format.
 
-        passed = 0
-        total = 0
+        Images are inspected in a process pool; results are cached by content
+        hash in the cache directory so unchanged files are skipped next run.
+        Rendered widths come from the pages parsed this run, or fall back to
+        max_display_width. Intrinsic widths beyond 2x the rendered width
+        (retina allowance) are flagged as oversized.
+        """
+        self.print_header("IMAGE OPTIMIZATION")
 
-        # Test 1: Response time
-        total += 1
-        start = time.time()
-        response, soup = self.fetch_page("/")
-        response_time = time.time() - start
+        cache_path = os.path.join(self.cache_dir, 'images.json') if self.cache_dir else None
+        cache = {'files': {}, 'results': {}}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                pass
 
-        if response_time < 2.0:
-            passed += 1
-            self.print_result("Response time < 2s", True, f"{response_time:.2f}s")
-        else:
-            self.print_result("Response time", False, f"{response_time:.2f}s (should be < 2s)")
+        files = {}
+        for dirpath, dirnames, filenames in os.walk(image_dir):
+            for filename in filenames:
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    file_path = os.path.join(dirpath, filename)
+                    files['/' + os.path.relpath(file_path, image_dir).replace(os.sep, '/')] = file_path
 
-        if not response:
-            return
+        # Unchanged size+mtime reuses the stored hash, otherwise the content is hashed again
+        results = {}
+        pending = {}
+        for route, file_path in files.items():
+            stat = os.stat(file_path)
+            known = cache['files'].get(route)
+            if known and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime:
+                digest = known['sha256']
+            else:
+                with open(file_path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            cached = cache['results'].get(digest)
+            if cached and (cached['measured'] or PILImage is None or cached['format'] in (None, 'svg', 'ico')):
+                results[route] = cached
+            else:
+                pending[route] = file_path
+            cache['files'][route] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest}
 
-        # Test 2: Gzip compression
-        total += 1
-        if 'gzip' in response.headers.get('Content-Encoding', '').lower():
-            passed += 1
-            self.print_result("Gzip compression enabled", True)
-        else:
-            self.print_result("Gzip compression", False)
+        if pending:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(inspect_image, file_path): route for route, file_path in pending.items()}
+                for future in as_completed(futures):
+                    info = future.result()
+                    results[futures[future]] = info
+                    cache['results'][info['sha256']] = info
+        self.note(f"{len(files)} image(s): {len(pending)} inspected, {len(files) - len(pending)} unchanged (cached)\n")
 
-        # Test 3: Cache-Control headers
-        total += 1
-        cache_control = response.headers.get('Cache-Control', '')
-        if 'max-age' in cache_control or 'public' in cache_control:
-            passed += 1
-            self.print_result("Cache-Control header", True, cache_control[:50])
-        else:
-            self.print_result("Cache-Control header", False)
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            live_hashes = {entry['sha256'] for route, entry in cache['files'].items() if route in files}
+            cache['files'] = {route: entry for route, entry in cache['files'].items() if route in files}
+            cache['results'] = {digest: info for digest, info in cache['results'].items() if digest in live_hashes}
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
 
-        # Test 4: Content size
-        total += 1
-        content_size = len(response.content) / 1024  # KB
-        if content_size < 500:
-            passed += 1
-            self.print_result("Page size < 500KB", True, f"{content_size:.1f}KB")
-        else:
-            self.print_result("Page size", False, f"{content_size:.1f}KB (should be < 500KB)")
+        rendered = self.rendered_image_widths()
+        passed = 0
+        report = {}
+        for route in sorted(results):
+            info = results[route]
+            issues = []
+            display_width = rendered.get(route, max_display_width)
+            if info['width'] and info['width'] > 2 * display_width:
+                issues.append(f"{info['width']}px wide, rendered at {display_width}px")
+            if info['bytes_per_pixel'] and info['format'] in ('png', 'jpeg', 'gif') and info['bytes_per_pixel'] > 0.5:
+                issues.append(f"{info['bytes_per_pixel']:.2f} bytes/pixel")
+            modern = [size for size in (info['webp_bytes'], info['avif_bytes']) if size]
+            savings = info['bytes'] - min(modern) if modern else None
+            if savings is not None and savings > max(10 * 1024, info['bytes'] * 0.25):
+                issues.append(f"{savings / 1024:.0f}KB smaller as {'AVIF' if min(modern) == info['avif_bytes'] else 'WebP'}")
+            elif savings is None and info['format'] in ('png', 'jpeg', 'gif') and info['bytes'] > 100 * 1024:
+                issues.append(f"{info['format'].upper()} over 100KB, serve WebP/AVIF")
+            if info['format'] == 'ico' and info['bytes'] > 15 * 1024:
+                issues.append("favicon over 15KB")
 
-        # Test 5: Images have width/height
-        total += 1
-        images = soup.find_all(['img', 'Image'])
-        images_with_dimensions = sum(1 for img in images if img.get('width') and img.get('height'))
-        if len(images) > 0:
-            ratio = images_with_dimensions / len(images)
-            if ratio >= 0.8:
-                passed += 1
-                self.print_result("Images have dimensions", True, f"{images_with_dimensions}/{len(images)}")
+            dims = f"{info['width']}x{info['height']}" if info['width'] else (info['format'] or '?')
+            if issues:
+                self.print_result(f"{route}", False, f"{info['bytes'] / 1024:.0f}KB {dims}: {'; '.join(issues)}")
             else:
-                self.print_result("Images dimensions", False, f"Only {images_with_dimensions}/{len(images)}")
-        else:
-            passed += 1
-            self.print_result("No images to check", True)
+                passed += 1
+                self.print_result(f"{route}", True, f"{info['bytes'] / 1024:.0f}KB {dims}")
+            report[route] = {**info, 'rendered_width': rendered.get(route), 'potential_savings': savings, 'issues': issues}
+
+        if PILImage is None:
+            self.note(f"\n{Colors.YELLOW}Install Pillow to measure real WebP/AVIF savings{Colors.END}")
 
-        self.results['performance'] = {'passed': passed, 'total': total, 'score': (passed/total)*100}
-        print(f"\n{Colors.BOLD}Performance Score: {passed}/{total} ({self.results['performance']['score']:.1f}%){Colors.END}")
+        total = len(results)
+        self.results['images'] = {
+            'passed': passed,
+            'total': total,
+            'score': (passed/total)*100 if total > 0 else 0,
+            'files': report
+        }
+        self.emit('score', "Image Optimization", category='images', passed=passed, total=total,
+                  score=self.results['images']['score'])
 
     # ==================== SITEMAP & ROBOTS ====================
 
-    def test_sitemap_robots(self):
-        """Test sitemap and robots.txt"""
+    def fetch_site_file(self, path: str) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """GET a site-wide file such as /robots.txt: (response, None), or (None, error)"""
+        try:
+            return self.session.get(f"{self.base_url}{path}", timeout=5), None
+        except requests.RequestException as e:
+            return None, str(e)
+
+    def test_sitemap_robots(self, robots: Optional[Tuple] = None, sitemap: Optional[Tuple] = None):
+        """Test sitemap and robots.txt, from already fetched (response, error) pairs when given"""
         self.print_header("SITEMAP & ROBOTS.TXT")
 
         passed = 0
@@ -490,8 +4441,10 @@ class SEOTestSuite:
 
         # Test robots.txt
         total += 1
-        try:
-            robots_response = self.session.get(f"{self.base_url}/robots.txt", timeout=5)
+        robots_response, error = robots or self.fetch_site_file('/robots.txt')
+        if robots_response is None:
+            self.print_result("robots.txt", False, error)
+        else:
             if robots_response.status_code == 200:
                 passed += 1
                 self.print_result("robots.txt accessible", True)
@@ -515,13 +4468,13 @@ class SEOTestSuite:
                     self.print_result("AI crawlers", False)
             else:
                 self.print_result("robots.txt", False, f"Status {robots_response.status_code}")
-        except Exception as e:
-            self.print_result("robots.txt", False, str(e))
 
         # Test sitemap.xml
         total += 1
-        try:
-            sitemap_response = self.session.get(f"{self.base_url}/sitemap.xml", timeout=5)
+        sitemap_response, error = sitemap or self.fetch_site_file('/sitemap.xml')
+        if sitemap_response is None:
+            self.print_result("sitemap.xml", False, error)
+        else:
             if sitemap_response.status_code == 200:
                 passed += 1
                 self.print_result("sitemap.xml accessible", True)
@@ -536,11 +4489,359 @@ class SEOTestSuite:
                     self.print_result("Sitemap URLs", False, f"Only {url_count} URLs")
             else:
                 self.print_result("sitemap.xml", False, f"Status {sitemap_response.status_code}")
-        except Exception as e:
-            self.print_result("sitemap.xml", False, str(e))
 
         self.results['sitemap_robots'] = {'passed': passed, 'total': total, 'score': (passed/total)*100 if total > 0 else 0}
-        print(f"\n{Colors.BOLD}Sitemap/Robots Score: {passed}/{total} ({self.results['sitemap_robots']['score']:.1f}%){Colors.END}")
+        self.emit('score', "Sitemap/Robots", category='sitemap_robots', passed=passed, total=total,
+                  score=self.results['sitemap_robots']['score'])
+
+    # ==================== SITE CRAWL ====================
+
+    def fetch_sitemap_paths(self, sitemap: Optional[Tuple] = None) -> List[str]:
+        """Return the path of every <loc> listed in sitemap.xml, from an already fetched (response, error) pair when given"""
+        sitemap_response, error = sitemap or self.fetch_site_file('/sitemap.xml')
+        if sitemap_response is None:
+            self.error(f"Error fetching sitemap: {error}")
+            return []
+        if sitemap_response.status_code != 200:
+            return []
+
+        # <url> entries carry the optional <lastmod> the incremental mode compares
+        entries = re.findall(r'<url>(.*?)</url>', sitemap_response.text, re.S) or \
+            [f"<loc>{loc}</loc>" for loc in re.findall(r'<loc>(.*?)</loc>', sitemap_response.text, re.S)]
+        paths = []
+        for entry in entries:
+            loc = re.search(r'<loc>\s*(.*?)\s*</loc>', entry, re.S)
+            if not loc:
+                continue
+            # Audit the sitemap's routes against base_url so --local still crawls localhost
+            parsed = urlparse(html.unescape(loc.group(1)))
+            path = parsed.path or '/'
+            if parsed.query:
+                path += f"?{parsed.query}"
+            lastmod = re.search(r'<lastmod>\s*(.*?)\s*</lastmod>', entry, re.S)
+            if lastmod:
+                self.sitemap_lastmod[path] = lastmod.group(1)
+            if path not in paths:
+                paths.append(path)
+        return paths
+
+    def audit_page(self, path: str, deps: Optional[Dict] = None) -> Dict:
+        """Run the enabled per-page checks on one path and return its scores.
+
+        deps holds dependencies the scheduler already resolved for the page;
+        anything missing is resolved here.
+        """
+        if self.incremental and self.reuse_unchanged(path):
+            return self.results['pages'][path]
+        deps = dict(deps or {})
+        checks = self.active_checks()
+        for check in checks:
+            if check.per_page:
+                for name in check.needs:
+                    if name not in deps:
+                        deps[name] = DEPENDENCIES[name][0](self, path)
+                self.run_check(check, path, {name: deps[name] for name in check.needs})
+        if any(check.name == 'duplicates' for check in checks):
+            self.fingerprint_page(path)
+        if self.incremental:
+            self.remember_page(path)
+        return self.results.get('pages', {}).get(path, {})
+
+    def fingerprint_page(self, path: str):
+        """Keep the page's duplicate detection fingerprint, while its full index is still in memory"""
+        response, page = self.fetch_index(path)
+        if response is not None and response.status_code == 200 and page is not None:
+            fingerprint = page_fingerprint(page)
+            with self._results_lock:
+                self.fingerprints[path] = fingerprint
+
+    def finish_page(self, path: str):
+        """Compute a page's overall score across categories and report it"""
+        with self._results_lock:
+            page = self.results.setdefault('pages', {}).setdefault(path, {})
+            page.pop('overall', None)
+            scores = [data for data in page.values() if 'passed' in data]
+            page_passed = sum(data['passed'] for data in scores)
+            page_total = sum(data['total'] for data in scores)
+            score = (page_passed / page_total * 100) if page_total > 0 else 0
+            page['overall'] = {'passed': page_passed, 'total': page_total, 'score': score}
+        self.emit('page', render=self.show_pages, path=path, passed=page_passed, total=page_total, score=score)
+
+    def audit_build(self, max_workers: int = 8):
+        """Audit every prerendered page of the build directory in worker processes"""
+        self.print_header("OFFLINE BUILD AUDIT")
+
+        routes = sorted(self.documents.routes)
+        if not routes:
+            self.error(f"No prerendered HTML found in {self.build_dir}")
+            return
+        self.note(f"Auditing {len(routes)} page(s) from {self.build_dir} with {max_workers} process(es)\n")
+
+        # Several small chunks per worker keep the processes evenly loaded
+        chunk_count = min(len(routes), max_workers * 4)
+        chunks = [routes[i::chunk_count] for i in range(chunk_count)]
+
+        verbose = self.verbose
+        self.verbose = False
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_audit_build_chunk, self.base_url, self.build_dir, self.parser_engine,
+                                           self.documents.routes, chunk, self.check_critical_path,
+                                           self.check_duplicates, None if self.keywords is DEFAULT_KEYWORDS else self.keywords)
+                           for chunk in chunks]
+                for future in as_completed(futures):
+                    pages, fingerprints = future.result()
+                    self.fingerprints.update(fingerprints)
+                    for path, page in pages.items():
+                        for category, data in page.items():
+                            if 'passed' in data:
+                                self.record_score(category, path, data['passed'], data['total'])
+                        with self._results_lock:
+                            for key, data in page.items():
+                                if 'passed' not in data:
+                                    self.results['pages'][path][key] = data
+                        self.finish_page(path)
+        finally:
+            self.verbose = verbose
+
+    # ==================== LOAD TEST ====================
+
+    def run_load_test(self, clients: int = 10, duration: float = 30.0, max_requests: Optional[int] = None,
+                      allow_remote: bool = False) -> Dict:
+        """Drive concurrent clients over the sitemap URLs and report latency per URL.
+
+        Runs for `duration` seconds, or until `max_requests` requests when given.
+        The first request to each URL is reported separately as its cold latency.
+        """
+        self.print_header("LOAD TEST")
+
+        host = urlparse(self.base_url).hostname or ''
+        if not allow_remote and host not in ('localhost', '127.0.0.1', '::1'):
+            raise ValueError(f"Load testing {host} refused: point --url/--local at a local stand-in server")
+
+        paths = self.fetch_sitemap_paths() or ["/"]
+        urls = [urljoin(self.base_url, path) for path in paths]
+        stop_label = f"{max_requests} requests" if max_requests else f"{duration:.0f}s"
+        self.note(f"{clients} client(s) over {len(urls)} URL(s) for {stop_label}\n")
+
+        # One pooled keep-alive connection per client, through the run's own kind of transport;
+        # errors are measured, never retried
+        limiter = getattr(self.transport, 'limiter', None)
+        if isinstance(self.transport, AsyncHttpTransport):
+            adapter = AsyncHttpTransport(pool_per_host=clients, http2=self.transport.http2, retries=0,
+                                         limiter=limiter)
+        elif isinstance(self.transport, MockTransport):
+            adapter = MockTransport(self.transport.handler, latency=self.transport.latency, limiter=limiter)
+        else:
+            adapter = HttpTransport(pool_per_host=clients, hosts=len(urls), retries=0, limiter=limiter)
+
+        lock = threading.Lock()
+        issued = [0]
+        cold = {}
+        deadline = time.perf_counter() + duration
+
+        def next_url() -> Tuple[Optional[str], bool]:
+            """The next URL to request, and whether this is the first request issued for it"""
+            with lock:
+                if max_requests is not None:
+                    if issued[0] >= max_requests:
+                        return None, False
+                elif time.perf_counter() >= deadline:
+                    return None, False
+                url = urls[issued[0] % len(urls)]
+                issued[0] += 1
+                return url, issued[0] <= len(urls)
+
+        def client() -> Dict[str, Dict]:
+            # Each client keeps its own histograms and the results are merged at the end
+            stats = {}
+            while True:
+                url, first = next_url()
+                if url is None:
+                    return stats
+                entry = stats.setdefault(url, {'histogram': LatencyHistogram(), 'errors': 0, 'bytes': 0})
+                start = time.perf_counter()
+                try:
+                    response = self.session.get(url, timeout=self.documents.timeout)
+                    elapsed = time.perf_counter() - start
+                    entry['bytes'] += len(response.content)
+                    if response.status_code >= 400:
+                        entry['errors'] += 1
+                except requests.RequestException:
+                    elapsed = time.perf_counter() - start
+                    entry['errors'] += 1
+                entry['histogram'].record(elapsed)
+                if first:
+                    with lock:
+                        cold[url] = elapsed
+
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                client_stats = [future.result() for future in [executor.submit(client) for _ in range(clients)]]
+            wall_time = time.perf_counter() - started
+        finally:
+            self.session.mount('http://', self.transport)
+            self.session.mount('https://', self.transport)
+            adapter.close()
+
+        per_url = {}
+        overall = LatencyHistogram()
+        total_errors = 0
+        for stats in client_stats:
+            for url, entry in stats.items():
+                merged = per_url.setdefault(url, {'histogram': LatencyHistogram(), 'errors': 0, 'bytes': 0})
+                merged['histogram'].merge(entry['histogram'])
+                merged['errors'] += entry['errors']
+                merged['bytes'] += entry['bytes']
+                overall.merge(entry['histogram'])
+                total_errors += entry['errors']
+
+        self.note(f"{'URL':<44} {'reqs':>6} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'cold':>8}")
+        report = {}
+        for url in urls:
+            entry = per_url.get(url)
+            if not entry:
+                continue
+            histogram = entry['histogram']
+            error_rate = entry['errors'] / histogram.count * 100 if histogram.count else 0
+            report[url] = {
+                'requests': histogram.count,
+                'errors': entry['errors'],
+                'error_rate': error_rate,
+                'bytes': entry['bytes'],
+                'cold': cold.get(url, 0.0),
+                'latency': histogram.to_dict()
+            }
+            color = Colors.RED if error_rate > 1 else Colors.GREEN
+            self.note(f"{color}{urlparse(url).path or '/':<44} {histogram.count:>6} {error_rate:>5.1f}% "
+                      f"{histogram.percentile(50) * 1000:>6.0f}ms {histogram.percentile(95) * 1000:>6.0f}ms "
+                      f"{histogram.percentile(99) * 1000:>6.0f}ms {cold.get(url, 0.0) * 1000:>6.0f}ms{Colors.END}")
+
+        throughput = overall.count / wall_time if wall_time > 0 else 0
+        error_rate = total_errors / overall.count * 100 if overall.count else 0
+        self.results['load'] = {
+            'clients': clients,
+            'duration': wall_time,
+            'requests': overall.count,
+            'errors': total_errors,
+            'error_rate': error_rate,
+            'throughput': throughput,
+            'latency': overall.to_dict(),
+            'urls': report
+        }
+        self.note(f"\n{Colors.BOLD}Throughput: {throughput:.1f} req/s | Error rate: {error_rate:.2f}% | "
+                  f"p95: {overall.percentile(95) * 1000:.0f}ms{Colors.END}")
+
+        report_file = f"load_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.results['load'], f, indent=2, ensure_ascii=False)
+        self.note(f"{Colors.GREEN}Load report saved to: {report_file}{Colors.END}")
+        return self.results['load']
+
+    # ==================== INCREMENTAL AUDITS ====================
+
+    def load_incremental_state(self):
+        """Read each page's validators, body hash and previous results from the cache dir"""
+        self.incremental_state = {}
+        state_path = os.path.join(self.cache_dir, 'incremental.json')
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    self.incremental_state = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def save_incremental_state(self, paths: Optional[List[str]] = None):
+        """Write the state back, keeping only the pages of `paths` when given (the sitemap of a crawl)"""
+        if paths is not None:
+            urls = {urljoin(self.base_url, path) for path in paths}
+            self.incremental_state = {url: state for url, state in self.incremental_state.items() if url in urls}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, 'incremental.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.incremental_state, f)
+
+    def check_signature(self) -> str:
+        """Hash of the enabled checks and the rules they apply, stored with each page's results.
+
+        Site-wide checks count too: duplicates and the keyword matrix read the
+        fingerprint and coverage kept with a page only while they are enabled.
+        """
+        rules = {'checks': sorted(check.name for check in self.active_checks()),
+                 'keywords': self.keywords, 'user_agents': self.user_agents}
+        return hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def reuse_unchanged(self, path: str) -> bool:
+        """Reuse a page's previous results when it hasn't changed since the last run.
+
+        An unchanged sitemap <lastmod> needs no request at all. Otherwise a
+        conditional GET through the document store, capped and parsed like any
+        page fetch, either comes back 304 or returns a body whose hash is
+        compared with the stored one; a changed body stays in the store for the
+        checks. Results stored under other checks or rules are never reused.
+        """
+        url = urljoin(self.base_url, path)
+        state = self.incremental_state.get(url)
+        if not state or not state.get('results') or state.get('checks') != self.check_signature():
+            return False
+
+        lastmod = self.sitemap_lastmod.get(path)
+        unchanged = bool(lastmod) and lastmod == state.get('lastmod')
+        if not unchanged:
+            validators = {}
+            if state.get('etag'):
+                validators['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                validators['If-Modified-Since'] = state['last_modified']
+            try:
+                response = self.documents.get_response(url, validators)
+            except requests.RequestException:
+                return False
+            if response.status_code == 304:
+                unchanged = True
+            elif response.status_code == 200 and url not in self.documents.truncated:
+                unchanged = hashlib.sha256(response.content).hexdigest() == state.get('sha256')
+        if not unchanged:
+            return False
+
+        with self._results_lock:
+            state['lastmod'] = lastmod or state.get('lastmod')
+            self.results.setdefault('incremental', {'reused': [], 'audited': []})['reused'].append(path)
+        for category, data in state['results'].items():
+            self.record_score(category, path, data['passed'], data['total'])
+        with self._results_lock:
+            if state.get('fingerprint'):
+                self.fingerprints[path] = state['fingerprint']
+            if state.get('keywords') is not None:
+                self.results['pages'][path]['keywords'] = state['keywords']
+            if state.get('html_bytes') is not None:
+                self.documents.body_sizes.setdefault(url, state['html_bytes'])
+        self.print_result("Unchanged since last run", True, f"{path}: reusing previous results")
+        return True
+
+    def remember_page(self, path: str):
+        """Store a freshly audited page's validators, body hash and results for the next run"""
+        url = urljoin(self.base_url, path)
+        response = self.documents.responses.get(url)
+        if response is None or response.status_code != 200:
+            return
+        with self._results_lock:
+            page = self.results.get('pages', {}).get(path, {})
+            self.incremental_state[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'lastmod': self.sitemap_lastmod.get(path),
+                'sha256': hashlib.sha256(response.content).hexdigest(),
+                'html_bytes': self.documents.body_size(url),
+                'checks': self.check_signature(),
+                'results': {category: data for category, data in page.items()
+                            if 'passed' in data and category != 'overall'},
+                'fingerprint': self.fingerprints.get(path),
+                'keywords': page.get('keywords')
+            }
+            self.results.setdefault('incremental', {'reused': [], 'audited': []})['audited'].append(path)
 
     # ==================== GENERATE REPORT ====================
 
@@ -551,7 +4852,10 @@ class SEOTestSuite:
         total_passed = 0
         total_tests = 0
 
-        for category, data in self.results.items():
+        # Checks finish in any order; report categories in registration order
+        order = {name: position for position, name in enumerate(CHECKS)}
+        for category in sorted(self.results, key=lambda name: order.get(name, len(order))):
+            data = self.results[category]
             if category != 'summary' and 'passed' in data:
                 total_passed += data['passed']
                 total_tests += data['total']
@@ -564,8 +4868,17 @@ class SEOTestSuite:
             'total_passed': total_passed,
             'total_tests': total_tests,
             'overall_score': overall_score,
+            'document_cache': dict(self.documents.stats),
+            'parser_engine': self.parser_engine,
+            'schema_cache': dict(self.schema_validator.stats),
+            'check_seconds': {name: round(seconds, 4) for name, seconds in self.check_times.items()},
+            'truncated_pages': sorted(self.documents.truncated),
+            'transport': {'name': type(self.transport).__name__, **getattr(self.transport, 'stats', {})},
+            'peak_rss_kb': peak_rss_kb(),
             'timestamp': datetime.now().isoformat()
         }
+        self.emit('summary', "Overall", render=False, section=None, path=None,
+                  passed=total_passed, total=total_tests, score=overall_score)
 
         print(f"\n{Colors.BOLD}{Colors.CYAN}{'=' * 80}{Colors.END}")
         color = Colors.GREEN if overall_score >= 90 else Colors.YELLOW if overall_score >= 75 else Colors.RED
@@ -585,6 +4898,8 @@ class SEOTestSuite:
             grade = "D NEEDS WORK"
 
         print(f"{Colors.BOLD}Grade: {grade}{Colors.END}\n")
+        if self.results['summary']['peak_rss_kb'] is not None:
+            print(f"Peak memory: {self.results['summary']['peak_rss_kb'] / 1024:.0f}MB\n")
 
         # Save JSON report
         report_file = f"seo_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -592,21 +4907,138 @@ class SEOTestSuite:
             json.dump(self.results, f, indent=2, ensure_ascii=False)
 
         print(f"{Colors.GREEN}Full report saved to: {report_file}{Colors.END}")
+        self.record_run()
+
+    # ==================== RUN HISTORY ====================
+
+    def record_run(self):
+        """Store this run's scores and metrics in the run history, unless --no-db"""
+        if not self.results_db:
+            return
+        store = ResultsStore(self.results_db)
+        try:
+            self.run_id = store.save_run(self.base_url, self.results, self.collect_metrics(), self.parser_engine)
+        finally:
+            store.close()
+        print(f"{Colors.GREEN}Run #{self.run_id} stored in: {self.results_db}{Colors.END}")
+
+    def collect_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Numeric metrics of this run per path ('' for site-wide) for the results store"""
+        metrics = {}
+        for path, page in self.results.get('pages', {}).items():
+            values = metrics.setdefault(path, {})
+            scores = [data for category, data in page.items() if 'passed' in data and category != 'overall']
+            page_total = sum(data['total'] for data in scores)
+            if page_total:
+                values['score'] = sum(data['passed'] for data in scores) / page_total * 100
+            if 'weight' in page:
+                values['page_bytes'] = page['weight']['total_bytes']
+            url = urljoin(self.base_url, path)
+            if url in self.documents.body_sizes:
+                values['html_bytes'] = self.documents.body_size(url)
+        for path, timings in self.results.get('timings', {}).items():
+            values = metrics.setdefault(path, {})
+            for phase in ('ttfb', 'total', 'parse'):
+                for pct in ('p50', 'p95'):
+                    values[f"{phase}_{pct}"] = timings[phase][pct]
 
-    def run_all_tests(self):
-        """Run complete test suite"""
+        site = metrics.setdefault('', {})
+        site['score'] = self.results.get('summary', {}).get('overall_score')
+        if 'load' in self.results:
+            site['load_p95'] = self.results['load']['latency']['p95']
+            site['load_throughput'] = self.results['load']['throughput']
+        return metrics
+
+    def compare_runs(self, baseline: str = 'median', run_id: Optional[int] = None, window: int = 5) -> List[Dict]:
+        """Print and return regressions of a stored run (default: this run, else the latest).
+
+        Raises ValueError without a run history or when baseline is neither a run id nor 'median'.
+        """
+        if not self.results_db:
+            raise ValueError("Comparing runs needs the run history, it can't be combined with --no-db")
+        if baseline != 'median' and not str(baseline).isdigit():
+            raise ValueError(f"Unknown baseline {baseline!r}: use a stored run id or 'median'")
+        self.print_header("REGRESSION CHECK")
+        store = ResultsStore(self.results_db)
+        try:
+            run_id = run_id or self.run_id or store.latest_run(self.base_url)
+            if run_id is None:
+                self.note(f"{Colors.YELLOW}No stored runs for {self.base_url}{Colors.END}")
+                return []
+            regressions = store.compare(run_id, baseline, window)
+        finally:
+            store.close()
+
+        against = f"rolling median of {window} previous runs" if baseline == 'median' else f"run #{baseline}"
+        self.note(f"Run #{run_id} against {against}\n")
+        def format_metric(name: str, value: float) -> str:
+            if name.endswith('bytes'):
+                return f"{value / 1024:.1f}KB"
+            if name == 'score':
+                return f"{value:.1f}%"
+            if name == 'load_throughput':
+                return f"{value:.1f} req/s"
+            return f"{value * 1000:.0f}ms"
+
+        for regression in regressions:
+            name = regression['metric']
+            self.print_result(f"{regression['path']} {name}", False,
+                              f"{format_metric(name, regression['baseline'])} → {format_metric(name, regression['value'])}")
+        if not regressions:
+            self.print_result("No regressions", True)
+        return regressions
+
+    def configure(self, max_workers: int = 8, check_assets: bool = False, image_dir: Optional[str] = None,
+                  check_links: bool = False, critical_path: bool = False, check_compression: bool = False,
+                  check_cache: bool = False, user_agents: Optional[Dict[str, str]] = None,
+                  check_duplicates: bool = False, check_keywords: bool = False, head_only: bool = False):
+        """Choose the optional checks and the worker count, as run_all_tests does before it runs"""
+        self.head_only = head_only
+        self.check_critical_path = critical_path
+        self.check_duplicates = check_duplicates
+        self.check_keywords = check_keywords
+        self.check_assets = check_assets
+        self.check_compression = check_compression
+        self.check_cache = check_cache
+        self.check_links = check_links
+        self.user_agents = user_agents
+        self.image_dir = image_dir
+        self.max_workers = max_workers
+
+    def run_all_tests(self, crawl: bool = False, max_workers: int = 8, check_assets: bool = False,
+                      image_dir: Optional[str] = None, incremental: bool = False, check_links: bool = False,
+                      critical_path: bool = False, check_compression: bool = False, check_cache: bool = False,
+                      user_agents: Optional[Dict[str, str]] = None, check_duplicates: bool = False,
+                      check_keywords: bool = False, head_only: bool = False):
+        """Run complete test suite, on the homepage or on every sitemap page.
+
+        With incremental=True pages unchanged since the previous run reuse
+        their stored results instead of being parsed and checked again. With
+        head_only=True only the <head> tags are checked, and each page is read
+        only up to </head>.
+        """
         print(f"\n{Colors.MAGENTA}{Colors.BOLD}{'*' * 80}")
         print(f"{'SEO TESTING SUITE - THEO MULTIMEDIA'.center(80)}")
         print(f"{'October 2025 Standards'.center(80)}")
         print(f"{'*' * 80}{Colors.END}\n")
-        print(f"Testing: {Colors.BOLD}{self.base_url}{Colors.END}\n")
+        print(f"Testing: {Colors.BOLD}{self.build_dir if self.offline else self.base_url}{Colors.END}")
+        print(f"Parser engine: {Colors.BOLD}{self.parser_engine}{Colors.END}\n")
+
+        self.incremental = incremental and not self.offline and self.cache_dir is not None
+        self.configure(max_workers, check_assets, image_dir, check_links, critical_path, check_compression,
+                       check_cache, user_agents, check_duplicates, check_keywords, head_only)
+        if self.incremental:
+            self.load_incremental_state()
+
+        plugins = load_plugin_checks(self.error)
+        if plugins:
+            print(f"Check plugins: {Colors.BOLD}{', '.join(plugins)}{Colors.END}\n")
 
         try:
-            self.test_general_seo()
-            self.test_local_seo()
-            self.test_schema_validation()
-            self.test_performance()
-            self.test_sitemap_robots()
+            paths = CheckScheduler(self, max_workers).run(crawl)
+            if self.incremental:
+                # A crawl covers the whole sitemap, so pages dropped from it are forgotten
+                self.save_incremental_state(paths if crawl else None)
             self.generate_report()
         except KeyboardInterrupt:
             print(f"\n{Colors.YELLOW}Tests interrupted by user{Colors.END}")
@@ -617,24 +5049,1006 @@ class SEOTestSuite:
             traceback.print_exc()
             sys.exit(1)
 
+# ==================== BUILT-IN CHECKS ====================
+
+@register_dependency('robots')
+def _robots_txt(suite: SEOTestSuite, path: None) -> Tuple:
+    return suite.fetch_site_file('/robots.txt')
+
+@register_dependency('sitemap')
+def _sitemap_xml(suite: SEOTestSuite, path: None) -> Tuple:
+    return suite.fetch_site_file('/sitemap.xml')
+
+@register_dependency('page', per_page=True)
+def _page(suite: SEOTestSuite, path: str) -> Tuple:
+    return suite.fetch_index(path)
+
+@register_dependency('head', per_page=True)
+def _head(suite: SEOTestSuite, path: str) -> Tuple:
+    return suite.fetch_head(path)
+
+# --head-only runs swap the whole-page checks for the <head> tag checks
+
+@register_check('general_seo', needs=('page',), per_page=True, enabled=lambda suite: not suite.head_only)
+def _general_seo(suite: SEOTestSuite, path: str, deps: Dict):
+    suite.test_general_seo(path)
+
+@register_check('local_seo', needs=('page',), per_page=True, enabled=lambda suite: not suite.head_only)
+def _local_seo(suite: SEOTestSuite, path: str, deps: Dict):
+    suite.test_local_seo(path)
+
+@register_check('schema_validation', needs=('page',), per_page=True, enabled=lambda suite: not suite.head_only)
+def _schema_validation(suite: SEOTestSuite, path: str, deps: Dict):
+    suite.test_schema_validation(path)
+
+@register_check('performance', needs=('page',), per_page=True, enabled=lambda suite: not suite.head_only)
+def _performance(suite: SEOTestSuite, path: str, deps: Dict):
+    suite.test_performance(path)
+
+@register_check('head_tags', needs=('head',), per_page=True, enabled=lambda suite: suite.head_only)
+def _head_tags(suite: SEOTestSuite, path: str, deps: Dict):
+    suite.test_head_tags(path)
+
+@register_check('critical_path', needs=('page',), per_page=True,
+                enabled=lambda suite: suite.check_critical_path and not suite.head_only)
+def _critical_path(suite: SEOTestSuite, path: str, deps: Dict):
+    suite.test_critical_path(path)
+
+# Site checks that add per-page scores wait for the page audits so page totals don't race them
+
+@register_check('page_weight', needs=('audits', 'indexes'),
+                enabled=lambda suite: suite.check_assets and not suite.offline)
+def _page_weight(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_page_weight(paths)
+
+@register_check('compression', needs=('indexes',), enabled=lambda suite: suite.check_compression and not suite.offline)
+def _compression(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_compression(paths)
+
+@register_check('http_cache', needs=('indexes',), enabled=lambda suite: suite.check_cache and not suite.offline)
+def _http_cache(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_http_cache(paths)
+
+@register_check('user_agents', enabled=lambda suite: bool(suite.user_agents) and not suite.offline)
+def _user_agents(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_user_agents(paths, suite.user_agents)
+
+@register_check('links', needs=('audits', 'indexes'), enabled=lambda suite: suite.check_links and not suite.offline)
+def _links(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_links(paths)
+
+@register_check('duplicates', needs=('audits',), enabled=lambda suite: suite.check_duplicates)
+def _duplicates(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_duplicates(paths)
+
+@register_check('keyword_matrix', needs=('audits',), enabled=lambda suite: suite.check_keywords)
+def _keyword_matrix(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_keyword_matrix(paths)
+
+@register_check('images', needs=('audits',), enabled=lambda suite: bool(suite.image_dir))
+def _images(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_images(suite.image_dir, suite.max_workers)
+
+@register_check('sitemap_robots', needs=('robots', 'sitemap'), enabled=lambda suite: not suite.offline)
+def _sitemap_robots(suite: SEOTestSuite, paths: List[str], deps: Dict):
+    suite.test_sitemap_robots(deps['robots'], deps['sitemap'])
+
+# ==================== BENCHMARK ====================
+
+# Towns and services the synthetic pages are written about, so local checks have something to find
+BENCH_TOWNS = ('Angoulême', 'Cognac', 'Soyaux', 'La Couronne', 'Ruelle-sur-Touvre', 'Gond-Pontouvre')
+BENCH_SERVICES = ('création de sites web', 'photographie', 'vidéo', 'référencement local', 'identité visuelle')
+
+# Site sizes --bench measures by default
+BENCH_SIZES = (10, 100, 1000)
+
+# Version of the --bench results file layout, bumped when runs stop being comparable
+BENCH_FORMAT = 1
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    """One length-prefixed, CRC-terminated PNG chunk"""
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+# 1x1 transparent PNG served for every synthetic image
+BENCH_PNG = (b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 6, 0, 0, 0)) +
+             png_chunk(b'IDAT', zlib.compress(b'\x00' * 5)) + png_chunk(b'IEND', b''))
+
+class SyntheticSite:
+    """A generated site of `pages` pages, built on request so the fixture's memory stays flat.
+
+    Pages are deterministic, look like the real ones (meta tags, geo tags,
+    LocalBusiness JSON-LD, headings, images, internal links) and share one
+    stylesheet and script.
+    """
+
+    def __init__(self, pages: int):
+        self.pages = max(1, pages)
+        self.base_url = ''
+
+    def routes(self) -> List[str]:
+        return ['/'] + [f"/page-{i}" for i in range(1, self.pages)]
+
+    def page(self, number: int) -> bytes:
+        town = BENCH_TOWNS[number % len(BENCH_TOWNS)]
+        service = BENCH_SERVICES[number % len(BENCH_SERVICES)]
+        path = '/' if number == 0 else f"/page-{number}"
+        title = f"{service.capitalize()} à {town} | Theo Multimedia page {number}"
+        description = (f"Theo Multimedia accompagne les entreprises de {town} en Charente pour leur {service}: "
+                       f"conseil, production et suivi en Nouvelle-Aquitaine (page {number}).")
+        schema = {
+            '@context': 'https://schema.org', '@type': 'ProfessionalService', 'name': 'Theo Multimedia',
+            'url': f"{self.base_url}{path}", 'telephone': '+33 5 45 00 00 00', 'image': f"{self.base_url}/og.png",
+            'geo': {'@type': 'GeoCoordinates', 'latitude': 45.6484, 'longitude': 0.1560},
+            'address': {'@type': 'PostalAddress', 'addressLocality': 'Angoulême', 'addressRegion': 'Nouvelle-Aquitaine',
+                        'postalCode': '16000', 'addressCountry': 'FR'},
+            'areaServed': town, 'priceRange': '€€'
+        }
+        links = ''.join(f'<li><a href="{"/" if n == 0 else f"/page-{n}"}">Page {n}</a></li>'
+                        for n in sorted({(number + step) % self.pages for step in (1, 2, 7, 31)}))
+        paragraph = f"{description} Nous intervenons à {town}, Angoulême et dans toute la Charente. " * 3
+        sections = ''.join(
+            f"<h2>{service.capitalize()} – étape {step}</h2><p>{html.escape(paragraph)}</p>"
+            f'<img src="/images/photo-{(number + step) % 20}.png" alt="{service} à {town}" width="800" height="600" '
+            f'loading="lazy">'
+            for step in range(1, 5))
+        return (f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">'
+                f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+                f'<title>{html.escape(title)}</title><meta name="description" content="{html.escape(description)}">'
+                f'<meta name="robots" content="index, follow"><link rel="canonical" href="{self.base_url}{path}">'
+                f'<meta property="og:title" content="{html.escape(title)}">'
+                f'<meta property="og:description" content="{html.escape(description)}">'
+                f'<meta property="og:image" content="{self.base_url}/og.png">'
+                f'<meta property="og:url" content="{self.base_url}{path}">'
+                f'<meta name="twitter:card" content="summary_large_image">'
+                f'<meta name="twitter:title" content="{html.escape(title)}">'
+                f'<meta name="twitter:image" content="{self.base_url}/og.png">'
+                f'<meta name="geo.region" content="FR-16"><meta name="geo.placename" content="Angoulême">'
+                f'<meta name="geo.position" content="45.6484;0.1560"><meta name="ICBM" content="45.6484, 0.1560">'
+                f'<link rel="stylesheet" href="/styles.css"><script src="/app.js" defer></script>'
+                f'<script type="application/ld+json">{json.dumps(schema, ensure_ascii=False)}</script></head>'
+                f'<body><header><nav><ul>{links}</ul></nav></header><main><h1>{html.escape(title)}</h1>'
+                f'{sections}</main><footer><p>Theo Multimedia, Angoulême, Charente</p></footer></body></html>'
+                ).encode('utf-8')
+
+    def sitemap(self) -> bytes:
+        urls = ''.join(f"<url><loc>{self.base_url}{route}</loc><lastmod>2025-10-01</lastmod></url>"
+                       for route in self.routes())
+        return (f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>').encode('utf-8')
+
+    def get(self, path: str) -> Optional[Tuple[str, bytes]]:
+        """(Content-Type, body) served for a path, None for a 404"""
+        if path == '/robots.txt':
+            return 'text/plain', f"User-agent: *\nAllow: /\n\nSitemap: {self.base_url}/sitemap.xml\n".encode()
+        if path == '/sitemap.xml':
+            return 'application/xml', self.sitemap()
+        if path == '/styles.css':
+            return 'text/css', b'body{margin:0;font-family:system-ui,sans-serif}' * 40
+        if path == '/app.js':
+            return 'application/javascript', b'document.documentElement.classList.add("js");\n' * 40
+        if path.endswith('.png'):
+            return 'image/png', BENCH_PNG
+        if path == '/':
+            return 'text/html; charset=utf-8', self.page(0)
+        match = re.fullmatch(r'/page-(\d+)', path)
+        if match and 0 < int(match.group(1)) < self.pages:
+            return 'text/html; charset=utf-8', self.page(int(match.group(1)))
+        return None
+
+class RecordedSite:
+    """A recorded site served from a directory: a saved copy of the site or a static export.
+
+    HTML files are served at their routes like --build-dir reads them, every
+    other file at its relative path. robots.txt and sitemap.xml are generated
+    when the recording has none.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.pages_by_route = build_page_routes(directory)
+        self.pages = len(self.pages_by_route)
+        self.base_url = ''
+
+    def routes(self) -> List[str]:
+        return sorted(self.pages_by_route)
+
+    def get(self, path: str) -> Optional[Tuple[str, bytes]]:
+        """(Content-Type, body) served for a path, None for a 404"""
+        route = path if path == '/' else path.rstrip('/')
+        file_path = self.pages_by_route.get(route)
+        if file_path is None:
+            root = os.path.abspath(self.directory)
+            file_path = os.path.abspath(os.path.join(root, path.lstrip('/')))
+            if not file_path.startswith(root + os.sep):
+                return None
+        if os.path.isfile(file_path):
+            with open(file_path, 'rb') as f:
+                content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+                if content_type.startswith('text/'):
+                    content_type += '; charset=utf-8'
+                return content_type, f.read()
+        if path == '/robots.txt':
+            return 'text/plain', f"User-agent: *\nAllow: /\n\nSitemap: {self.base_url}/sitemap.xml\n".encode()
+        if path == '/sitemap.xml':
+            urls = ''.join(f"<url><loc>{self.base_url}{route}</loc></url>" for route in self.routes())
+            return 'application/xml', (f'<?xml version="1.0" encoding="UTF-8"?><urlset '
+                                       f'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>').encode()
+        return None
+
+def fixture_response(site, path: str, request_headers, method: str = 'GET') -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """(status, headers, body) a fixture site answers for a path, like a real deploy would.
+
+    Responses carry ETags (answering If-None-Match with 304), Cache-Control
+    and gzip for text bodies when the client accepts it. HEAD gets the
+    headers of a GET.
+    """
+    served = site.get(path)
+    if served is None:
+        content_type, body, status = 'text/html; charset=utf-8', b'<h1>Not found</h1>', 404
+    else:
+        (content_type, body), status = served, 200
+    etag = f'"{zlib.crc32(body):08x}"'
+    if status == 200 and request_headers.get('If-None-Match') == etag:
+        return 304, [('ETag', etag), ('Content-Length', '0')], b''
+    headers = []
+    text = content_type.startswith(('text/', 'application/javascript', 'application/xml'))
+    if text and len(body) >= MIN_COMPRESS_BYTES and 'gzip' in request_headers.get('Accept-Encoding', ''):
+        body = compress_body(body, 'gzip', 6)
+        headers.append(('Content-Encoding', 'gzip'))
+    if text:
+        headers.append(('Vary', 'Accept-Encoding'))
+    html_page = content_type.startswith('text/html')
+    headers += [('Content-Type', content_type), ('Content-Length', str(len(body))), ('ETag', etag),
+                ('Cache-Control', 'public, max-age=0, must-revalidate' if html_page
+                 else 'public, max-age=31536000, immutable')]
+    return status, headers, b'' if method == 'HEAD' else body
+
+class FixtureServer:
+    """Serves a SyntheticSite or RecordedSite on a free local port from a background thread.
+
+    Every response comes from fixture_response(), so checks see headers like
+    a real deploy's. Nothing leaves 127.0.0.1.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        site.base_url = self.base_url
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'FixtureServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.respond()
+
+            def do_HEAD(self):
+                self.respond()
+
+            def respond(self):
+                with fixture._lock:
+                    fixture.requests += 1
+                status, headers, body = fixture_response(fixture.site, urlparse(self.path).path or '/',
+                                                         self.headers, self.command)
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+# Base URL of the sites the mock transport serves; .invalid never resolves, so nothing can leak out
+MOCK_BASE_URL = 'http://bench.invalid'
+
+def _benchmark_audit(base_url: str, workers: int, parser: str, options: Dict, transport: Dict, site=None) -> Dict:
+    """Worker process entry point: crawl base_url once and return the run's measurements"""
+    base_rss = peak_rss_kb()
+    load_plugin_checks()
+    suite = SEOTestSuite(base_url, cache_dir=None, parser=parser, transport=make_transport(site=site, **transport))
+    suite.verbose = False
+    suite.show_pages = False
+    for name, value in options.items():
+        setattr(suite, name, value)
+    suite.max_workers = workers
+
+    start = time.perf_counter()
+    try:
+        paths = CheckScheduler(suite, workers).run(crawl=True)
+    finally:
+        suite.session.close()
+    wall = time.perf_counter() - start
+
+    scores = [data for name, data in suite.results.items() if name != 'summary' and 'passed' in data]
+    passed = sum(data['passed'] for data in scores)
+    total = sum(data['total'] for data in scores)
+    return {
+        'pages': len(paths),
+        'wall_seconds': wall,
+        'pages_per_second': len(paths) / wall if wall > 0 else 0,
+        'fetch_seconds': sum(suite.documents.fetch_times.values()),
+        'parse_seconds': sum(suite.documents.parse_times.values()),
+        'check_seconds': dict(suite.check_times),
+        'base_rss_kb': base_rss,
+        'peak_rss_kb': peak_rss_kb(),
+        'requests': suite.transport.stats['requests'],
+        'score': passed / total * 100 if total else 0
+    }
+
+def run_benchmark(sizes: List[int], workers: int = 8, parser: Optional[str] = None,
+                  recorded_dir: Optional[str] = None, options: Optional[Dict] = None,
+                  transport: Optional[Dict] = None) -> Dict:
+    """Crawl a local fixture site of each size (or the recording in recorded_dir) and measure the audit.
+
+    Every run happens in a fresh process so its peak RSS is its own, while
+    the fixture server stays in this one and never competes with the audit
+    for the interpreter. transport holds make_transport's arguments; the
+    mock transport serves the site in the worker itself, without a server.
+    """
+    options = options or {}
+    transport = transport or {'name': 'http'}
+    engine = select_parser_engine(parser)
+    sites = [(recorded_dir, RecordedSite(recorded_dir))] if recorded_dir else \
+        [(str(size), SyntheticSite(size)) for size in sizes]
+    results = {
+        'format': BENCH_FORMAT,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parser': engine,
+        'workers': workers,
+        'options': sorted(name for name, value in options.items() if value),
+        'transport': transport['name'],
+        'site': 'recorded' if recorded_dir else 'synthetic',
+        'runs': {}
+    }
+    print(f"{Colors.BOLD}Benchmarking {results['site']} site(s) with {workers} worker(s), "
+          f"parser {engine}, {transport['name']} transport{Colors.END}\n")
+    print(f"{'site':<12} {'pages':>7} {'pages/s':>9} {'wall':>8} {'fetch':>8} {'parse':>8} {'requests':>9} "
+          f"{'peak RSS':>10}")
+    context = multiprocessing.get_context('spawn')
+    for label, site in sites:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            if transport['name'] == 'mock':
+                site.base_url = MOCK_BASE_URL
+                run = executor.submit(_benchmark_audit, MOCK_BASE_URL, workers, engine, options, transport,
+                                      site).result()
+            else:
+                with FixtureServer(site) as server:
+                    run = executor.submit(_benchmark_audit, server.base_url, workers, engine, options,
+                                          transport).result()
+        results['runs'][label] = run
+        rss = f"{run['peak_rss_kb'] / 1024:.0f}MB" if run['peak_rss_kb'] is not None else 'n/a'
+        print(f"{label[-12:]:<12} {run['pages']:>7} {run['pages_per_second']:>9.1f} {run['wall_seconds']:>7.2f}s "
+              f"{run['fetch_seconds']:>7.2f}s {run['parse_seconds']:>7.2f}s {run['requests']:>9} {rss:>10}")
+
+    # Check time summed over pages and workers, per audited page
+    categories = list(dict.fromkeys(name for run in results['runs'].values() for name in run['check_seconds']))
+    if categories:
+        print(f"\n{'ms per page':<24}" + ''.join(f"{label[-10:]:>11}" for label in results['runs']))
+        for name in categories:
+            print(f"{name:<24}" + ''.join(
+                f"{run['check_seconds'].get(name, 0) / max(1, run['pages']) * 1000:>11.2f}"
+                for run in results['runs'].values()))
+    return results
+
+def compare_benchmarks(current: Dict, baseline: Dict, tolerance: float = 10.0) -> List[Dict]:
+    """Runs of current that got slower or bigger than the same site in baseline by more than tolerance %"""
+    regressions = []
+    # metric -> whether a higher value is better
+    metrics = {'pages_per_second': True, 'parse_seconds': False, 'peak_rss_kb': False}
+    for label, run in current.get('runs', {}).items():
+        before = baseline.get('runs', {}).get(label)
+        if not before:
+            continue
+        for metric, higher_is_better in metrics.items():
+            old, new = before.get(metric), run.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({'site': label, 'metric': metric, 'baseline': old, 'value': new, 'change': change})
+    return regressions
+
+# ==================== MONITOR ====================
+
+# Seconds between two runs of a check unless --monitor-intervals sets its own
+MONITOR_INTERVAL = 300.0
+
+# Exposition format the /metrics endpoint serves
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def parse_intervals(spec: Optional[str]) -> Dict[str, float]:
+    """'performance=60,links=3600' as {check name: seconds}"""
+    intervals = {}
+    for item in (part.strip() for part in (spec or '').split(',')):
+        if not item:
+            continue
+        name, _, seconds = item.partition('=')
+        name = name.strip()
+        if name not in CHECKS:
+            raise ValueError(f"Unknown check {name!r} in --monitor-intervals (known: {', '.join(CHECKS)})")
+        try:
+            intervals[name] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Interval of {name} must be a number of seconds, got {seconds!r}") from None
+        if intervals[name] <= 0:
+            raise ValueError(f"Interval of {name} must be positive")
+    return intervals
+
+def prometheus_family(name: str, kind: str, help_text: str, samples: List[Tuple[str, Dict, float]]) -> List[str]:
+    """Exposition lines of a metric family from (name suffix, labels, value) samples"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        text = ','.join('{}="{}"'.format(key, str(label).replace('\\', '\\\\').replace('"', '\\"')
+                                         .replace('\n', '\\n')) for key, label in labels.items())
+        lines.append(f"{name}{suffix}{{{text}}} {float(value)!r}" if text else f"{name}{suffix} {float(value)!r}")
+    return lines
+
+class RollingSeries:
+    """Values recorded over the last `window` seconds"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, value: float, now: float):
+        self.samples.append((now, value))
+        self.values(now)
+
+    def values(self, now: float) -> List[float]:
+        while self.samples and self.samples[0][0] < now - self.window:
+            self.samples.popleft()
+        return [value for _, value in self.samples]
+
+class Monitor(EventSink):
+    """Re-audits the site on a schedule and serves rolling aggregates at /metrics.
+
+    The suite, its session, transport and document store live as long as the
+    process: a cycle only expires the pages held in memory, so unchanged ones
+    are revalidated with a 304 against the disk cache, then runs the checks
+    that are due, each on its own interval. Failed checks are collected from
+    the result events, which is why the monitor is also an event sink.
+    """
+
+    def __init__(self, suite: SEOTestSuite, crawl: bool = False, interval: float = MONITOR_INTERVAL,
+                 intervals: Optional[Dict[str, float]] = None, window: float = 3600.0,
+                 host: str = '127.0.0.1', port: int = 9108):
+        self.suite = suite
+        self.crawl = crawl
+        self.checks = [check.name for check in suite.active_checks()]
+        self.intervals = {name: (intervals or {}).get(name, interval) for name in self.checks}
+        self.next_due = {name: 0.0 for name in self.checks}
+        self.window = window
+        self.paths = []
+        self.ttfb = {}          # path -> RollingSeries of the TTFB measured each cycle
+        self.html_bytes = {}
+        self.weight_bytes = {}
+        self.scores = {}        # path -> {category: score}
+        self.site_scores = {}   # category -> score across pages, 'overall' included
+        self.failures = {}      # check -> {(path, section, check name): details} of its last cycle
+        self.runs = {name: 0 for name in self.checks}
+        self.last_run = {}
+        self.errors = 0
+        self.up = 0
+        self.cycle_seconds = 0.0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._closed = False
+
+    def emit(self, event: ResultEvent):
+        if event.kind == 'check' and not event.passed and event.category:
+            with self._lock:
+                failures = self._pending.setdefault(event.category, {})
+                failures[(event.path or '', event.section or '', event.name)] = event.details
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+    def run(self, max_cycles: Optional[int] = None):
+        """Serve /metrics and run cycles as checks fall due, until interrupted or max_cycles"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        self._thread.start()
+        print(f"{Colors.CYAN}Monitoring {self.suite.base_url}: {len(self.checks)} check(s), "
+              f"metrics at {self.url}{Colors.END}\n")
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                now = time.monotonic()
+                due = [name for name in self.checks if self.next_due[name] <= now]
+                if not due:
+                    time.sleep(max(0.0, min(self.next_due.values()) - now))
+                    continue
+                for name in due:
+                    self.next_due[name] = now + self.intervals[name]
+                self.cycle(due)
+                cycles += 1
+        except KeyboardInterrupt:
+            print(f"\n{Colors.YELLOW}Monitor stopped{Colors.END}")
+        finally:
+            self.close()
+
+    def cycle(self, due: List[str]) -> bool:
+        """Run the due checks once and fold their results into the aggregates"""
+        suite = self.suite
+        suite.documents.expire()
+        suite.resource_cache.clear()
+        with suite._results_lock:
+            suite.results.pop('timings', None)
+        with self._lock:
+            self._pending = {name: {} for name in due}
+        suite.only_checks = set(due)
+        start = time.perf_counter()
+        try:
+            paths = CheckScheduler(suite, suite.max_workers).run(self.crawl)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.up = 0
+            print(f"{Colors.RED}[{datetime.now():%H:%M:%S}] Cycle of {', '.join(due)} failed: {e}{Colors.END}")
+            return False
+        finally:
+            suite.only_checks = None
+        self.record(due, paths, time.perf_counter() - start)
+
+        with self._lock:
+            failing = sum(len(self.failures[name]) for name in due)
+            overall = self.site_scores.get('overall')
+        color = Colors.GREEN if not failing else Colors.YELLOW
+        score = f", score {overall:.1f}%" if overall is not None else ''
+        print(f"{color}[{datetime.now():%H:%M:%S}] {', '.join(due)}: {len(paths)} page(s) in "
+              f"{self.cycle_seconds:.2f}s, {failing} failing check(s){score}{Colors.END}")
+        return True
+
+    def record(self, due: List[str], paths: List[str], elapsed: float):
+        """Fold one successful cycle's results into the rolling aggregates"""
+        suite = self.suite
+        now = time.time()
+        with suite._results_lock:
+            timings = {path: timing['ttfb']['p50'] for path, timing in suite.results.get('timings', {}).items()}
+            pages = {path: {category: data for category, data in page.items()
+                            if 'passed' in data and category != 'overall'}
+                     for path, page in suite.results.get('pages', {}).items()}
+            weights = {path: page['weight']['total_bytes'] for path, page in suite.results.get('pages', {}).items()
+                       if 'weight' in page}
+            categories = {category: dict(data) for category, data in suite.results.items()
+                          if category != 'summary' and 'passed' in data}
+        html_bytes = {}
+        for path in paths:
+            url = urljoin(suite.base_url, path)
+            if url in suite.documents.body_sizes:
+                html_bytes[path] = suite.documents.body_size(url)
+
+        with self._lock:
+            self.paths = list(paths)
+            for path, ttfb in timings.items():
+                self.ttfb.setdefault(path, RollingSeries(self.window)).add(ttfb, now)
+            self.html_bytes.update(html_bytes)
+            self.weight_bytes.update(weights)
+            for path, scores in pages.items():
+                page_total = sum(data['total'] for data in scores.values())
+                self.scores[path] = {category: data['score'] for category, data in scores.items()}
+                if page_total:
+                    self.scores[path]['overall'] = sum(data['passed'] for data in scores.values()) / page_total * 100
+            self.site_scores = {category: data['score'] for category, data in categories.items()}
+            total = sum(data['total'] for data in categories.values())
+            if total:
+                self.site_scores['overall'] = sum(data['passed'] for data in categories.values()) / total * 100
+            for name in due:
+                self.failures[name] = self._pending.pop(name, {})
+                self.runs[name] += 1
+                self.last_run[name] = now
+            self.cycle_seconds = elapsed
+            self.up = 1
+
+    def render(self) -> str:
+        """The aggregates in the Prometheus text exposition format"""
+        suite = self.suite
+        with suite._results_lock:
+            check_times = dict(suite.check_times)
+        stats = dict(getattr(suite.transport, 'stats', {}))
+        now = time.time()
+        with self._lock:
+            paths = list(self.paths)
+            ttfb = []
+            site_ttfb = []
+            for path in paths:
+                values = self.ttfb[path].values(now) if path in self.ttfb else []
+                if not values:
+                    continue
+                site_ttfb += values
+                ttfb += [('', {'path': path, 'quantile': f"{pct / 100:g}"}, percentile(values, pct)) for pct in (50, 95, 99)]
+                ttfb += [('_sum', {'path': path}, sum(values)), ('_count', {'path': path}, len(values))]
+            site = [('', {'quantile': f"{pct / 100:g}"}, percentile(site_ttfb, pct)) for pct in (50, 95, 99)]
+            site += [('_sum', {}, sum(site_ttfb)), ('_count', {}, len(site_ttfb))]
+            lines = []
+            lines += prometheus_family('seo_ttfb_seconds', 'summary',
+                                       f"Time to first byte per page over the last {self.window:g}s", ttfb)
+            lines += prometheus_family('seo_site_ttfb_seconds', 'summary',
+                                       f"Time to first byte across pages over the last {self.window:g}s",
+                                       site if site_ttfb else [])
+            lines += prometheus_family('seo_page_html_bytes', 'gauge', "Decoded HTML size of the page",
+                                       [('', {'path': path}, self.html_bytes[path])
+                                        for path in paths if path in self.html_bytes])
+            lines += prometheus_family('seo_page_weight_bytes', 'gauge', "Transfer size of the page and its assets",
+                                       [('', {'path': path}, self.weight_bytes[path])
+                                        for path in paths if path in self.weight_bytes])
+            lines += prometheus_family('seo_page_score_percent', 'gauge', "Score of the page per category",
+                                       [('', {'path': path, 'category': category}, score)
+                                        for path in paths for category, score in self.scores.get(path, {}).items()])
+            lines += prometheus_family('seo_site_score_percent', 'gauge', "Score across pages per category",
+                                       [('', {'category': category}, score)
+                                        for category, score in self.site_scores.items()])
+            lines += prometheus_family('seo_failing_checks', 'gauge', "Checks failing in the last run of each check",
+                                       [('', {'check': name}, len(self.failures.get(name, {})))
+                                        for name in self.checks if name in self.failures])
+            lines += prometheus_family('seo_check_failing', 'gauge', "1 for each check currently failing",
+                                       [('', {'check': name, 'path': path, 'section': section, 'name': check}, 1)
+                                        for name in self.checks
+                                        for path, section, check in sorted(self.failures.get(name, {}))])
+            lines += prometheus_family('seo_monitor_runs_total', 'counter', "Completed runs of each check",
+                                       [('', {'check': name}, count) for name, count in self.runs.items()])
+            lines += prometheus_family('seo_monitor_last_run_timestamp_seconds', 'gauge',
+                                       "When each check last completed",
+                                       [('', {'check': name}, when) for name, when in self.last_run.items()])
+            lines += prometheus_family('seo_check_seconds_total', 'counter', "Wall time spent in each check",
+                                       [('', {'check': name}, seconds) for name, seconds in check_times.items()])
+            lines += prometheus_family('seo_monitor_cycle_seconds', 'gauge', "Duration of the last cycle",
+                                       [('', {}, self.cycle_seconds)])
+            lines += prometheus_family('seo_monitor_errors_total', 'counter', "Cycles that raised an error",
+                                       [('', {}, self.errors)])
+            lines += prometheus_family('seo_monitor_up', 'gauge', "1 when the last cycle succeeded",
+                                       [('', {}, self.up)])
+        lines += prometheus_family('seo_requests_total', 'counter', "Requests sent through the transport",
+                                   [('', {}, stats.get('requests', 0))])
+        lines += prometheus_family('seo_request_retries_total', 'counter', "Requests retried after an error or 429/5xx",
+                                   [('', {}, stats.get('retries', 0))])
+        if peak_rss_kb() is not None:
+            lines += prometheus_family('seo_monitor_peak_rss_bytes', 'gauge', "Peak resident memory of the monitor",
+                                       [('', {}, peak_rss_kb() * 1024)])
+        return '\n'.join(lines) + '\n'
+
+    def _handler(self):
+        monitor = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlparse(self.path).path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = monitor.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
 def main():
     """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Automated SEO Testing Suite for theo-multimedia.com")
+    parser.add_argument('--local', action='store_true', help="Test http://localhost:3000 instead of production")
+    parser.add_argument('--url', help="Test an arbitrary base URL")
+    parser.add_argument('--no-cache', action='store_true', help="Skip the on-disk ETag/Last-Modified cache")
+    parser.add_argument('--crawl', action='store_true', help="Audit every page listed in sitemap.xml")
+    parser.add_argument('--workers', type=int, default=8,
+                        help="Concurrent pages in --crawl mode, processes in --build-dir mode (default: 8)")
+    parser.add_argument('--assets', action='store_true',
+                        help="Audit page weight: fetch every image, script, stylesheet and font the pages reference")
+    parser.add_argument('--weight-budget', type=int, default=1600,
+                        help="Per-page transfer budget in KB for --assets (default: 1600)")
+    parser.add_argument('--critical-path', action='store_true',
+                        help="Analyze each page's critical rendering path: blocking resources, hints, fonts, chain depth")
+    parser.add_argument('--critical-budget', type=int, default=150,
+                        help="Bytes in KB that may be needed before first render for --critical-path (default: 150)")
+    parser.add_argument('--compression', action='store_true',
+                        help="Negotiate every page and text asset with identity/gzip/br/zstd and report bytes saved")
+    parser.add_argument('--http-cache', action='store_true',
+                        help="Verify caching headers against public/_headers and netlify.toml and time 304 revalidation")
+    parser.add_argument('--user-agents', nargs='?', const=','.join(DEFAULT_USER_AGENTS), metavar='AGENTS',
+                        help="Diff each page as several user agents, the first being the baseline "
+                             f"(default: {','.join(DEFAULT_USER_AGENTS)}; known: {', '.join(USER_AGENTS)})")
+    parser.add_argument('--user-agent', action='append', default=[], metavar='NAME=UA',
+                        help="Add a custom agent to --user-agents (the default set when that isn't given); "
+                             "repeat for several")
+    parser.add_argument('--links', action='store_true',
+                        help="Check every <a href> of the audited pages for errors and redirects")
+    parser.add_argument('--duplicates', action='store_true',
+                        help="Find pages sharing a title or meta description, or with near-identical body text")
+    parser.add_argument('--duplicate-threshold', type=float, default=DUPLICATE_THRESHOLD,
+                        help="Estimated body text similarity from which --duplicates reports two pages "
+                             f"(default: {DUPLICATE_THRESHOLD})")
+    parser.add_argument('--keyword-matrix', action='store_true',
+                        help="Show which pages target which locality in their title or h1 (implied by --keywords)")
+    parser.add_argument('--keywords', metavar='FILE',
+                        help="JSON file of localities, regions and services to look for, replacing the built-in "
+                             "set: {\"locality\": {\"Angoulême\": [\"Angouleme\"]}, \"service\": {...}}")
+    parser.add_argument('--link-ttl', type=int, default=3600,
+                        help="Seconds a link check result is reused from the cache (default: 3600)")
+    parser.add_argument('--max-page-kb', type=int, default=10240,
+                        help="Read at most this many KB of each page, the rest is skipped (default: 10240)")
+    parser.add_argument('--images', nargs='?', const='public', metavar='DIR',
+                        help="Audit the images of DIR (default: public) against the pages' rendered sizes")
+    parser.add_argument('--images-only', action='store_true',
+                        help="Run only the image audit, without fetching any page")
+    parser.add_argument('--db', default='seo_results.db',
+                        help="SQLite run history (default: seo_results.db)")
+    parser.add_argument('--no-db', action='store_true', help="Don't record this run in the run history")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="Flag regressions against a stored run id, or 'median' of the previous runs")
+    parser.add_argument('--window', type=int, default=5, help="Runs in the --compare median window (default: 5)")
+    parser.add_argument('--compare-only', action='store_true',
+                        help="Skip the audit and compare the latest stored run")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Reuse the previous results of pages unchanged since the last run")
+    parser.add_argument('--head-only', action='store_true',
+                        help="Check only the <head> tags (title, meta, canonical, OG/Twitter, geo), "
+                             "reading each page up to </head>")
+    parser.add_argument('--samples', type=int, default=1,
+                        help="Timing samples per page for the response time test (default: 1)")
+    parser.add_argument('--percentile', default='p95', choices=tuple(PERCENTILES),
+                        help="Percentile the < 2s response time threshold applies to (default: p95)")
+    parser.add_argument('--load', action='store_true',
+                        help="Run a load test over the sitemap URLs of a local stand-in server instead of the audit")
+    parser.add_argument('--clients', type=int, default=10, help="Concurrent clients in --load mode (default: 10)")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run --load for (default: 30)")
+    parser.add_argument('--requests', type=int, help="Stop --load after this many requests instead of --duration")
+    parser.add_argument('--allow-remote-load', action='store_true',
+                        help="Allow --load against a non-local host such as a staging deploy")
+    parser.add_argument('--build-dir', help="Audit a static export or .next build directory from disk, no server needed")
+    parser.add_argument('--events', metavar='FILE',
+                        help="Append every check result to FILE as JSON lines while the run progresses")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Print only the final summary instead of every check")
+    parser.add_argument('--transport', default='http', choices=TRANSPORTS,
+                        help="HTTP client: urllib3 pools (http), httpx with HTTP/2 multiplexing on an asyncio loop "
+                             "(async, needs httpx[http2]) or in-memory for --bench (mock) (default: http)")
+    parser.add_argument('--pool-size', type=int, default=16,
+                        help="Keep-alive connections (async: requests in flight) per host (default: 16)")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="Retries of a request on 429/5xx or a connection error, with backoff (default: 2)")
+    parser.add_argument('--backoff', type=float, default=0.5,
+                        help="Seconds before the first retry, doubling after each (default: 0.5)")
+    parser.add_argument('--rate-limit', type=float,
+                        help="Most requests per second across the whole run (default: unlimited)")
+    parser.add_argument('--monitor', action='store_true',
+                        help="Keep re-auditing on a schedule and serve rolling metrics at /metrics instead of "
+                             "one report")
+    parser.add_argument('--monitor-interval', type=float, default=MONITOR_INTERVAL,
+                        help=f"Seconds between two runs of each check in --monitor mode (default: {MONITOR_INTERVAL:g})")
+    parser.add_argument('--monitor-intervals', metavar='CHECK=SECONDS,...',
+                        help="Per-check intervals overriding --monitor-interval, e.g. performance=60,links=3600")
+    parser.add_argument('--monitor-window', type=float, default=3600.0,
+                        help="Seconds of history the /metrics TTFB percentiles cover (default: 3600)")
+    parser.add_argument('--monitor-cycles', type=int, help="Stop --monitor after this many cycles")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="Address the --monitor metrics endpoint listens on (default: 127.0.0.1)")
+    parser.add_argument('--metrics-port', type=int, default=9108,
+                        help="Port of the --monitor metrics endpoint (default: 9108)")
+    parser.add_argument('--bench', nargs='?', const=','.join(map(str, BENCH_SIZES)), metavar='SIZES',
+                        help="Benchmark the audit on local synthetic sites of these page counts "
+                             f"(default: {','.join(map(str, BENCH_SIZES))}); the check flags choose what runs")
+    parser.add_argument('--bench-site', metavar='DIR',
+                        help="Benchmark on a recorded site or static export served from DIR instead")
+    parser.add_argument('--bench-output', metavar='FILE', help="Where to save the --bench results (default: timestamped)")
+    parser.add_argument('--bench-baseline', metavar='FILE',
+                        help="Flag --bench regressions against a previously saved results file")
+    parser.add_argument('--bench-tolerance', type=float, default=10.0,
+                        help="Percent a --bench metric may worsen before it counts as a regression (default: 10)")
+    parser.add_argument('--parser', default='auto', choices=('auto',) + PARSER_ENGINES,
+                        help="HTML parser engine (default: auto, the fastest available on this machine, "
+                             "timed on a sample page)")
+    args = parser.parse_args()
+
+    if args.bench or args.bench_site:
+        sys.exit(run_bench(args))
+
     # Configuration
     # Change this to test local development or production
-    import sys
-
-    if len(sys.argv) > 1 and sys.argv[1] == '--local':
+    if args.url:
+        BASE_URL = args.url
+    elif args.local:
         BASE_URL = "http://localhost:3000"
     else:
         BASE_URL = "https://theo-multimedia.com"  # Production URL
 
+    CACHE_DIR = None if args.no_cache else '.seo_cache'
+
     # PAGESPEED_API_KEY = "YOUR_API_KEY"  # Optional for PageSpeed Insights API
 
     print(f"{Colors.CYAN}Starting SEO Test Suite...{Colors.END}")
     print(f"{Colors.CYAN}Target: {BASE_URL}{Colors.END}\n")
 
-    suite = SEOTestSuite(BASE_URL)
-    suite.run_all_tests()
+    try:
+        transport = make_transport(args.transport, max(1, args.pool_size), max(0, args.retries), args.backoff,
+                                   args.rate_limit)
+        keywords = load_keywords(args.keywords) if args.keywords else None
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}{e}{Colors.END}")
+        sys.exit(1)
+    suite = SEOTestSuite(BASE_URL, cache_dir=CACHE_DIR, parser=args.parser, build_dir=args.build_dir,
+                         samples=args.samples, timing_percentile=args.percentile,
+                         results_db=None if args.no_db else args.db, transport=transport)
+    suite.documents.max_body_bytes = max(1, args.max_page_kb) * 1024
+    if keywords is not None:
+        suite.set_keywords(keywords)
+    if args.quiet:
+        suite.verbose = False
+        suite.show_pages = False
+    if args.events:
+        suite.events = JsonlSink(args.events)
+
+    try:
+        run_suite(suite, args)
+    finally:
+        suite.events.close()
+        suite.session.close()
+
+def run_suite(suite: SEOTestSuite, args):
+    """Run the mode selected on the command line"""
+    if args.compare_only or args.compare:
+        # Checked before the audit runs rather than after it
+        if args.no_db:
+            print(f"{Colors.RED}--compare needs the run history, it can't be combined with --no-db{Colors.END}")
+            sys.exit(1)
+        if args.compare not in (None, 'median') and not args.compare.isdigit():
+            print(f"{Colors.RED}Unknown --compare baseline {args.compare!r}: use a stored run id or 'median'"
+                  f"{Colors.END}")
+            sys.exit(1)
+    if args.compare_only:
+        regressions = suite.compare_runs(args.compare or 'median', window=args.window)
+        sys.exit(1 if regressions else 0)
+    if args.load:
+        try:
+            suite.run_load_test(clients=max(1, args.clients), duration=args.duration,
+                                max_requests=args.requests, allow_remote=args.allow_remote_load)
+        except ValueError as e:
+            print(f"{Colors.RED}{e}{Colors.END}")
+            sys.exit(1)
+        # Latency and throughput go into the run history so --compare can flag load regressions
+        suite.record_run()
+        if args.compare and suite.run_id:
+            if suite.compare_runs(args.compare, window=args.window):
+                sys.exit(1)
+        return
+
+    if args.images_only:
+        suite.test_images(args.images or 'public', max(1, args.workers))
+        suite.generate_report()
+        return
+
+    user_agents = None
+    if args.user_agents or args.user_agent:
+        try:
+            user_agents = parse_user_agents(args.user_agents or ','.join(DEFAULT_USER_AGENTS), args.user_agent)
+        except ValueError as e:
+            print(f"{Colors.RED}{e}{Colors.END}")
+            sys.exit(1)
+        if len(user_agents) < 2:
+            print(f"{Colors.RED}--user-agents needs a baseline and at least one other agent{Colors.END}")
+            sys.exit(1)
+
+    suite.weight_budget_kb = args.weight_budget
+    suite.link_ttl = args.link_ttl
+    suite.critical_budget_kb = args.critical_budget
+    suite.duplicate_threshold = args.duplicate_threshold
+    options = dict(max_workers=max(1, args.workers), check_assets=args.assets, image_dir=args.images,
+                   check_links=args.links, critical_path=args.critical_path, check_compression=args.compression,
+                   check_cache=args.http_cache, user_agents=user_agents, check_duplicates=args.duplicates,
+                   check_keywords=args.keyword_matrix or bool(args.keywords), head_only=args.head_only)
+    if args.monitor:
+        sys.exit(run_monitor(suite, args, options))
+    suite.run_all_tests(crawl=args.crawl, incremental=args.incremental, **options)
+    if args.compare and suite.run_id:
+        if suite.compare_runs(args.compare, window=args.window):
+            sys.exit(1)
+
+def run_monitor(suite: SEOTestSuite, args, options: Dict) -> int:
+    """Run --monitor until interrupted (or --monitor-cycles)"""
+    if suite.offline:
+        print(f"{Colors.RED}--monitor watches a live site, it can't be combined with --build-dir{Colors.END}")
+        return 1
+    suite.configure(**options)
+    load_plugin_checks(suite.error)
+    try:
+        intervals = parse_intervals(args.monitor_intervals)
+    except ValueError as e:
+        print(f"{Colors.RED}{e}{Colors.END}")
+        return 1
+    try:
+        monitor = Monitor(suite, crawl=args.crawl, interval=max(1.0, args.monitor_interval), intervals=intervals,
+                          window=args.monitor_window, host=args.metrics_host, port=args.metrics_port)
+    except OSError as e:
+        print(f"{Colors.RED}Can't serve metrics on {args.metrics_host}:{args.metrics_port}: {e}{Colors.END}")
+        return 1
+    suite.verbose = False
+    suite.show_pages = False
+    suite.events = TeeSink(suite.events, monitor)
+    monitor.run(args.monitor_cycles)
+    return 0
+
+def run_bench(args) -> int:
+    """Run --bench and save its results; exit status 1 when it regressed against --bench-baseline"""
+    try:
+        sizes = [int(size) for size in (args.bench or '').split(',') if size.strip()] or list(BENCH_SIZES)
+    except ValueError:
+        print(f"{Colors.RED}--bench takes comma-separated page counts, got {args.bench}{Colors.END}")
+        return 1
+    if args.bench_site and not build_page_routes(args.bench_site):
+        print(f"{Colors.RED}No HTML pages found in {args.bench_site}{Colors.END}")
+        return 1
+    try:
+        user_agents = parse_user_agents(args.user_agents or ','.join(DEFAULT_USER_AGENTS),
+                                        args.user_agent) if args.user_agents or args.user_agent else None
+    except ValueError as e:
+        print(f"{Colors.RED}{e}{Colors.END}")
+        return 1
+    options = {'check_assets': args.assets, 'check_critical_path': args.critical_path,
+               'check_compression': args.compression, 'check_cache': args.http_cache,
+               'check_links': args.links, 'user_agents': user_agents, 'check_duplicates': args.duplicates,
+               'check_keywords': args.keyword_matrix, 'head_only': args.head_only}
+    transport = {'name': args.transport, 'pool_per_host': max(1, args.pool_size), 'retries': max(0, args.retries),
+                 'backoff': args.backoff, 'rate_limit': args.rate_limit}
+    results = run_benchmark(sizes, max(1, args.workers), args.parser, args.bench_site, options, transport)
+
+    output = args.bench_output or f"seo_bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n{Colors.GREEN}Benchmark saved to: {output}{Colors.END}")
+
+    if not args.bench_baseline:
+        return 0
+    with open(args.bench_baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n{Colors.BOLD}Against {args.bench_baseline}{Colors.END}")
+    if baseline.get('format') != BENCH_FORMAT:
+        print(f"{Colors.RED}Baseline format {baseline.get('format')} isn't comparable with {BENCH_FORMAT}{Colors.END}")
+        return 1
+    differences = [key for key in ('python', 'parser', 'workers', 'options', 'transport')
+                   if baseline.get(key, 'http' if key == 'transport' else None) != results[key]]
+    if differences:
+        print(f"{Colors.YELLOW}Baseline differs in {', '.join(differences)}: compare with care{Colors.END}")
+    regressions = compare_benchmarks(results, baseline, args.bench_tolerance)
+    for regression in regressions:
+        print(f"{Colors.RED}✗ {regression['site']} {regression['metric']}: {regression['baseline']:.2f} → "
+              f"{regression['value']:.2f} ({regression['change']:+.1f}%){Colors.END}")
+    if not regressions:
+        print(f"{Colors.GREEN}✓ No regressions beyond {args.bench_tolerance:.0f}%{Colors.END}")
+    return 1 if regressions else 0
 
 if __name__ == "__main__":
     main()